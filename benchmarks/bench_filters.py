@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark filtering evidences and BEL edges with per-item checks versus a compiled :class:`RowFilter`.
+
+Run with ``python benchmarks/bench_filters.py --help``.
+"""
+
+import itertools as itt
+import random
+import time
+from typing import List, Tuple
+
+import click
+
+from bel_enrichment.filters import RowFilter, SOURCE_BLACKLIST, SUBSTRING_BLACKLIST, TEXT_BLACKLIST
+from indra.statements import Evidence
+
+APIS = ['reach', 'sparser', 'medscan', 'trips', 'rlimsp', 'bel', 'signor', None]
+TEXTS = ['A phosphorylates B in sentence {}.', 'No evidence text.', 'Modified assertion', '', None]
+TERMS = [
+    'p(HGNC:6893 ! MAPT)', 'p(HGNC:4617 ! GSK3B, pmod(Ph, Ser, 9))', 'a(CHEBI:15422 ! ATP)',
+    'complex(p(HGNC:620 ! APP), p(HGNC:9508 ! PSEN1))', 'a(PUBCHEM:5280343)', 'bp(GO:0006915 ! "apoptotic process")',
+]
+RELATIONS = ['increases', 'decreases', 'directlyIncreases', 'directlyDecreases']
+
+
+def make_evidences(number: int, seed: int) -> List[Evidence]:
+    """Make synthetic evidences with a mix of usable and unusable texts, sources, and PMIDs."""
+    rng = random.Random(seed)
+    rv = []
+    for i in range(number):
+        text = rng.choice(TEXTS)
+        rv.append(Evidence(
+            source_api=rng.choice(APIS),
+            pmid=rng.choice([str(rng.randint(10_000_000, 30_000_000)), None]),
+            text=text.format(i) if text else text,
+        ))
+    return rv
+
+
+def make_edges(number: int, seed: int) -> List[Tuple[str, str, str]]:
+    """Make synthetic BEL edges as triples of strings."""
+    rng = random.Random(seed)
+    return [(rng.choice(TERMS), rng.choice(RELATIONS), rng.choice(TERMS)) for _ in range(number)]
+
+
+def _keep_evidence(evidence: Evidence):
+    """Check the evidence like before :class:`RowFilter` was used."""
+    return (
+        evidence.pmid and
+        evidence.text and
+        evidence.text not in TEXT_BLACKLIST and
+        evidence.source_api and
+        evidence.source_api not in SOURCE_BLACKLIST
+    )
+
+
+def _keep_bel(bel_subject: str, bel_relation: str, bel_object: str, substring_blacklist) -> bool:
+    """Check the BEL edge like before :class:`RowFilter` was used."""
+    return not any(
+        substring in bel_part
+        for bel_part, substring in itt.product((bel_subject, bel_relation, bel_object), substring_blacklist)
+    )
+
+
+@click.command()
+@click.option('-n', '--number', type=int, default=500_000, show_default=True, help='Number of evidences and edges')
+@click.option('-s', '--substrings', type=int, default=0, show_default=True,
+              help='Number of extra substrings to add to the substring blacklist')
+@click.option('--seed', type=int, default=0, show_default=True)
+def main(number: int, substrings: int, seed: int):
+    """Compare the time of filtering evidences and edges each way."""
+    evidences = make_evidences(number, seed)
+    edges = make_edges(number, seed)
+    substring_blacklist = SUBSTRING_BLACKLIST | {f'NAMESPACE{i}:' for i in range(substrings)}
+    row_filter = RowFilter(substring_blacklist=substring_blacklist)
+
+    start = time.time()
+    expected = [evidence for evidence in evidences if _keep_evidence(evidence)]
+    baseline = time.time() - start
+    click.echo(f'evidences, per-item:         {baseline:.3f} s ({len(expected)} kept)')
+
+    start = time.time()
+    kept = row_filter.filter_evidences(evidences)
+    elapsed = time.time() - start
+    status = 'same' if kept == expected else 'DIFFERENT'
+    click.echo(f'evidences, filter_evidences: {elapsed:.3f} s ({baseline / elapsed:.1f}x, {status})')
+
+    start = time.time()
+    expected = [edge for edge in edges if _keep_bel(*edge, substring_blacklist)]
+    baseline = time.time() - start
+    click.echo(f'edges, per-item:             {baseline:.3f} s ({len(expected)} kept)')
+
+    keep_bel = row_filter.keep_bel
+    start = time.time()
+    kept = [edge for edge in edges if keep_bel(*edge)]
+    elapsed = time.time() - start
+    status = 'same' if kept == expected else 'DIFFERENT'
+    click.echo(f'edges, keep_bel:             {elapsed:.3f} s ({baseline / elapsed:.1f}x, {status})')
+
+
+if __name__ == '__main__':
+    main()
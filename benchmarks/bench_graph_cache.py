@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the warm-start latency of each format for caching compiled sheets.
+
+Run with ``python benchmarks/bench_graph_cache.py --help``.
+"""
+
+import os
+import random
+import tempfile
+import time
+
+import click
+
+import pybel
+from bel_enrichment.graph_cache import GRAPH_CACHE_FORMATS, from_graph_cache, to_graph_cache
+from pybel import BELGraph
+from pybel.dsl import Protein
+
+
+def make_graph(number: int, seed: int) -> BELGraph:
+    """Make a synthetic graph like the ones compiled from curation sheets."""
+    rng = random.Random(seed)
+    proteins = [Protein(namespace='HGNC', name=f'GENE{i}') for i in range(max(2, number // 10))]
+    graph = BELGraph(name='benchmark', version='0.0.0')
+    for i in range(number):
+        u, v = rng.sample(proteins, 2)
+        graph.add_increases(
+            u, v,
+            citation=str(rng.randint(10_000_000, 30_000_000)),
+            evidence=f'Sentence {i} describing how one gene affects another in some cell line.',
+            annotations={'Curator': 'benchmark', 'Confidence': 'Medium', 'INDRA_API': rng.choice(['reach', 'sparser'])},
+        )
+    return graph
+
+
+def _time_read(func, repeat: int) -> float:
+    start = time.time()
+    for _ in range(repeat):
+        func()
+    return (time.time() - start) / repeat
+
+
+@click.command()
+@click.option('-n', '--number', type=int, default=50_000, show_default=True, help='Number of edges')
+@click.option('-r', '--repeat', type=int, default=3, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True)
+def main(number: int, repeat: int, seed: int):
+    """Compare writing, reading, and the size of each cache format."""
+    graph = make_graph(number, seed)
+    directory = tempfile.mkdtemp()
+
+    # The format that was used before, for comparison
+    legacy_path = os.path.join(directory, 'sheets.bel.nodelink.json')
+    pybel.to_nodelink_file(graph, legacy_path, indent=2, sort_keys=True)
+    elapsed = _time_read(lambda: pybel.from_nodelink_file(legacy_path), repeat)
+    click.echo(f'{"pretty nodelink.json":>20}: read {elapsed:.2f}s, {os.path.getsize(legacy_path) / 2 ** 20:.1f} MiB')
+
+    for fmt, extension in GRAPH_CACHE_FORMATS.items():
+        path = os.path.join(directory, f'sheets.bel.{extension}')
+        start = time.time()
+        to_graph_cache(graph, path, fmt=fmt)
+        write_time = time.time() - start
+        elapsed = _time_read(lambda: from_graph_cache(path, fmt=fmt), repeat)
+        click.echo(
+            f'{fmt:>20}: read {elapsed:.2f}s, write {write_time:.2f}s,'
+            f' {os.path.getsize(path) / 2 ** 20:.1f} MiB',
+        )
+
+
+if __name__ == '__main__':
+    main()
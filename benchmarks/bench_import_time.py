@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the startup time of the command line interface.
+
+Run with ``python benchmarks/bench_import_time.py --help``. Exits with an error if a heavy dependency is imported
+just to load the command line interface or if startup takes longer than ``--max-seconds``, so it can guard
+against regressions in CI.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+import click
+
+#: Modules that must not be imported until a command that uses them is invoked
+HEAVY_MODULES = ['pybel', 'indra', 'bel_repository', 'pandas', 'numpy', 'networkx']
+
+
+def get_import_times(module: str) -> List[Tuple[int, str]]:
+    """Get the cumulative import time in microseconds of each module imported by importing the given module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    rv = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rv.append((int(cumulative), name.rstrip()))
+    return rv
+
+
+def time_command(args: List[str], repeat: int) -> List[float]:
+    """Time running the command line interface with the given arguments in a new interpreter."""
+    rv = []
+    for _ in range(repeat):
+        start = time.time()
+        subprocess.run([sys.executable, '-m', 'bel_enrichment', *args], stdout=subprocess.DEVNULL, check=True)
+        rv.append(time.time() - start)
+    return rv
+
+
+@click.command()
+@click.option('-r', '--repeat', type=int, default=5, show_default=True)
+@click.option('-n', '--number', type=int, default=10, show_default=True, help='Number of slowest imports to show')
+@click.option('--max-seconds', type=float, help='Fail if the median time of any command is longer')
+def main(repeat: int, number: int, max_seconds: float):
+    """Measure the import time of the command line interface and the time to show its help."""
+    import_times = get_import_times('bel_enrichment.cli')
+    total = next(cumulative for cumulative, name in import_times if name.strip() == 'bel_enrichment.cli')
+    click.echo(f'import bel_enrichment.cli: {total / 1_000:.1f} ms cumulative')
+    for cumulative, name in sorted(import_times, reverse=True)[:number]:
+        click.echo(f'  {cumulative / 1_000:>8.1f} ms  {name}')
+
+    imported = {name.strip().split('.')[0] for _, name in import_times}
+    heavy = sorted(imported.intersection(HEAVY_MODULES))
+
+    slowest = 0.0
+    for args in (['--help'], ['ranks', '--help']):
+        times = time_command(args, repeat)
+        median = statistics.median(times)
+        slowest = max(slowest, median)
+        click.echo(f'bel-enrichment {" ".join(args)}: median {median:.3f} s, best {min(times):.3f} s')
+
+    failed = False
+    if heavy:
+        click.secho(f'heavy modules imported by the command line interface: {", ".join(heavy)}', fg='red')
+        failed = True
+    if max_seconds is not None and max_seconds < slowest:
+        click.secho(f'startup took longer than {max_seconds} s', fg='red')
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark ranking genes by processing a copy of the graph against streaming over its edges.
+
+Run with ``python benchmarks/bench_ranking.py --help``.
+"""
+
+import random
+import time
+import tracemalloc
+
+import click
+
+from bel_enrichment.ranking import RankTable, process_graph, rank_genes, stream_rank_genes
+from pybel import BELGraph
+from pybel.dsl import BiologicalProcess, Gene, MicroRna, Pathology, Protein, ProteinModification, Rna
+
+
+def make_graph(number: int, seed: int) -> BELGraph:
+    """Make a synthetic knowledge graph with a mix of the node types that are collapsed and removed."""
+    rng = random.Random(seed)
+    names = [f'GENE{i}' for i in range(max(2, number // 5))]
+
+    def _make_node():
+        name = rng.choice(names)
+        return rng.choice([
+            Protein('HGNC', name),
+            Protein('HGNC', name, variants=[ProteinModification('Ph', code='Ser', position=rng.randint(1, 500))]),
+            Rna('HGNC', name),
+            MicroRna('HGNC', name),
+            Gene('HGNC', name),
+            BiologicalProcess('GO', f'process {rng.randint(1, 100)}'),
+            Pathology('MESH', f'disease {rng.randint(1, 100)}'),
+        ])
+
+    graph = BELGraph(name='benchmark', version='0.0.0')
+    for i in range(number):
+        graph.add_qualified_edge(
+            _make_node(), _make_node(),
+            relation=rng.choice(['increases', 'decreases', 'directlyIncreases', 'association']),
+            citation=str(rng.randint(10_000_000, 30_000_000)),
+            evidence=f'Sentence {i} describing how one gene affects another in some cell line.',
+        )
+    return graph
+
+
+def _measure(func, graph):
+    tracemalloc.start()
+    start = time.time()
+    rv = func(graph)
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rv, elapsed, peak
+
+
+@click.command()
+@click.option('-n', '--number', type=int, default=20_000, show_default=True, help='Number of edges')
+@click.option('--seed', type=int, default=0, show_default=True)
+@click.option('-k', '--top', type=int, default=500, show_default=True, help='Number of top genes to select')
+def main(number: int, seed: int, top: int):
+    """Compare the time and peak memory of ranking genes with each method."""
+    graph = make_graph(number, seed)
+    click.echo(f'graph with {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges')
+
+    expected, elapsed, peak = _measure(lambda g: rank_genes(process_graph(g)), graph)
+    click.echo(f'process_graph + rank_genes: {elapsed:.2f} s, peak {peak / 2 ** 20:.1f} MiB')
+
+    ranks, elapsed, peak = _measure(stream_rank_genes, graph)
+    click.echo(f'stream_rank_genes:          {elapsed:.2f} s, peak {peak / 2 ** 20:.1f} MiB')
+
+    if list(ranks.items()) != list(expected.items()):
+        click.secho('ranks are different', fg='red')
+
+    start = time.time()
+    expected_top = [(namespace, name, rank) for (namespace, name), rank in ranks.most_common(top)]
+    click.echo(f'Counter.most_common({top}): {1000 * (time.time() - start):.2f} ms')
+
+    rank_table = RankTable.from_ranks(ranks)
+    start = time.time()
+    rank_table_top = list(rank_table.iterate(number=top))
+    click.echo(f'RankTable.iterate({top}):   {1000 * (time.time() - start):.2f} ms')
+
+    if rank_table_top != expected_top:
+        click.secho('top genes are different', fg='red')
+
+
+if __name__ == '__main__':
+    main()
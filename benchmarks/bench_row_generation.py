@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark generating BEL curation rows per-statement versus in batches.
+
+Run with ``python benchmarks/bench_row_generation.py --help``.
+"""
+
+import random
+import time
+from collections import Counter
+from typing import List
+
+import click
+
+from bel_enrichment.indra_utils import get_rows_from_statements
+from indra.statements import (
+    Activation, Agent, Complex, Evidence, IncreaseAmount, Inhibition, Phosphorylation, Statement,
+    stmts_from_json, stmts_to_json,
+)
+
+#: A handful of HGNC genes used to build synthetic statements
+GENES = [
+    ('MAPT', '6893'), ('GSK3B', '4617'), ('APP', '620'), ('PSEN1', '9508'), ('BACE1', '933'),
+    ('MAP2K1', '6840'), ('MAPK1', '6871'), ('MAPK3', '6877'), ('AKT1', '391'), ('TP53', '11998'),
+]
+APIS = ['reach', 'sparser', 'medscan', 'trips', 'rlimsp']
+
+
+def make_statements(number: int, evidences: int, seed: int) -> List[Statement]:
+    """Make synthetic INDRA statements between random pairs of genes."""
+    rng = random.Random(seed)
+    statements = []
+    for i in range(number):
+        (a, a_id), (b, b_id) = rng.sample(GENES, 2)
+        subj = Agent(a, db_refs={'HGNC': a_id})
+        obj = Agent(b, db_refs={'HGNC': b_id})
+        evidence = [
+            Evidence(
+                source_api=rng.choice(APIS),
+                pmid=str(rng.randint(10_000_000, 30_000_000)),
+                text=f'{a} does something to {b} in sentence {i}-{j}.',
+            )
+            for j in range(evidences)
+        ]
+        cls = rng.choice([Activation, Inhibition, IncreaseAmount, Phosphorylation, Complex])
+        if cls is Complex:
+            statement = Complex([subj, obj], evidence=evidence)
+        else:
+            statement = cls(subj, obj, evidence=evidence)
+        statement.belief = rng.random()
+        statements.append(statement)
+    return statements
+
+
+def _time(statements_json, batch_size):
+    statements = stmts_from_json(statements_json)
+    start = time.time()
+    rows = list(get_rows_from_statements(statements, allow_duplicates=True, batch_size=batch_size))
+    return time.time() - start, Counter(rows)
+
+
+@click.command()
+@click.option('-n', '--number', type=int, default=2_000, show_default=True, help='Number of statements')
+@click.option('-e', '--evidences', type=int, default=3, show_default=True, help='Evidences per statement')
+@click.option('-b', '--batch-size', type=int, multiple=True, default=[50, 500, 5_000], show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True)
+def main(number: int, evidences: int, batch_size: List[int], seed: int):
+    """Compare per-statement and batched row generation."""
+    statements_json = stmts_to_json(make_statements(number, evidences, seed))
+
+    baseline_time, baseline_rows = _time(statements_json, None)
+    click.echo(f'per-statement: {baseline_time:.2f}s ({sum(baseline_rows.values())} rows)')
+
+    for size in batch_size:
+        elapsed, rows = _time(statements_json, size)
+        status = 'same rows' if rows == baseline_rows else 'DIFFERENT ROWS'
+        click.echo(f'batch={size:>6}: {elapsed:.2f}s ({baseline_time / elapsed:.1f}x, {status})')
+
+
+if __name__ == '__main__':
+    main()
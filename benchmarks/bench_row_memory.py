@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the memory used by buffers of BEL curation rows.
+
+Compares a list of the old dataclass-based rows, a list of :class:`bel_enrichment.indra_utils.Row`,
+and a :class:`bel_enrichment.indra_utils.RowTable`. Run with ``python benchmarks/bench_row_memory.py --help``.
+"""
+
+import random
+import tracemalloc
+from dataclasses import dataclass
+
+import click
+
+from bel_enrichment.indra_utils import Row, RowTable
+
+
+@dataclass
+class DataclassRow:
+    """The previous implementation of a row, for comparison."""
+
+    uuid: str
+    statement_hash: str
+    evidence_hash: str
+    api: str
+    belief: float
+    pmid: str
+    evidence: str
+    bel_subject: str
+    bel_relation: str
+    bel_object: str
+
+
+def _iterate_values(number: int, seed: int):
+    """Iterate over row values, building new string objects like parsing a response would."""
+    rng = random.Random(seed)
+    for i in range(number):
+        statement = rng.randint(0, number // 4)
+        yield dict(
+            uuid=f'uuid-{statement}',
+            statement_hash=str(statement * 7919),
+            evidence_hash=str(rng.getrandbits(60)),
+            api=rng.choice(['re', 'spars', 'meds', 'tri']) + 'er',
+            belief=round(rng.random(), 2),
+            pmid=str(rng.randint(0, number // 10)),
+            evidence=f'Sentence {i} describing how one gene affects another in some cell line.',
+            bel_subject=f'p(HGNC:{rng.randint(0, 2_000)})',
+            bel_relation=rng.choice(['increases', 'decreases', 'directlyIncreases']) + '',
+            bel_object=f'p(HGNC:{rng.randint(0, 2_000)})',
+        )
+
+
+def _measure(build) -> int:
+    tracemalloc.start()
+    buffer = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del buffer
+    return size
+
+
+@click.command()
+@click.option('-n', '--number', type=int, default=200_000, show_default=True, help='Number of rows')
+@click.option('--seed', type=int, default=0, show_default=True)
+def main(number: int, seed: int):
+    """Compare the memory used by lists of rows and a columnar row table."""
+    results = [
+        ('list of dataclass rows', _measure(lambda: [DataclassRow(**v) for v in _iterate_values(number, seed)])),
+        ('list of Row', _measure(lambda: [Row(**v) for v in _iterate_values(number, seed)])),
+        ('RowTable', _measure(lambda: RowTable(Row(**v) for v in _iterate_values(number, seed)))),
+    ]
+    baseline = results[0][1]
+    for label, size in results:
+        click.echo(f'{label:>22}: {size / 2 ** 20:8.1f} MiB ({size / baseline:.0%})')
+
+
+if __name__ == '__main__':
+    main()
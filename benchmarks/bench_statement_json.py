@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark writing statements as one indented JSON list versus streaming JSON Lines.
+
+Run with ``python benchmarks/bench_statement_json.py --help``.
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+import click
+
+from bel_enrichment.jsonl import iterate_jsonl, to_jsonl
+from indra.statements import Activation, Agent, Evidence, Statement, stmts_to_json
+
+GENES = [('MAPT', '6893'), ('GSK3B', '4617'), ('APP', '620'), ('PSEN1', '9508'), ('BACE1', '933')]
+
+
+def make_statements(number: int, evidences: int, seed: int) -> List[Statement]:
+    """Make synthetic INDRA statements between random pairs of genes."""
+    rng = random.Random(seed)
+    statements = []
+    for i in range(number):
+        (a, a_id), (b, b_id) = rng.sample(GENES, 2)
+        statements.append(Activation(
+            Agent(a, db_refs={'HGNC': a_id}),
+            Agent(b, db_refs={'HGNC': b_id}),
+            evidence=[
+                Evidence(
+                    source_api='reach',
+                    pmid=str(rng.randint(10_000_000, 30_000_000)),
+                    text=f'{a} does something to {b} in sentence {i}-{j}.',
+                )
+                for j in range(evidences)
+            ],
+        ))
+    return statements
+
+
+def _dump_json(statements, path):
+    with open(path, 'w') as file:
+        json.dump(stmts_to_json(statements), file, indent=2)
+
+
+def _measure(func, *args):
+    tracemalloc.start()
+    start = time.time()
+    func(*args)
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+@click.command()
+@click.option('-n', '--number', type=int, default=20_000, show_default=True, help='Number of statements')
+@click.option('-e', '--evidences', type=int, default=3, show_default=True, help='Evidences per statement')
+@click.option('--seed', type=int, default=0, show_default=True)
+def main(number: int, evidences: int, seed: int):
+    """Compare the time, peak memory, and file size of each way of writing statements."""
+    statements = make_statements(number, evidences, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        for name, func, path in [
+            ('json.dump(indent=2)', _dump_json, os.path.join(directory, 'statements.json')),
+            ('to_jsonl', to_jsonl, os.path.join(directory, 'statements.jsonl')),
+            ('to_jsonl (gzip)', to_jsonl, os.path.join(directory, 'statements.jsonl.gz')),
+        ]:
+            elapsed, peak = _measure(func, statements, path)
+            size = os.path.getsize(path)
+            click.echo(f'{name:<20} {elapsed:.2f} s, peak {peak / 2 ** 20:.1f} MiB, {size / 2 ** 20:.1f} MiB on disk')
+
+        start = time.time()
+        number_read = sum(1 for _ in iterate_jsonl(os.path.join(directory, 'statements.jsonl.gz')))
+        click.echo(f'{"iterate_jsonl (gzip)":<20} {time.time() - start:.2f} s, {number_read} statements')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,42 @@
 # -*- coding: utf-8 -*-
 
-"""A package for generating curation sheets for rationally enriching a BEL graph using INDRA and PyBEL."""
+"""A package for generating curation sheets for rationally enriching a BEL graph using INDRA and PyBEL.
 
-from .indra_utils import get_and_write_statements_from_agents, get_and_write_statements_from_pmids  # noqa: F401
-from .repository import BELSheetsRepository, process_df  # noqa: F401
-from .sheets import generate_curation_report, generate_curation_summary  # noqa: F401
+The functions below are imported from their modules on first access, so importing this package (e.g., for its
+command line interface) doesn't pay for importing PyBEL and INDRA.
+"""
+
+import importlib
+
+__all__ = [
+    'get_and_write_statements_from_agents',
+    'get_and_write_statements_from_pmids',
+    'BELSheetsRepository',
+    'process_df',
+    'generate_curation_report',
+    'generate_curation_summary',
+]
+
+#: The modules from which each of the lazily imported names come
+_LAZY_IMPORTS = {
+    'get_and_write_statements_from_agents': 'indra_utils',
+    'get_and_write_statements_from_pmids': 'indra_utils',
+    'BELSheetsRepository': 'repository',
+    'process_df': 'repository',
+    'generate_curation_report': 'sheets',
+    'generate_curation_summary': 'sheets',
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value  # only import once
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""A persistent cache of INDRA DB REST responses."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Mapping, Optional, Tuple
+
+from indra.sources import indra_db_rest
+from indra.statements import Statement, stmts_from_json, stmts_to_json
+
+__all__ = [
+    'StatementCache',
+    'CacheMissError',
+]
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+)
+'''
+
+
+class CacheMissError(LookupError):
+    """Raised when a query isn't in the cache and the cache is offline."""
+
+
+@dataclass
+class StatementCache:
+    """A content-addressed cache of INDRA statements from the INDRA DB REST API backed by SQLite.
+
+    Responses are keyed by a hash of the endpoint and its query parameters and are stored as compressed
+    statement JSON, so a hit never touches the network.
+    """
+
+    directory: str
+    #: The number of seconds after which a cached response is refetched. If none, never expires.
+    ttl: Optional[float] = None
+    #: The maximum number of compressed bytes kept. If exceeded, the least recently used responses are evicted.
+    max_size: Optional[int] = None
+    #: If true, never queries the INDRA DB REST API and raises a :class:`CacheMissError` on a miss
+    offline: bool = False
+    #: The client used on a miss. Can be replaced by anything with the same functions, e.g., for testing.
+    client: Any = field(default=indra_db_rest, repr=False)
+
+    database_name: str = 'indra_db_rest.sqlite'
+
+    path: str = field(init=False)
+
+    def __post_init__(self) -> None:  # noqa: D105
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, self.database_name)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60)
+
+    def get_statements(self, agents: Iterable[str]) -> List[Statement]:
+        """Get statements about all of the given agents, like :func:`indra.sources.indra_db_rest.get_statements`."""
+        agents = sorted(agents)
+        query = dict(endpoint='statements', agents=agents)
+        return self._get_or_fetch(query, lambda: self.client.get_statements(agents=agents).statements)
+
+    def get_statements_for_paper(self, ids: Iterable[Tuple[str, str]]) -> List[Statement]:
+        """Get statements from the given papers, like :func:`indra.sources.indra_db_rest.get_statements_for_paper`."""
+        ids = sorted(ids)
+        query = dict(endpoint='papers', ids=ids)
+        return self._get_or_fetch(
+            query,
+            lambda: self.client.get_statements_for_paper(ids=ids, simple_response=True),
+        )
+
+    def _get_or_fetch(self, query: Mapping[str, Any], fetch) -> List[Statement]:
+        query_str = json.dumps(query, sort_keys=True)
+        key = hashlib.sha256(query_str.encode('utf-8')).hexdigest()
+
+        statements = self.get(key)
+        if statements is not None:
+            logger.debug('cache hit for %s', query_str)
+            return statements
+
+        if self.offline:
+            raise CacheMissError(f'not in cache at {self.path}: {query_str}')
+
+        logger.debug('cache miss for %s', query_str)
+        statements = fetch()
+        self.set(key, query_str, statements)
+        return statements
+
+    def get(self, key: str) -> Optional[List[Statement]]:
+        """Get the statements cached under the given key, or None if they are missing or expired."""
+        with closing(self._connect()) as connection, connection:
+            result = connection.execute('SELECT created, value FROM responses WHERE key = ?', (key,)).fetchone()
+            if result is None:
+                return None
+
+            created, value = result
+            now = time.time()
+            # An offline cache serves expired responses since it couldn't refresh them anyway
+            if self.ttl is not None and self.ttl < now - created and not self.offline:
+                connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                return None
+
+            connection.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+
+        return stmts_from_json(json.loads(zlib.decompress(value).decode('utf-8')))
+
+    def set(self, key: str, query: str, statements: List[Statement]) -> None:
+        """Store the statements under the given key then evict old responses if the cache is too big."""
+        value = zlib.compress(json.dumps(stmts_to_json(statements)).encode('utf-8'))
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO responses (key, query, created, accessed, size, value)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (key, query, now, now, len(value), value),
+            )
+            if self.max_size is not None:
+                self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Remove the least recently accessed responses until the cache fits in its maximum size."""
+        total, = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()
+        if total <= self.max_size:
+            return
+
+        evicted = []
+        for key, size in connection.execute('SELECT key, size FROM responses ORDER BY accessed ASC').fetchall():
+            if total <= self.max_size:
+                break
+            evicted.append((key,))
+            total -= size
+
+        logger.info('evicting %d responses from %s', len(evicted), self.path)
+        connection.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM responses')
@@ -1,22 +1,20 @@
 # -*- coding: utf-8 -*-
 
-"""The command line interface for BEL enrichment."""
+"""The command line interface for BEL enrichment.
+
+PyBEL and INDRA take seconds to import, so they are only imported by the commands that use them.
+Keep module-level imports in this file to the standard library and :mod:`click`.
+"""
 
-import json
 import os
 import sys
-from typing import List, TextIO
+from typing import List, Optional, TYPE_CHECKING, TextIO, Union
 
 import click
 
-import indra.util.get_version
-import pybel.version
-from indra.statements import stmts_to_json
-from pybel import BELGraph
-from pybel.cli import graph_argument
-from .indra_utils import get_and_write_statements_from_agents, get_and_write_statements_from_pmids
-from .ranking import process_rank_genes
-from .workflow import export_separate
+if TYPE_CHECKING:
+    from pybel import BELGraph
+    from .cache import StatementCache
 
 info_cutoff_option = click.option(
     '--info-cutoff',
@@ -33,14 +31,91 @@ belief_cutoff_option = click.option(
     help='Minimum belief score. Lower gets more statements.',
 )
 only_query_option = click.option('--only-query', is_flag=True)
-
-_help = (
-    f'BEL Enrichment running on PyBEL v{pybel.version.get_version()}'
-    f' and INDRA v{indra.util.get_version.get_version()}'
+cache_dir_option = click.option(
+    '--cache-dir',
+    type=click.Path(file_okay=False, dir_okay=True),
+    help='Directory in which INDRA DB REST responses are cached',
+)
+offline_option = click.option('--offline', is_flag=True, help='Only use responses from the --cache-dir')
+cache_ttl_option = click.option(
+    '--cache-ttl',
+    type=float,
+    help='Number of seconds after which cached responses are fetched again. If not given, they never expire.',
+)
+cache_max_size_option = click.option(
+    '--cache-max-size',
+    type=int,
+    help='Maximum number of compressed bytes in the --cache-dir. The least recently used responses are evicted.',
+)
+chunk_size_option = click.option(
+    '--chunk-size',
+    type=int,
+    default=200,
+    show_default=True,
+    help='Number of PMIDs fetched in each request',
+)
+pmid_concurrency_option = click.option(
+    '-c', '--concurrency',
+    type=int,
+    default=4,
+    show_default=True,
+    help='Number of requests for chunks of PMIDs sent at the same time',
 )
 
 
-@click.group(help=_help)
+def _get_cache(
+    cache_dir: Optional[str],
+    offline: bool,
+    cache_ttl: Optional[float] = None,
+    cache_max_size: Optional[int] = None,
+) -> Optional['StatementCache']:
+    if cache_dir is None:
+        for name, value in [('--offline', offline), ('--cache-ttl', cache_ttl), ('--cache-max-size', cache_max_size)]:
+            if value is not None and value is not False:
+                raise click.UsageError(f'{name} requires --cache-dir')
+        return None
+
+    from .cache import StatementCache
+    return StatementCache(directory=cache_dir, ttl=cache_ttl, max_size=cache_max_size, offline=offline)
+
+
+def _get_output(output: str) -> Optional[str]:
+    """Get the path to write to, or None for stdout."""
+    return None if output == '-' else output
+
+
+def _get_statement_file(statement_file: Optional[str]) -> Union[None, str, TextIO]:
+    """Get the path to write statements to, or stdout for a dash."""
+    return sys.stdout if statement_file == '-' else statement_file
+
+
+def _load_graph(_ctx, _param, path: str) -> 'BELGraph':
+    """Load the graph only once a command using it is invoked, unlike :data:`pybel.cli.graph_argument`."""
+    from pybel import load
+    return load(path)
+
+
+graph_argument = click.argument('graph', metavar='path', callback=_load_graph)
+
+
+def _echo_version(ctx: click.Context, _param, value: bool) -> None:
+    if not value or ctx.resilient_parsing:
+        return
+
+    import indra.util.get_version
+    import pybel.version
+    from .version import get_version
+
+    click.echo(
+        f'BEL Enrichment v{get_version()} running on PyBEL v{pybel.version.get_version()}'
+        f' and INDRA v{indra.util.get_version.get_version()}',
+    )
+    ctx.exit()
+
+
+@click.group()
+@click.option('--version', is_flag=True, expose_value=False, is_eager=True, callback=_echo_version,
+              help='Show the versions of BEL Enrichment, PyBEL, and INDRA then exit.')
 def main():
     """BEL Enrichment."""
 
@@ -49,10 +124,11 @@ def main():
 @graph_argument
 @click.option('-n', '--number', type=int)
 @click.option('-s', '--sep', default='\t')
-def ranks(graph: BELGraph, number, sep):
+def ranks(graph: 'BELGraph', number, sep):
     """Rank the genes in a graph."""
-    gene_map = process_rank_genes(graph)
-    for (namespace, name), rank in gene_map.most_common(n=number):
+    from .ranking import RankTable
+
+    for namespace, name, rank in RankTable.from_graph(graph).iterate(number=number):
         click.echo(f'{rank:.2f}{sep}{namespace}{sep}{name}')
 
 
@@ -62,20 +138,69 @@ def ranks(graph: BELGraph, number, sep):
               show_default=True, help='The place where sheets are output')
 @info_cutoff_option
 @belief_cutoff_option
-def from_graph(graph: BELGraph, directory: str, info_cutoff: float, belief_cutoff: float):
+@cache_dir_option
+@offline_option
+@cache_ttl_option
+@cache_max_size_option
+@click.option('-c', '--concurrency', type=int, default=4, show_default=True,
+              help='Number of genes whose statements are fetched at the same time')
+@click.option('--preassemble-corpus', is_flag=True,
+              help='Fetch all genes first then run INDRA preassembly once on all of their statements')
+@click.option('-n', '--number', type=int, help='Maximum number of the highest ranked genes to export')
+@click.option('--overwrite', is_flag=True,
+              help='Export all genes again instead of skipping the ones whose sheets already exist')
+@click.option('-f', '--format', 'fmt', type=click.Choice(['tsv', 'xlsx', 'parquet', 'arrow']), default='tsv',
+              show_default=True, help='Format of the sheets. XLSX sheets have the columns for curation.')
+def from_graph(
+    graph: 'BELGraph',
+    directory: str,
+    info_cutoff: float,
+    belief_cutoff: float,
+    cache_dir: Optional[str],
+    offline: bool,
+    cache_ttl: Optional[float],
+    cache_max_size: Optional[int],
+    concurrency: int,
+    preassemble_corpus: bool,
+    number: Optional[int],
+    overwrite: bool,
+    fmt: str,
+):
     """Make a a sheet for rational enrichment of the given BEL graph."""
+    from .workflow import export_separate
+
     export_separate(
         graph=graph,
         directory=directory,
         minimum_information_density=info_cutoff,
         minimum_belief=belief_cutoff,
+        cache=_get_cache(cache_dir, offline, cache_ttl, cache_max_size),
+        concurrency=concurrency,
+        preassemble_corpus=preassemble_corpus,
+        number=number,
+        overwrite=overwrite,
+        fmt=fmt,
     )
 
 
-output_option = click.option('--output', type=click.File('w'), default=sys.stdout, help='output file')
-statement_json_file_option = click.option('--statement-file', type=click.File('w'), help='output statements JSON file')
+output_option = click.option(
+    '--output',
+    type=click.Path(dir_okay=False, allow_dash=True),
+    default='-',
+    help='output file. Its extension picks the format: .xlsx, .parquet, .arrow, or anything else for TSV',
+)
+statement_json_file_option = click.option(
+    '--statement-file',
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help='output statements JSON file. Ending with .jsonl or .jsonl.gz writes JSON Lines instead of a JSON list.',
+)
 no_duplicates_option = click.option('--no-duplicates', is_flag=True)
 no_ungrounded_option = click.option('--no-ungrounded', is_flag=True)
+workers_option = click.option(
+    '--workers',
+    type=int,
+    help='Number of processes used to generate rows. Defaults to a single process.',
+)
 
 
 @main.command()
@@ -85,25 +210,40 @@ no_ungrounded_option = click.option('--no-ungrounded', is_flag=True)
 @belief_cutoff_option
 @no_duplicates_option
 @no_ungrounded_option
+@workers_option
+@cache_dir_option
+@offline_option
+@cache_ttl_option
+@cache_max_size_option
 def from_agents(
     agents: List[str],
-    output: TextIO,
-    statement_file: TextIO,
+    output: str,
+    statement_file: Optional[str],
     belief_cutoff: float,
     no_duplicates: bool,
     no_ungrounded: bool,
+    workers: Optional[int],
+    cache_dir: Optional[str],
+    offline: bool,
+    cache_ttl: Optional[float],
+    cache_max_size: Optional[int],
 ):
     """Make a sheet for the given agents."""
+    from .indra_utils import get_and_write_statements_from_agents
+    from .jsonl import to_statement_file
+
     statements = get_and_write_statements_from_agents(
         agents=agents,
-        file=output,
+        file=_get_output(output),
         allow_duplicates=(not no_duplicates),
         allow_ungrounded=(not no_ungrounded),
         minimum_belief=belief_cutoff,
+        workers=workers,
+        cache=_get_cache(cache_dir, offline, cache_ttl, cache_max_size),
     )
 
     if statement_file:
-        json.dump(stmts_to_json(statements), statement_file, indent=2)
+        to_statement_file(statements, _get_statement_file(statement_file))
 
 
 @main.command()
@@ -113,48 +253,93 @@ def from_agents(
 @belief_cutoff_option
 @no_duplicates_option
 @only_query_option
+@workers_option
+@cache_dir_option
+@offline_option
+@cache_ttl_option
+@cache_max_size_option
+@chunk_size_option
+@pmid_concurrency_option
 def from_pmids(
     pmids: List[str],
-    output: TextIO,
-    statement_file: TextIO,
+    output: str,
+    statement_file: Optional[str],
     belief_cutoff: float,
     no_duplicates: bool,
     only_query: bool,
+    workers: Optional[int],
+    cache_dir: Optional[str],
+    offline: bool,
+    cache_ttl: Optional[float],
+    cache_max_size: Optional[int],
+    chunk_size: int,
+    concurrency: int,
 ):
     """Make a sheet for the given PMIDs."""
+    from .indra_utils import get_and_write_statements_from_pmids
+
     get_and_write_statements_from_pmids(
         pmids=pmids,
-        file=output,
-        json_file=statement_file,
+        file=_get_output(output),
+        json_file=_get_statement_file(statement_file),
         duplicates=(not no_duplicates),
         keep_only_query_pmids=only_query,
         minimum_belief=belief_cutoff,
+        workers=workers,
+        cache=_get_cache(cache_dir, offline, cache_ttl, cache_max_size),
+        chunk_size=chunk_size,
+        concurrency=concurrency,
     )
 
 
 @main.command()
-@click.option('-f', '--file', type=click.File('r'), default=sys.stdin, help='a text file with one PMID per line')
+@click.option('-f', '--file', 'pmids', type=click.File('r'), default=sys.stdin,
+              help='a text file with one PMID per line')
 @output_option
 @statement_json_file_option
 @belief_cutoff_option
 @no_duplicates_option
 @only_query_option
+@workers_option
+@cache_dir_option
+@offline_option
+@cache_ttl_option
+@cache_max_size_option
+@chunk_size_option
+@pmid_concurrency_option
 def from_pmid_file(
     pmids: TextIO,
-    output: TextIO,
-    statement_file: TextIO,
+    output: str,
+    statement_file: Optional[str],
     belief_cutoff: float,
     no_duplicates: bool,
     only_query: bool,
+    workers: Optional[int],
+    cache_dir: Optional[str],
+    offline: bool,
+    cache_ttl: Optional[float],
+    cache_max_size: Optional[int],
+    chunk_size: int,
+    concurrency: int,
 ):
-    """Make a sheet for the PMIDs in the given file."""
+    """Make a sheet for the PMIDs in the given file.
+
+    The file is read line by line while the statements for the PMIDs read so far are fetched.
+    """
+    from .indra_utils import get_and_write_statements_from_pmids
+
     get_and_write_statements_from_pmids(
         pmids=pmids,
-        file=output,
-        json_file=statement_file,
+        file=_get_output(output),
+        json_file=_get_statement_file(statement_file),
         duplicates=(not no_duplicates),
         minimum_belief=belief_cutoff,
         keep_only_query_pmids=only_query,
+        workers=workers,
+        cache=_get_cache(cache_dir, offline, cache_ttl, cache_max_size),
+        chunk_size=chunk_size,
+        concurrency=concurrency,
+        use_tqdm=True,
     )
 
 
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""Filters for the evidences and BEL edges that are written to curation sheets.
+
+The blacklists are compiled once when a :class:`RowFilter` is made, so checking each evidence is a
+handful of set lookups. Checking each BEL edge is a few substring checks for short substring blacklists,
+or one regular expression search per part of the edge for long ones, since the regular expression's cost
+hardly depends on how many substrings it matches.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Collection, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+from indra.statements import Evidence
+
+__all__ = [
+    'RowFilter',
+    'DEFAULT_ROW_FILTER',
+    'NO_EVIDENCE_TEXT',
+    'MODIFIED_ASSERTION',
+    'TEXT_BLACKLIST',
+    'SOURCE_BLACKLIST',
+    'SUBSTRING_BLACKLIST',
+]
+
+NO_EVIDENCE_TEXT = 'No evidence text.'
+MODIFIED_ASSERTION = 'Modified assertion'
+TEXT_BLACKLIST = {NO_EVIDENCE_TEXT, MODIFIED_ASSERTION}
+
+SOURCE_BLACKLIST = {'bel', 'signor'}
+SUBSTRING_BLACKLIST = {'CHEBI', 'PUBCHEM'}
+
+#: Missing values, which are never usable
+_MISSING = frozenset({None, ''})
+#: Substring blacklists longer than this are compiled to a regular expression
+_MAXIMUM_PLAIN_SUBSTRINGS = 10
+
+
+@dataclass
+class RowFilter:
+    """A compiled chain of filters for evidences and BEL edges.
+
+    :param text_blacklist: Evidence texts that are not usable, e.g., placeholders
+    :param source_blacklist: Source APIs whose evidences are not usable, e.g., because they're already in BEL
+    :param substring_blacklist: Substrings of BEL terms or relations that mark edges as not usable
+    """
+
+    text_blacklist: Collection[str] = field(default_factory=lambda: set(TEXT_BLACKLIST))
+    source_blacklist: Collection[str] = field(default_factory=lambda: set(SOURCE_BLACKLIST))
+    substring_blacklist: Collection[str] = field(default_factory=lambda: set(SUBSTRING_BLACKLIST))
+
+    _texts: FrozenSet[Optional[str]] = field(init=False, repr=False)
+    _sources: FrozenSet[Optional[str]] = field(init=False, repr=False)
+    _substrings: Tuple[str, ...] = field(init=False, repr=False)
+    _substring_pattern: Optional[Pattern] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:  # noqa: D105
+        # Missing values go in the blacklists so each check is a single set lookup
+        self._texts = frozenset(self.text_blacklist) | _MISSING
+        self._sources = frozenset(self.source_blacklist) | _MISSING
+        self._substrings = tuple(sorted(self.substring_blacklist))
+        if _MAXIMUM_PLAIN_SUBSTRINGS < len(self._substrings):
+            self._substring_pattern = re.compile('|'.join(map(re.escape, self._substrings)))
+        else:
+            self._substring_pattern = None
+
+    def filter_evidences(self, evidences: Iterable[Evidence]) -> List[Evidence]:
+        """Keep only the evidences with a PMID, usable text, and a usable source API."""
+        texts, sources = self._texts, self._sources
+        return [
+            evidence
+            for evidence in evidences
+            if evidence.pmid and evidence.text not in texts and evidence.source_api not in sources
+        ]
+
+    def keep_bel(self, bel_subject: str, bel_relation: str, bel_object: str) -> bool:
+        """Check that none of the parts of a BEL edge contain a blacklisted substring."""
+        pattern = self._substring_pattern
+        if pattern is not None:
+            search = pattern.search
+            return not (search(bel_subject) or search(bel_relation) or search(bel_object))
+
+        for substring in self._substrings:
+            if substring in bel_subject or substring in bel_relation or substring in bel_object:
+                return False
+        return True
+
+
+#: The filter used when none is given
+DEFAULT_ROW_FILTER = RowFilter()
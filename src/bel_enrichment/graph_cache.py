@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""Versioned on-disk caches of compiled BEL graphs.
+
+Each cache file starts with a small header holding the cache schema version and the versions of
+:mod:`bel_enrichment` and :mod:`pybel` that wrote it. The header is read before the graph, so a stale cache
+is rejected without paying to load it.
+
+Node-link JSON doesn't hold the warnings from parsing the sheets, so the ``nodelink.gz`` format keeps them
+pickled on their own line after the graph.
+"""
+
+import base64
+import gzip
+import json
+import logging
+import os
+import pickle
+from typing import Any, List, Mapping, Optional
+
+import pybel
+from pybel import BELGraph
+from .version import get_version
+
+__all__ = [
+    'GRAPH_CACHE_FORMATS',
+    'get_graph_cache_header',
+    'to_graph_cache',
+    'from_graph_cache',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The version of the layout of the cache files. Increment this when it changes.
+SCHEMA_VERSION = 2
+
+#: The supported formats and their file extensions
+GRAPH_CACHE_FORMATS = {
+    'pickle': 'pickle',
+    'nodelink.gz': 'nodelink.json.gz',
+}
+
+
+def get_graph_cache_header() -> Mapping[str, Any]:
+    """Get the header that cached graphs must have to be loaded."""
+    return {
+        'schema': SCHEMA_VERSION,
+        'bel_enrichment': get_version(),
+        'pybel': pybel.get_version(),
+    }
+
+
+def to_graph_cache(graph: BELGraph, path: str, fmt: str = 'pickle') -> None:
+    """Write a graph to a cache file.
+
+    :param graph: A BEL graph
+    :param path: The path to the cache file
+    :param fmt: One of the keys of :data:`GRAPH_CACHE_FORMATS`
+    """
+    header = get_graph_cache_header()
+    if fmt == 'pickle':
+        with open(path, 'wb') as file:
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(graph, file, protocol=pickle.HIGHEST_PROTOCOL)
+    elif fmt == 'nodelink.gz':
+        with gzip.open(path, 'wt') as file:
+            print(json.dumps(header), file=file)
+            print(json.dumps(pybel.to_nodelink(graph), separators=(',', ':')), file=file)
+            print(json.dumps(_dump_warnings(graph.warnings)), file=file)
+    else:
+        raise ValueError(f'invalid graph cache format: {fmt}')
+
+
+def from_graph_cache(path: str, fmt: str = 'pickle') -> Optional[BELGraph]:
+    """Read a graph from a cache file.
+
+    :param path: The path to the cache file
+    :param fmt: One of the keys of :data:`GRAPH_CACHE_FORMATS`
+    :return: The graph, or None if the file doesn't exist or was written by other versions
+    """
+    if not os.path.exists(path):
+        return None
+
+    header = get_graph_cache_header()
+    if fmt == 'pickle':
+        with open(path, 'rb') as file:
+            if not _check_header(path, _load_pickled_header(file), header):
+                return None
+            return pickle.load(file)
+    elif fmt == 'nodelink.gz':
+        with gzip.open(path, 'rt') as file:
+            try:
+                cached_header = json.loads(file.readline())
+            except ValueError:
+                cached_header = None
+            if not _check_header(path, cached_header, header):
+                return None
+            graph = pybel.from_nodelink(json.loads(file.readline()))
+            graph.warnings.extend(_load_warnings(json.loads(file.readline())))
+            return graph
+    else:
+        raise ValueError(f'invalid graph cache format: {fmt}')
+
+
+def _dump_warnings(warnings: List) -> str:
+    """Pickle the warnings, whose exceptions and contexts can't all be written as JSON, to a JSON string."""
+    return base64.b64encode(pickle.dumps(warnings, protocol=pickle.HIGHEST_PROTOCOL)).decode('ascii')
+
+
+def _load_warnings(value: str) -> List:
+    return pickle.loads(base64.b64decode(value))
+
+
+def _load_pickled_header(file) -> Optional[Mapping[str, Any]]:
+    try:
+        return pickle.load(file)
+    except (pickle.UnpicklingError, EOFError, ValueError):
+        return None
+
+
+def _check_header(path: str, cached_header: Optional[Mapping[str, Any]], header: Mapping[str, Any]) -> bool:
+    if cached_header != header:
+        logger.info('rejecting stale graph cache at %s (%s, expected %s)', path, cached_header, header)
+        return False
+    return True
@@ -2,27 +2,56 @@
 
 """Utilities for INDRA."""
 
+import heapq
 import itertools as itt
-import json
 import logging
-from dataclasses import dataclass
-from operator import attrgetter
-from typing import Collection, Iterable, List, Optional, TextIO, Union
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, closing
+from functools import partial
+from operator import attrgetter, itemgetter
+from typing import (
+    Any, BinaryIO, Callable, Collection, Dict, IO, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set,
+    TextIO, Tuple, Type, Union,
+)
+
+from tqdm import tqdm
 
 from indra.assemblers.pybel import PybelAssembler
 from indra.sources import indra_db_rest
-from indra.statements import Evidence, Statement, stmts_to_json
+from indra.statements import Statement, stmts_from_json, stmts_to_json
 from indra.tools.assemble_corpus import filter_belief, filter_grounded_only, run_preassembly
 from pybel import BELGraph
 from pybel.canonicalize import edge_to_tuple
 from pybel.constants import ANNOTATIONS, CITATION, CITATION_IDENTIFIER, EVIDENCE, RELATION, UNQUALIFIED_EDGES
+from pybel.dsl import BaseEntity
+from .cache import CacheMissError, StatementCache
+from .filters import DEFAULT_ROW_FILTER, RowFilter
+from .jsonl import to_statement_file
 
 __all__ = [
+    'Row',
+    'RowTable',
+    'RowWriter',
+    'TSVWriter',
+    'XLSXWriter',
+    'ParquetWriter',
+    'ArrowWriter',
+    'ROW_WRITERS',
+    'CURATION_TEMPLATE_COLUMNS',
+    'get_row_writer_format',
     'get_and_write_statements_from_agents',
     'get_and_write_statements_from_pmids',
     'get_rows_from_statement',
     'get_rows_from_statements',
+    'prefilter_statements',
     'get_graph_from_statement',
+    'get_graph_from_statements',
 ]
 
 logger = logging.getLogger(__name__)
@@ -43,8 +72,14 @@ end_header = [
 ]
 
 
-@dataclass
-class Row:
+class Row(NamedTuple):
+    """A row in a BEL curation sheet.
+
+    The fields keep their original order, starting with the UUID, so rows can still be made and unpacked
+    positionally. The columns of the sheet are in another order, given by :attr:`start_tuple` and
+    :attr:`end_tuple`.
+    """
+
     uuid: str
     statement_hash: str
     evidence_hash: str
@@ -58,45 +93,358 @@ class Row:
 
     @property
     def start_tuple(self):
-        return self.pmid, self.evidence, self.bel_subject, self.bel_relation, self.bel_object
+        """Get the values that go before the extra curation columns."""
+        return _get_start_tuple(self)
 
     @property
     def end_tuple(self):
-        return self.uuid, self.statement_hash, self.evidence_hash, self.api, self.belief
+        """Get the values that go after the extra curation columns."""
+        return _get_end_tuple(self)
+
+
+#: The fields of :class:`Row` for the columns in :data:`start_header` and :data:`end_header`
+_START_FIELDS = ('pmid', 'evidence', 'bel_subject', 'bel_relation', 'bel_object')
+_END_FIELDS = ('uuid', 'statement_hash', 'evidence_hash', 'api', 'belief')
+#: Get the values of a row, or the columns of several rows, in the order of the columns of the sheet
+_get_start_tuple = itemgetter(*map(Row._fields.index, _START_FIELDS))
+_get_end_tuple = itemgetter(*map(Row._fields.index, _END_FIELDS))
+
+EdgeKey = Tuple[BaseEntity, BaseEntity, Any]
+EdgeTuple = Tuple[BaseEntity, BaseEntity, Mapping[str, Any]]
+
+#: Fields of :class:`Row` whose values are repeated across many rows
+_INTERNED_FIELDS = {'pmid', 'bel_subject', 'bel_relation', 'bel_object', 'uuid', 'statement_hash', 'api'}
+
+
+class RowTable:
+    """A columnar buffer of BEL curation rows.
+
+    Each column is stored as its own list and repeated strings like the PMID, BEL terms, relation,
+    and API are only stored once, which takes much less memory than a list of rows for large exports.
+    """
+
+    def __init__(self, rows: Optional[Iterable[Row]] = None) -> None:
+        """Initialize the table, optionally with some rows."""
+        self.columns: Mapping[str, List[Any]] = {name: [] for name in Row._fields}
+        self._strings = {}
+        self._appenders = [
+            (self.columns[name].append, name in _INTERNED_FIELDS)
+            for name in Row._fields
+        ]
+        if rows is not None:
+            self.extend(rows)
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.columns['uuid'])
+
+    def __iter__(self) -> Iterable[Row]:  # noqa: D105
+        return itt.starmap(Row, zip(*self.columns.values()))
+
+    def append(self, row: Row) -> None:
+        """Add a row to the table."""
+        strings = self._strings
+        for (append, interned), value in zip(self._appenders, row):
+            append(strings.setdefault(value, value) if interned else value)
+
+    def extend(self, rows: Iterable[Row]) -> None:
+        """Add several rows to the table."""
+        for row in rows:
+            self.append(row)
+
+    def to_tsv(self, file: TextIO, sep: str = '\t', extra_columns: Optional[List[str]] = None) -> None:
+        """Write the table as a curation sheet.
+
+        :param file: The file to write to
+        :param sep: The separator for the CSV. Defaults to a tab.
+        :param extra_columns: Headers of extra, empty columns for curation
+        """
+        with TSVWriter(file, extra_columns=extra_columns, sep=sep) as writer:
+            for batch in _iterate_batches(self, DEFAULT_WRITE_BATCH_SIZE):
+                writer.write(batch)
+
+    def to_df(self):
+        """Convert the table to a :class:`pandas.DataFrame` with the same headers as the curation sheet."""
+        import pandas as pd
+        return pd.DataFrame({
+            header: self.columns[name]
+            for header, name in zip(start_header + end_header, _START_FIELDS + _END_FIELDS)
+        })
+
+    def to_parquet(self, path: str) -> None:
+        """Write the table to a Parquet file.
+
+        .. note:: This requires :mod:`pyarrow` or :mod:`fastparquet`
+        """
+        self.to_df().to_parquet(path, index=False)
+
+
+#: The columns of a curation sheet that curators fill in, which are required to compile it
+CURATION_TEMPLATE_COLUMNS = ['Curator', 'Checked', 'Correct', 'Changed']
+
+
+class RowWriter:
+    """Write BEL curation rows to a sheet in batches.
+
+    Use it as a context manager: the sheet is opened and its header is written when entering and it's
+    finished when exiting. Writers for each format are registered in :data:`ROW_WRITERS`.
+    """
+
+    #: Is the sheet written to a binary file?
+    binary: bool = True
+    #: Extra columns for curation that are added if none are given
+    default_extra_columns: Sequence[str] = ()
+
+    def __init__(
+        self,
+        file: Union[None, str, IO],
+        extra_columns: Optional[Sequence[str]] = None,
+        sep: str = '\t',
+    ) -> None:
+        """Initialize the writer.
+
+        :param file: A path or a file opened for writing
+        :param extra_columns: Headers of extra, empty columns for curation that go between the columns
+         from :data:`start_header` and :data:`end_header`
+        :param sep: The separator, for delimited formats
+        """
+        self.file = file
+        self.extra_columns = list(self.default_extra_columns if extra_columns is None else extra_columns)
+        self.sep = sep
+        self.header = [*start_header, *self.extra_columns, *end_header]
+        self.number_rows = 0
+
+    def __enter__(self) -> 'RowWriter':  # noqa: D105
+        self.open()
+        return self
+
+    def __exit__(self, *_) -> None:  # noqa: D105
+        self.close()
+
+    def open(self) -> None:
+        """Open the sheet and write its header."""
+        raise NotImplementedError
+
+    def write(self, rows: Sequence[Row]) -> None:
+        """Write a batch of rows."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Finish the sheet."""
+        raise NotImplementedError
+
+
+class TSVWriter(RowWriter):
+    """Write rows as delimited text, with one write for each batch of rows."""
+
+    binary = False
+
+    def open(self) -> None:  # noqa: D102
+        if isinstance(self.file, str):
+            self._file = open(self.file, 'w')
+        else:
+            self._file = sys.stdout if self.file is None else self.file
+        self._placeholders = ('',) * len(self.extra_columns)
+        self._file.write(self.sep.join(self.header) + '\n')
+
+    def write(self, rows: Sequence[Row]) -> None:  # noqa: D102
+        join, placeholders = self.sep.join, self._placeholders
+        self._file.write(''.join([
+            join(map(str, _get_start_tuple(row) + placeholders + _get_end_tuple(row))) + '\n'
+            for row in rows
+        ]))
+        self.number_rows += len(rows)
+
+    def close(self) -> None:  # noqa: D102
+        if isinstance(self.file, str):
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class XLSXWriter(RowWriter):
+    """Write rows to an Excel sheet with :mod:`openpyxl` in write-only mode, which streams rows to disk.
+
+    The sheet always has the :data:`CURATION_TEMPLATE_COLUMNS` so it can be curated then compiled as it is.
+    """
+
+    default_extra_columns = CURATION_TEMPLATE_COLUMNS
+
+    def __init__(self, *args, **kwargs) -> None:  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self.extra_columns = [
+            *CURATION_TEMPLATE_COLUMNS,
+            *(column for column in self.extra_columns if column not in CURATION_TEMPLATE_COLUMNS),
+        ]
+        self.header = [*start_header, *self.extra_columns, *end_header]
+
+    def open(self) -> None:  # noqa: D102
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(self.header)
+        self._placeholders = (None,) * len(self.extra_columns)
+        self._remove_illegal_characters = partial(ILLEGAL_CHARACTERS_RE.sub, '')
+
+    def write(self, rows: Sequence[Row]) -> None:  # noqa: D102
+        append, placeholders = self._sheet.append, self._placeholders
+        remove_illegal_characters = self._remove_illegal_characters
+        for row in rows:
+            # Text mined evidences can have control characters that openpyxl refuses to write
+            start_values = (
+                remove_illegal_characters(value) if isinstance(value, str) else value
+                for value in row.start_tuple
+            )
+            # Hashes are 64-bit integers, which Excel would round to doubles, so they're written as text
+            append((
+                *start_values,
+                *placeholders,
+                row.uuid,
+                str(row.statement_hash),
+                str(row.evidence_hash),
+                row.api,
+                row.belief,
+            ))
+        self.number_rows += len(rows)
+
+    def close(self) -> None:  # noqa: D102
+        self._workbook.save(self.file)
+
+
+class _ArrowRowWriter(RowWriter):
+    """Write rows as Arrow record batches, one for each batch of rows.
+
+    .. note:: This requires :mod:`pyarrow`
+    """
+
+    def open(self) -> None:  # noqa: D102
+        import pyarrow as pa
 
+        self._schema = pa.schema([
+            (column, pa.float64() if column == 'Belief' else pa.string())
+            for column in self.header
+        ])
+        self._writer = self._open_writer(self._schema)
 
-NO_EVIDENCE_TEXT = 'No evidence text.'
-MODIFIED_ASSERTION = 'Modified assertion'
-TEXT_BLACKLIST = {NO_EVIDENCE_TEXT, MODIFIED_ASSERTION}
+    def _open_writer(self, schema):
+        raise NotImplementedError
 
-SOURCE_BLACKLIST = {'bel', 'signor'}
-SUBSTRING_BLACKLIST = {'CHEBI', 'PUBCHEM'}
+    def _get_record_batch(self, rows: Sequence[Row]):
+        import pyarrow as pa
+
+        columns = list(zip(*rows))
+        start_columns, end_columns = _get_start_tuple(columns), _get_end_tuple(columns)
+        arrays = [
+            *start_columns,
+            *([None] * len(rows) for _ in self.extra_columns),
+            *end_columns,
+        ]
+        # Values like hashes might not be strings, so they're cast like the str() in TSVs
+        return pa.RecordBatch.from_arrays(
+            [pa.array(array).cast(field.type) for array, field in zip(arrays, self._schema)],
+            schema=self._schema,
+        )
+
+    def close(self) -> None:  # noqa: D102
+        self._writer.close()
+
+
+class ParquetWriter(_ArrowRowWriter):
+    """Write rows to a Parquet file, with a row group for each batch of rows.
+
+    .. note:: This requires :mod:`pyarrow`
+    """
+
+    def _open_writer(self, schema):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.file, schema)
+
+    def write(self, rows: Sequence[Row]) -> None:  # noqa: D102
+        import pyarrow as pa
+        self._writer.write_table(pa.Table.from_batches([self._get_record_batch(rows)]))
+        self.number_rows += len(rows)
+
+
+class ArrowWriter(_ArrowRowWriter):
+    """Write rows to an Arrow IPC (Feather version 2) file, with a record batch for each batch of rows.
+
+    .. note:: This requires :mod:`pyarrow`
+    """
+
+    def _open_writer(self, schema):
+        import pyarrow as pa
+        return pa.ipc.new_file(self.file, schema)
+
+    def write(self, rows: Sequence[Row]) -> None:  # noqa: D102
+        self._writer.write_batch(self._get_record_batch(rows))
+        self.number_rows += len(rows)
+
+
+#: The writers for each format of sheet. Other writers can be added here.
+ROW_WRITERS: Dict[str, Type[RowWriter]] = {
+    'tsv': TSVWriter,
+    'xlsx': XLSXWriter,
+    'parquet': ParquetWriter,
+    'arrow': ArrowWriter,
+}
+
+#: The formats of sheets written to paths with these extensions. Anything else is a TSV.
+_EXTENSION_TO_FORMAT = {
+    '.xlsx': 'xlsx',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+}
+
+
+def get_row_writer_format(path: str) -> str:
+    """Get the format of the sheet written to the given path from its extension."""
+    return _EXTENSION_TO_FORMAT.get(os.path.splitext(path)[1].lower(), 'tsv')
+
+
+#: The number of statements assembled into the same BEL graph when generating rows
+DEFAULT_BATCH_SIZE = 500
+#: The number of rows sorted in memory before spilling to disk when writing
+DEFAULT_SORT_CHUNK_SIZE = 200_000
+_SPILL_PICKLE_SIZE = 1_000
+#: The number of rows written to a sheet at a time
+DEFAULT_WRITE_BATCH_SIZE = 10_000
+#: The number of PubMed identifiers sent to the INDRA DB REST API in each request
+DEFAULT_PMID_CHUNK_SIZE = 200
+#: The number of requests for chunks of PubMed identifiers sent at the same time
+DEFAULT_PMID_CONCURRENCY = 4
+#: The number of times a failed request for a chunk of PubMed identifiers is retried
+DEFAULT_RETRIES = 3
 
 
 def get_and_write_statements_from_agents(
     agents: Union[str, List[str]],
-    file: Optional[TextIO] = None,
+    file: Union[None, str, TextIO] = None,
     sep: Optional[str] = None,
     limit: Optional[int] = None,
     allow_duplicates: bool = False,
     allow_ungrounded: bool = True,
     minimum_belief: Optional[float] = None,
+    workers: Optional[int] = None,
+    cache: Optional[StatementCache] = None,
 ) -> List[Statement]:
     """Get INDRA statements for the given agents and write the to a TSV for BEL curation.
 
     :param agents: A list of agents (HGNC gene symbols)
-    :param file: The file to write to
+    :param file: The file or path to write to. The format of paths is picked from their extension.
     :param sep: The separator for the CSV. Defaults to a tab.
     :param limit: The optional limit of statements to write
     :param allow_duplicates: should duplicate statements be written (with multiple evidences?)
     :param allow_ungrounded: should ungrounded entities be output for curation?
     :param minimum_belief: The minimum belief score to keep
+    :param workers: The number of processes to use for generating rows
+    :param cache: A cache of INDRA DB REST responses to use instead of querying again
     """
     if isinstance(agents, str):
         agents = [agents]
 
-    processor = indra_db_rest.get_statements(agents=agents)
-    statements = processor.statements
+    statements = get_statements_from_agents(agents, cache=cache)
 
     print_statements(
         statements,
@@ -106,14 +454,121 @@ def get_and_write_statements_from_agents(
         allow_duplicates=allow_duplicates,
         allow_ungrounded=allow_ungrounded,
         minimum_belief=minimum_belief,
+        workers=workers,
     )
 
     return statements
 
 
-def get_statements_from_pmids(pmids: Iterable[str]) -> List[Statement]:
-    ids = [('pmid', pmid.strip()) for pmid in pmids]
-    return indra_db_rest.get_statements_for_paper(ids=ids, simple_response=True)
+def get_statements_from_agents(agents: List[str], cache: Optional[StatementCache] = None) -> List[Statement]:
+    """Get INDRA statements about all of the given agents, optionally through a cache."""
+    if cache is not None:
+        return cache.get_statements(agents=agents)
+    processor = indra_db_rest.get_statements(agents=agents)
+    return processor.statements
+
+
+def get_statements_from_pmids(
+    pmids: Iterable[str],
+    cache: Optional[StatementCache] = None,
+    chunk_size: int = DEFAULT_PMID_CHUNK_SIZE,
+    concurrency: int = DEFAULT_PMID_CONCURRENCY,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = 1.0,
+    use_tqdm: bool = False,
+) -> List[Statement]:
+    """Get INDRA statements from the given PubMed identifiers, optionally through a cache.
+
+    The PubMed identifiers are read lazily, e.g., from the lines of a file, and fetched in chunks by
+    a few threads at a time. Statements from several chunks with the same hash are merged into the
+    first one and get the evidences from the other ones.
+
+    :param pmids: An iterable of PubMed identifiers. Blank ones are skipped.
+    :param cache: A cache of INDRA DB REST responses to use instead of querying again. Each chunk
+     is cached separately, so fetching the same identifiers again after a failure only fetches
+     the chunks that are missing.
+    :param chunk_size: The number of PubMed identifiers fetched in each request
+    :param concurrency: The number of requests sent at the same time
+    :param retries: The number of times a failed request is retried before giving up
+    :param backoff: The number of seconds waited before the first retry. It doubles for each one after.
+    :param use_tqdm: Should a progress bar be shown?
+    """
+    fetch = partial(_get_statements_from_pmid_chunk, cache=cache, retries=retries, backoff=backoff)
+    hash_to_statement = {}
+    progress = tqdm(desc='Fetching statements', unit='PMID', disable=not use_tqdm)
+
+    def _merge(_number_pmids, _future) -> None:
+        _merge_statements(hash_to_statement, _future.result())
+        progress.update(_number_pmids)
+
+    with progress, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Only a few chunks are read ahead, and they're merged in order so the result doesn't
+        # depend on which requests finish first
+        pending = deque()
+        for chunk in _iterate_batches(_iterate_pmids(pmids), chunk_size):
+            pending.append((len(chunk), executor.submit(fetch, chunk)))
+            if 2 * concurrency <= len(pending):
+                _merge(*pending.popleft())
+        while pending:
+            _merge(*pending.popleft())
+
+    return list(hash_to_statement.values())
+
+
+def _iterate_pmids(pmids: Iterable[str]) -> Iterable[str]:
+    """Strip the PubMed identifiers, e.g., lines from a file, and skip blank ones."""
+    for pmid in pmids:
+        pmid = pmid.strip()
+        if pmid:
+            yield pmid
+
+
+def _iterate_recorded(values: Iterable[str], record: Callable[[str], Any]) -> Iterable[str]:
+    for value in values:
+        record(value)
+        yield value
+
+
+def _get_statements_from_pmid_chunk(
+    pmids: List[str],
+    cache: Optional[StatementCache],
+    retries: int,
+    backoff: float,
+) -> List[Statement]:
+    """Get INDRA statements from a chunk of PubMed identifiers, retrying with exponential backoff."""
+    ids = [('pmid', pmid) for pmid in pmids]
+    for attempt in range(retries + 1):
+        try:
+            if cache is not None:
+                return cache.get_statements_for_paper(ids=ids)
+            return indra_db_rest.get_statements_for_paper(ids=ids, simple_response=True)
+        except CacheMissError:
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            logger.warning(
+                'failed to fetch statements for %d PMIDs starting with %s. Retrying in %.1f seconds',
+                len(pmids), pmids[0], delay, exc_info=True,
+            )
+            time.sleep(delay)
+
+
+def _merge_statements(hash_to_statement: Dict[int, Statement], statements: Iterable[Statement]) -> None:
+    """Add statements to the dictionary, in-place, merging the evidences of ones with the same hash."""
+    for statement in statements:
+        statement_hash = statement.get_hash()
+        existing = hash_to_statement.get(statement_hash)
+        if existing is None:
+            hash_to_statement[statement_hash] = statement
+            continue
+        source_hashes = {evidence.get_source_hash() for evidence in existing.evidence}
+        existing.evidence.extend(
+            evidence
+            for evidence in statement.evidence
+            if evidence.get_source_hash() not in source_hashes
+        )
 
 
 def get_and_write_statements_from_pmids(
@@ -126,12 +581,18 @@ def get_and_write_statements_from_pmids(
     keep_only_query_pmids: bool = False,
     minimum_belief: Optional[float] = None,
     extra_columns: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    cache: Optional[StatementCache] = None,
+    chunk_size: int = DEFAULT_PMID_CHUNK_SIZE,
+    concurrency: int = DEFAULT_PMID_CONCURRENCY,
+    use_tqdm: bool = False,
 ) -> None:
     """Get INDRA statements for the given agents and write the to a TSV for BEL curation.
 
-    :param pmids: A finite iterable of PubMed identifiers
+    :param pmids: A finite iterable of PubMed identifiers, e.g., a file with one on each line. It's only read once.
     :param file: The file to write curation sheets to
-    :param json_file: The file to output structured INDRA statement JSON to
+    :param json_file: The file to output INDRA statement JSON to. Paths ending in ``.jsonl`` or ``.jsonl.gz``
+     get JSON Lines and anything else gets a JSON list, as in :func:`bel_enrichment.jsonl.to_statement_file`.
     :param sep: The separator for the CSV. Defaults to a tab.
     :param limit: The optional limit of statements to write
     :param duplicates: should duplicate statements be written (with multiple evidences?)
@@ -139,17 +600,31 @@ def get_and_write_statements_from_pmids(
      have multiple evidences.
     :param minimum_belief: The minimum belief score to keep
     :param extra_columns: Headers of extra columns for curation
+    :param workers: The number of processes to use for generating rows
+    :param cache: A cache of INDRA DB REST responses to use instead of querying again
+    :param chunk_size: The number of PubMed identifiers fetched in each request
+    :param concurrency: The number of requests sent at the same time
+    :param use_tqdm: Should a progress bar be shown while fetching?
     """
     if isinstance(pmids, str):
         pmids = [pmids]
 
-    statements = get_statements_from_pmids(pmids)
+    query_pmids = None
+    if keep_only_query_pmids:
+        # Remember the identifiers while they're streamed through, since they can only be read once
+        query_pmids = set()
+        pmids = _iterate_recorded(_iterate_pmids(pmids), query_pmids.add)
+
+    statements = get_statements_from_pmids(
+        pmids,
+        cache=cache,
+        chunk_size=chunk_size,
+        concurrency=concurrency,
+        use_tqdm=use_tqdm,
+    )
 
-    if isinstance(json_file, str):
-        with open(json_file, 'w') as _json_file:
-            json.dump(stmts_to_json(statements), _json_file, indent=2)
-    elif json_file is not None:
-        json.dump(stmts_to_json(statements), json_file, indent=2)
+    if json_file is not None:
+        to_statement_file(statements, json_file)
 
     print_statements(
         statements,
@@ -157,9 +632,10 @@ def get_and_write_statements_from_pmids(
         sep=sep,
         limit=limit,
         allow_duplicates=duplicates,
-        keep_only_pmids=pmids if keep_only_query_pmids else None,
+        keep_only_pmids=query_pmids,
         minimum_belief=minimum_belief,
         extra_columns=extra_columns,
+        workers=workers,
     )
 
 
@@ -170,20 +646,47 @@ def print_statements(
     limit: Optional[int] = None,
     allow_duplicates: bool = False,
     keep_only_pmids: Union[None, str, Collection[str]] = None,
-    sort_attrs: Iterable[str] = ('uuid', 'pmid'),
+    sort_attrs: Optional[Iterable[str]] = ('uuid', 'pmid'),
     allow_ungrounded: bool = True,
     minimum_belief: Optional[float] = None,
     extra_columns: Optional[List[str]] = None,
-) -> None:
+    batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+    workers: Optional[int] = None,
+    preassemble: bool = True,
+    sort_chunk_size: int = DEFAULT_SORT_CHUNK_SIZE,
+    row_filter: Optional[RowFilter] = None,
+    fmt: Optional[str] = None,
+    write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+) -> int:
     """Write statements to a CSV for curation.
 
     This one is similar to the other one, but sorts by the BEL string and only keeps the first for each group.
+
+    :param sort_attrs: The attributes of :class:`Row` to sort by. If empty or none, rows are written as soon
+     as they are generated.
+    :param workers: The number of processes to use for generating rows. If none, uses only this one.
+    :param preassemble: Should INDRA's preassembly be run? Set to false if the statements were already
+     preassembled, e.g., together with a larger corpus.
+    :param sort_chunk_size: The maximum number of rows sorted in memory. Larger outputs are sorted
+     in chunks that are spilled to temporary files then merged.
+    :param row_filter: The filter for evidences and BEL edges. If none, uses :data:`DEFAULT_ROW_FILTER`.
+    :param fmt: The format of the sheet, one of the keys of :data:`ROW_WRITERS`. If none, it's picked from
+     the extension of the file's path with :func:`get_row_writer_format`, or is TSV for open files.
+    :param write_batch_size: The number of rows written at a time
+    :return: The number of rows written
     """
     sep = sep or '\t'
-    extra_columns = extra_columns or []
-    extra_columns_placeholders = [''] * len(extra_columns)
 
-    statements = run_preassembly(statements)
+    # Statements without usable evidence only cost preassembly and BEL assembly time
+    statements = prefilter_statements(
+        statements,
+        keep_only_pmids=keep_only_pmids,
+        row_filter=row_filter,
+        protect_related=preassemble,
+    )
+
+    if preassemble:
+        statements = run_preassembly(statements)
 
     if not allow_ungrounded:
         statements = filter_grounded_only(statements)
@@ -191,46 +694,368 @@ def print_statements(
     if minimum_belief is not None:
         statements = filter_belief(statements, minimum_belief)
 
-    rows = get_rows_from_statements(statements, allow_duplicates=allow_duplicates, keep_only_pmids=keep_only_pmids)
-    rows = sorted(rows, key=attrgetter(*sort_attrs))
+    generated_rows = get_rows_from_statements(
+        statements,
+        allow_duplicates=allow_duplicates,
+        keep_only_pmids=keep_only_pmids,
+        batch_size=batch_size,
+        workers=workers,
+        row_filter=row_filter,
+    )
+    # Close the generator as soon as the rows are written, since a limit can stop it early and its
+    # process pool shouldn't keep generating rows until it's garbage collected
+    with closing(generated_rows):
+        return _write_rows(
+            generated_rows,
+            file=file,
+            sep=sep,
+            limit=limit,
+            sort_attrs=sort_attrs,
+            extra_columns=extra_columns,
+            sort_chunk_size=sort_chunk_size,
+            fmt=fmt,
+            write_batch_size=write_batch_size,
+        )
+
 
-    if limit is not None:
-        rows = rows[:limit]
+def _write_rows(
+    rows: Iterable[Row],
+    file: Union[None, str, TextIO],
+    sep: str,
+    limit: Optional[int],
+    sort_attrs: Optional[Iterable[str]],
+    extra_columns: Optional[List[str]],
+    sort_chunk_size: int,
+    fmt: Optional[str],
+    write_batch_size: int,
+) -> int:
+    """Sort, truncate, and write the rows for :func:`print_statements`."""
+    if not sort_attrs:
+        if limit is not None:
+            rows = itt.islice(rows, limit)
+    elif limit is not None:
+        # Equivalent to sorting then truncating, but only ever keeps the limit in memory
+        rows = heapq.nsmallest(limit, rows, key=attrgetter(*sort_attrs))
+    else:
+        rows = _sort_rows(rows, key=attrgetter(*sort_attrs), chunk_size=sort_chunk_size)
 
-    if not rows:
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
         logger.warning('no rows written')
-        return
+        return 0
 
-    def _write(_file):
-        print(*start_header, *extra_columns, *end_header, sep=sep, file=_file)
-        for row in rows:
-            print(*row.start_tuple, *extra_columns_placeholders, *row.end_tuple, sep=sep, file=_file)
+    if fmt is None:
+        fmt = get_row_writer_format(file) if isinstance(file, str) else 'tsv'
+
+    with ROW_WRITERS[fmt](file, extra_columns=extra_columns, sep=sep) as writer:
+        for batch in _iterate_batches(itt.chain([first_row], rows), write_batch_size):
+            writer.write(batch)
+    return writer.number_rows
+
+
+def prefilter_statements(
+    statements: Iterable[Statement],
+    keep_only_pmids: Union[None, str, Collection[str]] = None,
+    row_filter: Optional[RowFilter] = None,
+    protect_related: bool = True,
+    ontology=None,
+) -> List[Statement]:
+    """Drop statements that have no usable evidence, before they're preassembled or assembled to BEL.
+
+    The statements and their evidences are not modified, so the rows generated from the remaining
+    statements are the same as for all of them.
+
+    :param statements: INDRA statements
+    :param keep_only_pmids: If set, only evidences from these PMIDs are usable
+    :param row_filter: The filter for evidences. If none, uses :data:`DEFAULT_ROW_FILTER`.
+    :param protect_related: Should statements without usable evidence be kept if preassembly would
+     relate them to ones with usable evidence? They either get merged with them or, if they're more
+     specific, change which statements are top-level and their beliefs. Set to false if the statements
+     won't be preassembled.
+    :param ontology: The ontology used to find refinements, which should be the same one used for preassembly.
+     Defaults to INDRA's bio ontology.
+    :return: The remaining statements, in the same order
+    """
+    if isinstance(keep_only_pmids, str):
+        keep_only_pmids = {keep_only_pmids}
+    elif keep_only_pmids is not None:
+        keep_only_pmids = set(keep_only_pmids)
+    if row_filter is None:
+        row_filter = DEFAULT_ROW_FILTER
+
+    statements = list(statements)
+    usable_evidences = row_filter.filter_evidences
+
+    def _is_usable(statement: Statement) -> bool:
+        evidences = usable_evidences(statement.evidence)
+        if keep_only_pmids is None:
+            return bool(evidences)
+        return any(evidence.pmid in keep_only_pmids for evidence in evidences)
 
-    if isinstance(file, str):
-        with open(file, 'w') as _file:
-            _write(_file)
+    if not protect_related:
+        rv = [statement for statement in statements if _is_usable(statement)]
     else:
-        _write(file)
+        # Statements with the same matches hash are merged by preassembly, so they're kept or dropped together
+        hash_to_statements = defaultdict(list)
+        for statement in statements:
+            hash_to_statements[statement.get_hash(shallow=True)].append(statement)
+
+        protected = {
+            statement_hash
+            for statement_hash, group in hash_to_statements.items()
+            if any(map(_is_usable, group))
+        }
+        if protected and len(protected) < len(hash_to_statements):
+            _protect_more_specific(hash_to_statements, protected, ontology=ontology)
+
+        rv = [statement for statement in statements if statement.get_hash(shallow=True) in protected]
+
+    logger.info('dropped %d of %d statements without usable evidence', len(statements) - len(rv), len(statements))
+    return rv
+
+
+def _protect_more_specific(
+    hash_to_statements: Mapping[int, List[Statement]],
+    protected: Set[int],
+    ontology=None,
+) -> None:
+    """Add the statements that might refine a protected statement to the protected statements, in-place.
+
+    This uses the same ontology-based filter as preassembly, which finds a superset of the refinements.
+    Building the filter's index is the most expensive step of preassembly, so only the unprotected candidates
+    and the protected statements that they might refine are indexed: ones of the same type with an agent that
+    is the same as, or a parent of, one of the candidates' agents. There are usually few candidates, so this
+    is a small fraction of the statements.
+    """
+    from indra.preassembler.refinement import OntologyRefinementFilter
+
+    if ontology is None:
+        from indra.ontology.bio import bio_ontology as ontology
+
+    candidates = {
+        statement_hash: group[0]
+        for statement_hash, group in hash_to_statements.items()
+        if statement_hash not in protected
+    }
+    types = {type(statement) for statement in candidates.values()}
+    entity_keys = _get_related_entity_keys(candidates.values(), ontology)
+    refinable = {
+        statement_hash: group[0]
+        for statement_hash, group in hash_to_statements.items()
+        if statement_hash in protected and type(group[0]) in types and _might_be_refined(group[0], entity_keys)
+    }
+    logger.debug('indexing %d candidates and %d statements they might refine', len(candidates), len(refinable))
+    if not refinable:
+        return
+
+    refinement_filter = OntologyRefinementFilter(ontology)
+    refinement_filter.initialize({**refinable, **candidates})
+
+    # Protecting a statement might make statements that refine it need protecting too
+    changed = True
+    while changed and candidates:
+        changed = False
+        for statement_hash, statement in list(candidates.items()):
+            less_specific = refinement_filter.get_less_specifics(statement) or set()
+            if not protected.isdisjoint(less_specific):
+                protected.add(statement_hash)
+                del candidates[statement_hash]
+                changed = True
+
+
+def _get_related_entity_keys(statements: Iterable[Statement], ontology) -> Set[Any]:
+    """Get the groundings and entity keys of the statements' agents and the groundings of all of their parents."""
+    rv = set()
+    for statement in statements:
+        for agent in statement.agent_list():
+            if agent is None:
+                continue
+            rv.add(agent.entity_matches_key())
+            namespace, identifier = agent.get_grounding()
+            if namespace is not None and identifier is not None:
+                rv.add((namespace, identifier))
+                rv.update(ontology.get_parents(namespace, identifier))
+    return rv
+
+
+def _might_be_refined(statement: Statement, entity_keys: Set[Any]) -> bool:
+    """Check if the statement has an agent that's related to one of the entity keys, or no agents at all.
+
+    A statement's refinements have agents that match its agents or are their children in the ontology.
+    """
+    agents = [agent for agent in statement.agent_list() if agent is not None]
+    if not agents:
+        return True
+    return any(
+        agent.entity_matches_key() in entity_keys or agent.get_grounding() in entity_keys
+        for agent in agents
+    )
+
+
+def _sort_rows(rows: Iterable[Row], key: Callable[[Row], Any], chunk_size: int) -> Iterable[Row]:
+    """Sort rows with an external merge sort that keeps at most a chunk of rows in memory.
+
+    Like :func:`sorted`, this sort is stable.
+    """
+    rows = iter(rows)
+    chunk = sorted(itt.islice(rows, chunk_size), key=key)
+    if len(chunk) < chunk_size:  # everything fit in memory
+        yield from chunk
+        return
+
+    with ExitStack() as stack:
+        spilled = []
+        while chunk:
+            file = stack.enter_context(tempfile.TemporaryFile())
+            for i in range(0, len(chunk), _SPILL_PICKLE_SIZE):
+                pickle.dump(chunk[i:i + _SPILL_PICKLE_SIZE], file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.seek(0)
+            spilled.append(file)
+            chunk = sorted(itt.islice(rows, chunk_size), key=key)
+
+        logger.debug('merging %d sorted chunks of rows', len(spilled))
+        # heapq.merge takes ties from the earlier chunk first, so the merge stays stable
+        yield from heapq.merge(*(_iterate_spilled_rows(file) for file in spilled), key=key)
+
+
+def _iterate_spilled_rows(file: BinaryIO) -> Iterable[Row]:
+    while True:
+        try:
+            rows = pickle.load(file)
+        except EOFError:
+            return
+        yield from rows
 
 
 def get_rows_from_statements(
     statements: Iterable[Statement],
     allow_duplicates: bool = False,
     keep_only_pmids: Union[None, str, Collection[str]] = None,
-) -> List[Row]:
-    """Build and sort BEL curation rows from a list of statements using only the first evidence for each."""
-    for statement in statements:
-        yield from get_rows_from_statement(
-            statement,
+    batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+    workers: Optional[int] = None,
+    row_filter: Optional[RowFilter] = None,
+) -> Iterable[Row]:
+    """Build BEL curation rows from a list of statements using only the first evidence for each.
+
+    :param statements: INDRA statements
+    :param allow_duplicates: Keep several evidences for the same INDRA statement
+    :param keep_only_pmids: If set only keeps evidences from this PMID. Warning: still might
+     have multiple evidences.
+    :param batch_size: The number of statements to assemble into a single BEL graph at a time. If none,
+     assembles a BEL graph for each statement individually.
+    :param workers: The number of processes over which chunks of statements are distributed. If none,
+     generates all rows in this process.
+    :param row_filter: The filter for evidences and BEL edges. If none, uses :data:`DEFAULT_ROW_FILTER`.
+    """
+    if row_filter is None:
+        row_filter = DEFAULT_ROW_FILTER
+
+    if workers is not None and 1 < workers:
+        yield from _get_rows_from_statements_in_pool(
+            statements,
             allow_duplicates=allow_duplicates,
             keep_only_pmids=keep_only_pmids,
+            batch_size=batch_size,
+            workers=workers,
+            row_filter=row_filter,
         )
+        return
+
+    if batch_size is None:
+        for statement in statements:
+            yield from get_rows_from_statement(
+                statement,
+                allow_duplicates=allow_duplicates,
+                keep_only_pmids=keep_only_pmids,
+                row_filter=row_filter,
+            )
+        return
+
+    if isinstance(keep_only_pmids, str):
+        keep_only_pmids = {keep_only_pmids}
+
+    for batch in _iterate_batches(statements, batch_size):
+        batch = [
+            statement
+            for statement in batch
+            if _filter_statement_evidences(
+                statement,
+                allow_duplicates=allow_duplicates,
+                keep_only_pmids=keep_only_pmids,
+                row_filter=row_filter,
+            )
+        ]
+        yield from _get_rows_from_statements(batch, row_filter=row_filter)
+
+
+def _get_rows_from_statements_in_pool(
+    statements: Iterable[Statement],
+    allow_duplicates: bool,
+    keep_only_pmids: Union[None, str, Collection[str]],
+    batch_size: Optional[int],
+    workers: int,
+    row_filter: RowFilter,
+) -> Iterable[Row]:
+    """Generate rows from chunks of statements serialized as JSON in a process pool.
+
+    Chunks are yielded back in the order they were submitted, so the output is the same as in a single process.
+    Only a few chunks are submitted ahead of the one being yielded, and the rest are cancelled if the rows
+    stop being consumed, e.g., when a limit is reached.
+    """
+    if isinstance(keep_only_pmids, str):
+        keep_only_pmids = {keep_only_pmids}
+    elif keep_only_pmids is not None:
+        keep_only_pmids = set(keep_only_pmids)
+
+    func = partial(
+        _get_rows_from_statements_json,
+        allow_duplicates=allow_duplicates,
+        keep_only_pmids=keep_only_pmids,
+        batch_size=batch_size,
+        row_filter=row_filter,
+    )
+    chunks = (
+        stmts_to_json(chunk)
+        for chunk in _iterate_batches(statements, batch_size or DEFAULT_BATCH_SIZE)
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(func, chunk))
+                if 2 * workers <= len(pending):
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Don't wait for chunks whose rows won't be used when the pool shuts down
+            for future in pending:
+                future.cancel()
+
+
+def _get_rows_from_statements_json(
+    statements_json: List[Mapping],
+    allow_duplicates: bool,
+    keep_only_pmids: Optional[Collection[str]],
+    batch_size: Optional[int],
+    row_filter: RowFilter,
+) -> List[Row]:
+    """Generate rows from a chunk of statements serialized as JSON, e.g., in a worker process."""
+    return list(get_rows_from_statements(
+        stmts_from_json(statements_json),
+        allow_duplicates=allow_duplicates,
+        keep_only_pmids=keep_only_pmids,
+        batch_size=batch_size,
+        row_filter=row_filter,
+    ))
 
 
 def get_rows_from_statement(
     statement: Statement,
     allow_duplicates: bool = True,
     keep_only_pmids: Union[None, str, Collection[str]] = None,
+    row_filter: Optional[RowFilter] = None,
 ) -> Iterable[Row]:
     """Convert an INDRA statement into an iterable of BEL curation rows.
 
@@ -238,15 +1063,37 @@ def get_rows_from_statement(
     :param allow_duplicates: Keep several evidences for the same INDRA statement
     :param keep_only_pmids: If set only keeps evidences from this PMID. Warning: still might
      have multiple evidences.
+    :param row_filter: The filter for evidences and BEL edges. If none, uses :data:`DEFAULT_ROW_FILTER`.
     """
-    statement.evidence = [e for e in statement.evidence if _keep_evidence(e)]
+    if isinstance(keep_only_pmids, str):
+        keep_only_pmids = {keep_only_pmids}
+    if row_filter is None:
+        row_filter = DEFAULT_ROW_FILTER
+
+    if not _filter_statement_evidences(
+        statement,
+        allow_duplicates=allow_duplicates,
+        keep_only_pmids=keep_only_pmids,
+        row_filter=row_filter,
+    ):
+        return iter([])
+
+    yield from _get_rows_from_statement(statement, row_filter=row_filter)
+
+
+def _filter_statement_evidences(
+    statement: Statement,
+    allow_duplicates: bool,
+    keep_only_pmids: Optional[Collection[str]],
+    row_filter: RowFilter,
+) -> bool:
+    """Remove unusable evidences from the statement in-place and return if any were usable."""
+    statement.evidence = row_filter.filter_evidences(statement.evidence)
 
     # Remove evidences from BioPax
     if 0 == len(statement.evidence):
-        return iter([])
+        return False
 
-    if isinstance(keep_only_pmids, str):
-        keep_only_pmids = {keep_only_pmids}
     if keep_only_pmids is not None:
         statement.evidence = [
             evidence
@@ -260,44 +1107,113 @@ def get_rows_from_statement(
         # unused_evidences = statement.evidence[1:]
         del statement.evidence[1:]
 
-    yield from _get_rows_from_statement(statement)
+    return True
 
 
-def _keep_evidence(evidence: Evidence):
-    return (
-        evidence.pmid and
-        evidence.text and
-        evidence.text not in TEXT_BLACKLIST and
-        evidence.source_api and
-        evidence.source_api not in SOURCE_BLACKLIST
-    )
+def _iterate_batches(statements: Iterable[Statement], batch_size: int) -> Iterable[List[Statement]]:
+    """Iterate over lists of at most the given number of statements."""
+    it = iter(statements)
+    while True:
+        batch = list(itt.islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
 
 
-def _get_rows_from_statement(statement: Statement) -> Iterable[Row]:
+def _get_rows_from_statement(statement: Statement, row_filter: RowFilter) -> Iterable[Row]:
     """Build a BEL graph from the given INDRA statement and iterate over rows of all possible BEL edges."""
     graph = get_graph_from_statement(statement)
+    yield from _get_rows_from_graph(graph, {statement.uuid: statement}, row_filter=row_filter)
 
-    for u, v, data in graph.edges(data=True):
+
+def _get_rows_from_statements(statements: List[Statement], row_filter: RowFilter) -> Iterable[Row]:
+    """Build a BEL graph from several INDRA statements and iterate over rows of all possible BEL edges.
+
+    The edges are split back to their source statements by the INDRA UUID annotation so the rows
+    come out grouped in the same order as the statements, and each statement's rows come out in the
+    same order as from :func:`get_rows_from_statement`.
+    """
+    if not statements:
+        return
+
+    graph = get_graph_from_statements(statements)
+    if graph is None:  # fall back to assembling each statement on its own
+        for statement in statements:
+            yield from _get_rows_from_statement(statement, row_filter=row_filter)
+        return
+
+    uuid_to_edges = defaultdict(list)
+    for u, v, key in graph.edge_order:
+        uuid = graph[u][v][key].get(ANNOTATIONS, {}).get('uuid')
+        if uuid is not None:
+            uuid_to_edges[uuid].append((u, v, key))
+
+    uuid_to_statement = {statement.uuid: statement for statement in statements}
+    for statement in statements:
+        edges = uuid_to_edges.get(statement.uuid)
+        if edges:
+            yield from _get_rows_from_edges(
+                _iterate_statement_edges(graph, edges),
+                uuid_to_statement,
+                row_filter=row_filter,
+            )
+
+
+def _iterate_statement_edges(graph: BELGraph, edges: List[EdgeKey]) -> Iterable[EdgeTuple]:
+    """Iterate over the edges of one statement in the order of a graph assembled from only that statement.
+
+    The nodes of the batch graph are in the order they were first added by any statement, so iterating over it
+    directly can order the edges of a statement differently than :func:`get_graph_from_statement`. Adding the
+    statement's edges to an empty graph in the order they were assembled recreates its own node order.
+    """
+    statement_graph = BELGraph()
+    for u, v, key in edges:
+        statement_graph.add_node_from_data(u)
+        statement_graph.add_node_from_data(v)
+        statement_graph.add_edge(u, v, key=key)
+
+    edge_keys = set(edges)
+    for u, v, key in statement_graph.edges(keys=True):
+        # Skip the edges added along with nodes, like the ones to the parents of variants
+        if (u, v, key) in edge_keys:
+            yield u, v, graph[u][v][key]
+
+
+def _get_rows_from_graph(
+    graph: BELGraph,
+    uuid_to_statement: Mapping[str, Statement],
+    row_filter: RowFilter,
+) -> Iterable[Row]:
+    """Iterate over rows of all possible BEL edges in a graph assembled from the given statements."""
+    return _get_rows_from_edges(graph.edges(data=True), uuid_to_statement, row_filter=row_filter)
+
+
+def _get_rows_from_edges(
+    edges: Iterable[EdgeTuple],
+    uuid_to_statement: Mapping[str, Statement],
+    row_filter: RowFilter,
+) -> Iterable[Row]:
+    """Iterate over rows of the given BEL edges from a graph assembled from the given statements."""
+    keep_bel = row_filter.keep_bel
+    for u, v, data in edges:
         if data[RELATION] in UNQUALIFIED_EDGES:
             continue
 
         bel_subject, bel_relation, bel_object = edge_to_tuple(u, v, data, use_identifiers=True)
 
-        if any(
-            substring in bel_part
-            for bel_part, substring in itt.product((bel_subject, bel_relation, bel_object), SUBSTRING_BLACKLIST)
-        ):
+        if not keep_bel(bel_subject, bel_relation, bel_object):
             continue
 
         if CITATION not in data:
             logger.debug('no citation information')
             continue
 
+        uuid = data[ANNOTATIONS]['uuid']
         yield Row(
-            uuid=data[ANNOTATIONS]['uuid'],
+            uuid=uuid,
             statement_hash=data[ANNOTATIONS]['stmt_hash'],
             evidence_hash=data[ANNOTATIONS]['source_hash'],
-            belief=round(statement.belief, 2),
+            belief=round(uuid_to_statement[uuid].belief, 2),
             pmid=data[CITATION][CITATION_IDENTIFIER],
             evidence=data[EVIDENCE],
             api=data[ANNOTATIONS]['source_api'],
@@ -318,3 +1234,34 @@ def get_graph_from_statement(statement: Statement) -> BELGraph:
         return BELGraph()
     else:
         return graph
+
+
+class _EdgeOrderGraph(BELGraph):
+    """A BEL graph that remembers the order in which its edges were added."""
+
+    def __init__(self, *args, **kwargs) -> None:  # noqa: D107
+        super().__init__(*args, **kwargs)
+        self.edge_order: List[EdgeKey] = []
+
+    def add_edge(self, u, v, key=None, **attr):  # noqa: D102
+        key = super().add_edge(u, v, key=key, **attr)
+        self.edge_order.append((u, v, key))
+        return key
+
+
+def get_graph_from_statements(statements: List[Statement]) -> Optional[BELGraph]:
+    """Convert several INDRA statements to a single BEL graph.
+
+    :returns: A BEL graph, or None if any of the statements could not be assembled. Its ``edge_order``
+     attribute lists the edges in the order they were assembled.
+    """
+    pba = PybelAssembler(statements)
+    model = _EdgeOrderGraph()
+    model.graph = pba.model.graph  # keep the metadata and namespaces set by the assembler
+    pba.model = model
+
+    try:
+        return pba.make_model()
+    except AttributeError:  # something funny happening in one of the statements
+        logger.debug('problem making BEL graph from a batch of %d INDRA statements', len(statements))
+        return None
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""A journal of the genes exported in an enrichment run, for resuming runs that crashed or had failures."""
+
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, IO, Iterator, Mapping, Optional, Set
+
+__all__ = [
+    'RunJournal',
+    'atomic_write',
+    'STATUS_RUNNING',
+    'STATUS_DONE',
+    'STATUS_FAILED',
+]
+
+logger = logging.getLogger(__name__)
+
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS genes (
+    gene_symbol TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    number_statements INTEGER,
+    number_rows INTEGER,
+    error TEXT
+)
+'''
+
+
+@dataclass
+class RunJournal:
+    """A SQLite journal of the status, timing, and number of statements of each gene exported in a run.
+
+    A gene is only marked as done after all of its files were written, so genes that were running when
+    a run crashed are redone when it's run again.
+    """
+
+    directory: str
+    database_name: str = 'export_journal.sqlite'
+
+    path: str = field(init=False)
+
+    def __post_init__(self) -> None:  # noqa: D105
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, self.database_name)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60)
+
+    def start(self, gene_symbol: str) -> None:
+        """Mark the gene as running, forgetting how it went before."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO genes (gene_symbol, status, started) VALUES (?, ?, ?)',
+                (gene_symbol, STATUS_RUNNING, time.time()),
+            )
+
+    def finish(self, gene_symbol: str, number_statements: int, number_rows: int) -> None:
+        """Mark the gene as done."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'UPDATE genes SET status = ?, finished = ?, number_statements = ?, number_rows = ?, error = NULL'
+                ' WHERE gene_symbol = ?',
+                (STATUS_DONE, time.time(), number_statements, number_rows, gene_symbol),
+            )
+
+    def fail(self, gene_symbol: str, error: str) -> None:
+        """Mark the gene as failed."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'UPDATE genes SET status = ?, finished = ?, error = ? WHERE gene_symbol = ?',
+                (STATUS_FAILED, time.time(), error, gene_symbol),
+            )
+
+    def get_statuses(self) -> Dict[str, str]:
+        """Get the status of each gene in the journal."""
+        with closing(self._connect()) as connection:
+            return dict(connection.execute('SELECT gene_symbol, status FROM genes'))
+
+    def get_done(self) -> Set[str]:
+        """Get the genes that are done."""
+        with closing(self._connect()) as connection:
+            return {
+                gene_symbol
+                for gene_symbol, in connection.execute('SELECT gene_symbol FROM genes WHERE status = ?', (STATUS_DONE,))
+            }
+
+    def get_unfinished(self) -> Set[str]:
+        """Get the genes that failed or were still running when a run crashed."""
+        with closing(self._connect()) as connection:
+            return {
+                gene_symbol
+                for gene_symbol, in connection.execute(
+                    'SELECT gene_symbol FROM genes WHERE status IN (?, ?)', (STATUS_FAILED, STATUS_RUNNING),
+                )
+            }
+
+    def get_record(self, gene_symbol: str) -> Optional[Mapping[str, object]]:
+        """Get the status, timing, number of statements, and error of the gene, or None if it's not in the journal."""
+        with closing(self._connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute('SELECT * FROM genes WHERE gene_symbol = ?', (gene_symbol,)).fetchone()
+        return None if row is None else dict(row)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w') -> Iterator[IO]:
+    """Write to a temporary file next to the given path then move it to the path once it's complete.
+
+    If writing fails, the temporary file is removed and the path is left as it was.
+    """
+    temporary_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(temporary_path, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
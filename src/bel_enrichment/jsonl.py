@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""Streaming INDRA statement JSON Lines files.
+
+Each line holds the JSON of one statement, so statements are serialized and parsed one at a time
+instead of building the JSON of the whole corpus in memory. Paths ending in ``.gz`` are gzipped.
+
+:func:`to_statement_file` picks JSON Lines or a single indented JSON list of statements by the extension
+of the path, so files that other tools expect to hold a JSON list keep working.
+
+.. note:: Statements read one at a time can't be linked to the statements that support them, so
+          their ``supports`` and ``supported_by`` lists come out empty.
+"""
+
+import gzip
+import json
+import logging
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator, TextIO, Union
+
+from indra.statements import Statement, stmt_from_json, stmts_to_json
+
+__all__ = [
+    'to_jsonl',
+    'iterate_jsonl',
+    'to_statement_file',
+    'JSONL_EXTENSIONS',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The extensions of the paths that :func:`to_statement_file` writes as JSON Lines
+JSONL_EXTENSIONS = ('.jsonl', '.jsonl.gz')
+
+
+def to_jsonl(statements: Iterable[Statement], file: Union[str, TextIO]) -> int:
+    """Write statements to a JSON Lines file, one statement at a time.
+
+    :param statements: INDRA statements
+    :param file: A path, which is gzipped if it ends in ``.gz``, or a file opened for writing text
+    :return: The number of statements written
+    """
+    number_statements = 0
+    with _open(file, 'w') as _file:
+        for number_statements, statement in enumerate(statements, start=1):
+            _file.write(json.dumps(statement.to_json(), separators=(',', ':')))
+            _file.write('\n')
+    return number_statements
+
+
+def to_statement_file(statements: Iterable[Statement], file: Union[str, TextIO]) -> int:
+    """Write statements as JSON Lines if the path ends in ``.jsonl`` or ``.jsonl.gz``, otherwise as a JSON list.
+
+    :param statements: INDRA statements
+    :param file: A path or a file opened for writing text. Files and other paths get a single indented JSON
+     list of all statements, which is gzipped if the path ends in ``.gz``.
+    :return: The number of statements written
+    """
+    if isinstance(file, str) and file.endswith(JSONL_EXTENSIONS):
+        return to_jsonl(statements, file)
+
+    statements = list(statements)
+    with _open(file, 'w') as _file:
+        json.dump(stmts_to_json(statements), _file, indent=2)
+    return len(statements)
+
+
+def iterate_jsonl(file: Union[str, TextIO]) -> Iterable[Statement]:
+    """Lazily read statements from a JSON Lines file, one statement at a time.
+
+    :param file: A path, which is gzipped if it ends in ``.gz``, or a file opened for reading text
+    """
+    with _open(file, 'r') as _file:
+        for line in _file:
+            line = line.strip()
+            if line:
+                yield stmt_from_json(json.loads(line))
+
+
+@contextmanager
+def _open(file: Union[str, TextIO], mode: str) -> Iterator[IO]:
+    """Open a path, gzipped if it ends in ``.gz``, or pass through an already opened file without closing it."""
+    if not isinstance(file, str):
+        yield file
+    elif file.endswith('.gz'):
+        with gzip.open(file, mode + 't', encoding='utf-8') as _file:
+            yield _file
+    else:
+        with open(file, mode, encoding='utf-8') as _file:
+            yield _file
@@ -3,23 +3,41 @@
 """Utilities for finding interesting and novel nodes around which to expand curation."""
 
 import collections
-from typing import Counter, Tuple
+import itertools as itt
+import logging
+import os
+import pickle
+from dataclasses import dataclass
+from typing import Any, Counter, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+import numpy as np
 
 from pybel import BELGraph, Pipeline
-from pybel.dsl import BaseEntity, Gene
+from pybel.constants import ABUNDANCE, ASSOCIATION, BIOPROCESS, FUNCTION, PATHOLOGY, RELATION, UNQUALIFIED_EDGES
+from pybel.dsl import BaseEntity, CentralDogma, Gene, MicroRna, Protein, Rna
 from pybel.struct import (
     collapse_all_variants, collapse_to_genes, enrich_protein_and_rna_origins, remove_associations,
     remove_biological_processes, remove_filtered_nodes, remove_pathologies,
 )
 from pybel.struct.filters import is_abundance
 from pybel.struct.pipeline import in_place_transformation
+from pybel.utils import hash_edge
+from .graph_cache import _check_header, _load_pickled_header, get_graph_cache_header
 
 __all__ = [
     'process_graph',
     'rank_genes',
     'process_rank_genes',
+    'stream_rank_genes',
+    'RankTable',
+    'get_gene_level_node',
+    'GeneRanker',
 ]
 
+logger = logging.getLogger(__name__)
+
+EdgeTuple = Tuple[BaseEntity, BaseEntity, Any, Mapping[str, Any]]
+
 
 @in_place_transformation
 def remove_abundances(graph: BELGraph) -> None:
@@ -51,6 +69,297 @@ def rank_genes(graph: BELGraph) -> Counter[Tuple[str, str]]:
     })
 
 
-def process_rank_genes(graph: BELGraph) -> Counter[BaseEntity]:
-    """Process the graph then rank the genes."""
-    return rank_genes(process_graph(graph))
+def process_rank_genes(graph: BELGraph) -> Counter[Tuple[str, str]]:
+    """Process the graph then rank the genes.
+
+    This gives the same ranks as ``rank_genes(process_graph(graph))`` with :func:`stream_rank_genes`, which
+    doesn't copy the graph.
+    """
+    return stream_rank_genes(graph)
+
+
+#: The functions of the nodes removed by :data:`process_graph`
+_REMOVED_FUNCTIONS = {ABUNDANCE, BIOPROCESS, PATHOLOGY}
+
+
+def get_gene_level_node(node: BaseEntity) -> BaseEntity:
+    """Get the node into which :data:`process_graph` collapses the given node.
+
+    Variants are collapsed to their parents, and proteins, RNAs, and miRNAs are collapsed to their genes.
+    Other nodes are returned as they are.
+    """
+    if isinstance(node, CentralDogma) and node.variants:
+        node = node.get_parent()
+    if isinstance(node, Protein):
+        node = node.get_rna()
+    if isinstance(node, (Rna, MicroRna)):
+        node = node.get_gene()
+    return node
+
+
+def _iterate_gene_level_nodes(nodes: Iterable[BaseEntity]) -> Iterable[Gene]:
+    """Iterate over the genes left by :data:`process_graph` in the order they appear in the processed graph.
+
+    May yield the same gene several times.
+    """
+    nodes = list(nodes)
+    # Genes that are already in the graph keep their place
+    for node in nodes:
+        if isinstance(node, Gene) and not node.variants:
+            yield node
+    # Then come the genes added when enriching proteins with their RNAs then RNAs with their genes
+    rnas = [node.get_rna() for node in nodes if isinstance(node, Protein) and not node.variants]
+    for node in itt.chain(nodes, rnas):
+        if isinstance(node, (Rna, MicroRna)) and not node.variants:
+            yield node.get_gene()
+
+
+def _get_gene_level_edge(
+    u: BaseEntity,
+    v: BaseEntity,
+    key: Any,
+    data: Mapping[str, Any],
+    u_gene_level: BaseEntity,
+    v_gene_level: BaseEntity,
+) -> Optional[Tuple[BaseEntity, BaseEntity, Any]]:
+    """Get the edge into which :data:`process_graph` collapses the given edge, if it keeps it and it touches a gene.
+
+    Like :func:`pybel.struct.collapse_pair`, an edge whose nodes are collapsed gets a new key from hashing it with
+    its new nodes, so edges that become the same are only counted once.
+    """
+    if data[RELATION] == ASSOCIATION or u_gene_level == v_gene_level:
+        return None
+    if u_gene_level[FUNCTION] in _REMOVED_FUNCTIONS or v_gene_level[FUNCTION] in _REMOVED_FUNCTIONS:
+        return None
+    if not isinstance(u_gene_level, Gene) and not isinstance(v_gene_level, Gene):
+        return None
+    if u_gene_level is not u or v_gene_level is not v:
+        key = hash_edge(u_gene_level, v_gene_level, data)
+    return u_gene_level, v_gene_level, key
+
+
+def stream_rank_genes(graph: BELGraph) -> Counter[Tuple[str, str]]:
+    """Rank the genes like :func:`rank_genes` on the graph processed by :data:`process_graph`, in one pass.
+
+    Instead of copying the graph twice and collapsing it, each edge's nodes are mapped to the nodes into which
+    they would be collapsed, edges that would be removed are skipped, and the degrees are counted directly.
+    Only the keys of edges that would get new nodes are kept to count each collapsed edge once.
+
+    .. note:: Like :func:`pybel.struct.collapse_to_genes`, this assumes transcription and translation edges
+     only connect genes, RNAs, and proteins with the same names, as added by
+     :func:`pybel.struct.enrich_protein_and_rna_origins`.
+    """
+    # Only keep the nodes that are collapsed, all others stay as they are
+    gene_level_nodes = {}
+    for node in graph:
+        gene_level_node = get_gene_level_node(node)
+        if gene_level_node is not node:
+            gene_level_nodes[node] = gene_level_node
+
+    degrees = collections.Counter()
+    rekeyed_edges = set()
+    for u, v, key, data in graph.edges(keys=True, data=True):
+        u_gene_level, v_gene_level = gene_level_nodes.get(u, u), gene_level_nodes.get(v, v)
+        edge = _get_gene_level_edge(u, v, key, data, u_gene_level, v_gene_level)
+        if edge is None:
+            continue
+        if u_gene_level is not u or v_gene_level is not v:
+            # Skip it if it's the same as an edge that's already in the graph or one that was already re-keyed
+            if graph.has_edge(*edge) or edge in rekeyed_edges:
+                continue
+            rekeyed_edges.add(edge)
+        for node in (u_gene_level, v_gene_level):
+            if isinstance(node, Gene):
+                degrees[node] += 1
+
+    return collections.Counter({
+        (node.namespace, node.name): 1 / (1 + degrees[node])
+        for node in dict.fromkeys(_iterate_gene_level_nodes(graph))
+    })
+
+
+@dataclass
+class RankTable:
+    """The ranks of genes stored as arrays, for selecting the top genes without sorting all of them."""
+
+    namespaces: np.ndarray
+    names: np.ndarray
+    ranks: np.ndarray
+
+    @classmethod
+    def from_ranks(cls, ranks: Mapping[Tuple[str, str], float]) -> 'RankTable':
+        """Build a table from ranks like the ones from :func:`rank_genes`, keeping their order."""
+        return cls(
+            namespaces=np.array([namespace for namespace, _ in ranks], dtype=str),
+            names=np.array([name for _, name in ranks], dtype=object),
+            ranks=np.fromiter(ranks.values(), dtype=float, count=len(ranks)),
+        )
+
+    @classmethod
+    def from_graph(cls, graph: BELGraph) -> 'RankTable':
+        """Rank the genes in the graph with :func:`stream_rank_genes`."""
+        return cls.from_ranks(stream_rank_genes(graph))
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self.ranks)
+
+    def top(self, number: Optional[int] = None, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Get the positions of the highest ranked genes, highest first.
+
+        Ties are kept in the table's order, so this gives the same genes in the same order as
+        :meth:`collections.Counter.most_common`. Only the selected genes are sorted.
+
+        :param number: The number of genes to get. If none, gets all of them.
+        :param mask: A boolean array of the genes to choose from. If none, chooses from all genes.
+        """
+        positions = np.arange(len(self.ranks)) if mask is None else np.flatnonzero(mask)
+        ranks = self.ranks[positions]
+
+        if number is not None and number < len(positions):
+            if number <= 0:
+                return positions[:0]
+            # Keep all genes ranked above the number-th highest rank, then the first of the genes tied with it
+            threshold = -np.partition(-ranks, number - 1)[number - 1]
+            above = ranks > threshold
+            tied = np.flatnonzero(ranks == threshold)[:number - np.count_nonzero(above)]
+            selected = np.sort(np.concatenate([np.flatnonzero(above), tied]))
+            positions, ranks = positions[selected], ranks[selected]
+
+        return positions[np.argsort(-ranks, kind='stable')]
+
+    def iterate(
+        self,
+        number: Optional[int] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> Iterable[Tuple[str, str, float]]:
+        """Iterate over the namespaces, names, and ranks of the highest ranked genes, highest first.
+
+        :param number: The number of genes to get. If none, gets all of them.
+        :param mask: A boolean array of the genes to choose from. If none, chooses from all genes.
+        """
+        for position in self.top(number=number, mask=mask):
+            yield str(self.namespaces[position]), self.names[position], float(self.ranks[position])
+
+
+class GeneRanker:
+    """Keep the degrees of the genes in a graph processed by :data:`process_graph` up to date as it changes.
+
+    Only the table of degrees and the collapsed edges touching genes are kept, so re-ranking after adding or
+    removing a few edges doesn't re-run the pipeline. Build one with :meth:`from_graph`, then update it with
+    the nodes and edges that were added to or removed from the graph. :meth:`rank` gives the same ranks as
+    :func:`process_rank_genes` on the changed graph.
+
+    .. note:: Like in a :class:`pybel.BELGraph`, each edge can only be added once. Remove a node's edges
+     before removing it. Unqualified edges, like the ``hasVariant`` edges that :class:`pybel.BELGraph` adds for
+     each variant, come from the nodes themselves, so they can't be removed on their own.
+    """
+
+    #: The version of the layout of saved tables. Increment this when it changes.
+    schema_version = 1
+
+    def __init__(self) -> None:  # noqa: D107
+        #: The nodes of the original graph
+        self.nodes: Set[BaseEntity] = set()
+        #: The genes of the processed graph, in order, and the number of nodes collapsed into each
+        self.genes: Dict[Gene, int] = {}
+        #: The edges of the processed graph touching genes and the number of edges collapsed into each
+        self.edges: Dict[Tuple[BaseEntity, BaseEntity, Any], int] = {}
+        #: The degrees of the genes in the processed graph
+        self.degrees: Counter[Gene] = collections.Counter()
+
+    @classmethod
+    def from_graph(cls, graph: BELGraph) -> 'GeneRanker':
+        """Build the table of degrees for the given graph."""
+        ranker = cls()
+        # Lay out the genes in the same order as in the processed graph so ties are ranked the same
+        ranker.genes = dict.fromkeys(_iterate_gene_level_nodes(graph), 0)
+        ranker.add_nodes(graph)
+        ranker.add_edges(graph.edges(keys=True, data=True))
+        return ranker
+
+    def add_nodes(self, nodes: Iterable[BaseEntity]) -> None:
+        """Add nodes to the graph. Nodes that are already in it are skipped."""
+        for node in nodes:
+            if node in self.nodes:
+                continue
+            self.nodes.add(node)
+            gene_level_node = get_gene_level_node(node)
+            if isinstance(gene_level_node, Gene):
+                self.genes[gene_level_node] = self.genes.get(gene_level_node, 0) + 1
+
+    def remove_nodes(self, nodes: Iterable[BaseEntity]) -> None:
+        """Remove nodes from the graph. Their edges must have already been removed."""
+        for node in nodes:
+            if node not in self.nodes:
+                continue
+            self.nodes.remove(node)
+            gene_level_node = get_gene_level_node(node)
+            if not isinstance(gene_level_node, Gene):
+                continue
+            self.genes[gene_level_node] -= 1
+            if 0 == self.genes[gene_level_node]:
+                del self.genes[gene_level_node]
+
+    def add_edges(self, edges: Iterable[EdgeTuple]) -> None:
+        """Add edges, given as tuples of their source, target, key, and data, and their nodes to the graph."""
+        for u, v, key, data in edges:
+            self.add_nodes((u, v))
+            edge = _get_gene_level_edge(u, v, key, data, get_gene_level_node(u), get_gene_level_node(v))
+            if edge is None:
+                continue
+            count = self.edges.get(edge, 0)
+            self.edges[edge] = count + 1
+            if 0 == count:
+                self.degrees[edge[0]] += 1
+                self.degrees[edge[1]] += 1
+
+    def remove_edges(self, edges: Iterable[EdgeTuple]) -> None:
+        """Remove edges, given as tuples of their source, target, key, and data, from the graph.
+
+        :raises ValueError: if an edge is unqualified, e.g., ``hasVariant``. Rank the changed graph again
+         with :meth:`from_graph` instead.
+        """
+        edges = list(edges)
+        # Check all edges first so the table isn't left half-updated
+        for u, v, _, data in edges:
+            if data[RELATION] in UNQUALIFIED_EDGES:
+                raise ValueError(f'can not remove unqualified {data[RELATION]} edge from {u} to {v}')
+
+        for u, v, key, data in edges:
+            edge = _get_gene_level_edge(u, v, key, data, get_gene_level_node(u), get_gene_level_node(v))
+            if edge is None or edge not in self.edges:
+                continue
+            self.edges[edge] -= 1
+            if 0 == self.edges[edge]:
+                del self.edges[edge]
+                self.degrees[edge[0]] -= 1
+                self.degrees[edge[1]] -= 1
+
+    def rank(self) -> Counter[Tuple[str, str]]:
+        """Rank the genes like :func:`rank_genes` does on the processed graph."""
+        return collections.Counter({
+            (node.namespace, node.name): 1 / (1 + self.degrees[node])
+            for node in self.genes
+        })
+
+    def _get_header(self) -> Mapping[str, Any]:
+        return dict(get_graph_cache_header(), ranker=self.schema_version)
+
+    def to_pickle(self, path: str) -> None:
+        """Save the table of degrees."""
+        with open(path, 'wb') as file:
+            pickle.dump(self._get_header(), file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(self.__dict__, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_pickle(cls, path: str) -> Optional['GeneRanker']:
+        """Load a table of degrees, or get None if it doesn't exist or was saved by other versions."""
+        if not os.path.exists(path):
+            return None
+
+        ranker = cls()
+        with open(path, 'rb') as file:
+            if not _check_header(path, _load_pickled_header(file), ranker._get_header()):
+                return None
+            ranker.__dict__.update(pickle.load(file))
+        return ranker
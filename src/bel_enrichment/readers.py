@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""Readers for curation sheets in several formats.
+
+XLSX sheets are streamed row by row with :mod:`openpyxl` and only the columns used by this package are kept.
+The values are then passed through the same parser as :func:`pandas.read_excel`, so missing values and
+types come out the same. Sheets can also be TSV, CSV, or Parquet files.
+"""
+
+import logging
+import os
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+__all__ = [
+    'SHEET_COLUMNS',
+    'read_sheet',
+    'SheetReader',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The columns used from curation sheets when compiling them and generating curation reports
+SHEET_COLUMNS = [
+    'PMID',
+    'Evidence',
+    'Subject',
+    'Predicate',
+    'Object',
+    'INDRA UUID',
+    'Belief',
+    'API',
+    'Curator',
+    'Checked',
+    'Correct',
+    'Changed',
+    'Error Type',
+]
+
+
+def read_sheet(path: str, usecols: Optional[Collection[str]] = None) -> pd.DataFrame:
+    """Read a curation sheet.
+
+    :param path: The path to a ``.xlsx``, ``.xls``, ``.tsv``, ``.csv``, or ``.parquet`` file
+    :param usecols: The names of the columns to keep. Missing ones are skipped. If none, keeps all.
+    """
+    if path.endswith('.xlsx'):
+        return _read_xlsx(path, usecols=usecols)
+
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+        return df if usecols is None else df[[column for column in df.columns if column in usecols]]
+
+    _usecols = None if usecols is None else (lambda column: column in usecols)
+    if path.endswith('.tsv'):
+        return pd.read_csv(path, sep='\t', usecols=_usecols)
+    if path.endswith('.csv'):
+        return pd.read_csv(path, usecols=_usecols)
+    return pd.read_excel(path, usecols=_usecols)
+
+
+def _read_xlsx(path: str, usecols: Optional[Collection[str]] = None) -> pd.DataFrame:
+    """Stream the first worksheet of an XLSX file, only converting the cells in the given columns."""
+    import openpyxl
+    from openpyxl.cell.cell import ERROR_CODES
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+
+        indices = [
+            i
+            for i, column in enumerate(header)
+            if usecols is None or column in usecols
+        ]
+        data: List[List[Any]] = [[_convert_cell(header[i], ERROR_CODES) for i in indices]]
+        last_row_with_data = 0
+        for row in rows:
+            converted_row = [
+                _convert_cell(row[i], ERROR_CODES) if i < len(row) else ''
+                for i in indices
+            ]
+            data.append(converted_row)
+            if any(value != '' for value in converted_row):
+                last_row_with_data = len(data) - 1
+    finally:
+        workbook.close()
+
+    # Trim trailing empty rows, like pandas.read_excel
+    del data[last_row_with_data + 1:]
+    return TextParser(data, header=0).read()
+
+
+def _convert_cell(value, error_codes: Collection[str]):
+    """Convert a cell's value like :func:`pandas.read_excel` does with :mod:`openpyxl`."""
+    if value is None:
+        return ''
+    if isinstance(value, str) and value in error_codes:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class SheetReader:
+    """Read each curation sheet once and share it between passes over a repository.
+
+    Sheets are re-read if their modification time or size change.
+    """
+
+    def __init__(self, usecols: Optional[Collection[str]] = None) -> None:
+        """Initialize the reader.
+
+        :param usecols: The names of the columns to keep. Defaults to :data:`SHEET_COLUMNS`.
+        """
+        self.usecols = set(SHEET_COLUMNS if usecols is None else usecols)
+        self._sheets: Dict[str, Tuple[Tuple[float, int], pd.DataFrame]] = {}
+
+    def __call__(self, path: str) -> pd.DataFrame:
+        """Read the sheet at the given path, or get it if it was already read."""
+        stat = os.stat(path)
+        key = stat.st_mtime, stat.st_size
+        cached = self._sheets.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        df = read_sheet(path, usecols=self.usecols)
+        self._sheets[path] = key, df
+        return df
+
+    def clear(self) -> None:
+        """Forget all of the sheets that were read."""
+        self._sheets.clear()
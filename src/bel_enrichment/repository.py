@@ -2,25 +2,35 @@
 
 """A wrapper for functions on a BEL sheets repository."""
 
+import hashlib
+import itertools as itt
+import json
 import logging
+import math
 import os
 import sys
-from collections import defaultdict
-from dataclasses import dataclass, field
-from typing import Any, Iterable, Mapping, Optional, Tuple, Union
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 import click
 import pandas as pd
 from tqdm import tqdm
 
-import pybel
 from bel_repository import BELMetadata, BELRepository
 from pybel import BELGraph
 from pybel.cli import echo_warnings_via_pager
-from pybel.constants import ANNOTATIONS, CITATION
 from pybel.parser import BELParser
-from pybel.struct import get_subgraphs_by_annotation
-from .sheets import _check_curation_template_columns, generate_curation_summary, iterate_sheets_paths, process_row
+from .graph_cache import GRAPH_CACHE_FORMATS, from_graph_cache, to_graph_cache
+from .readers import SHEET_COLUMNS, SheetReader, read_sheet
+from .sheets import (
+    _check_curation_template_columns, _parse_statement, generate_curation_summary, iterate_curated_statements,
+    iterate_sheets_paths,
+)
+from .subgraphs import SubgraphIndex, from_subgraph_index, get_prior_hash, to_subgraph_index
 from .summary import count_indra_apis
 
 __all__ = [
@@ -41,9 +51,24 @@ class BELSheetsRepository:
     prior: Union[None, BELGraph, BELRepository] = None
 
     sheet_suffix: Union[str, Tuple[str]] = field(default=('_curation.xlsx', '_curated.xlsx'))
-    json_name: str = 'sheets.bel.nodelink.json'
-
-    _cache_json_path: str = field(init=False)
+    #: Deprecated alias for :attr:`cache_name`
+    json_name: Optional[str] = None
+    #: The format of the cached graphs. One of the keys of :data:`bel_enrichment.graph_cache.GRAPH_CACHE_FORMATS`
+    cache_format: str = 'pickle'
+    #: The name of the cache of the whole graph. Defaults to ``sheets.bel`` with the extension for the format.
+    cache_name: Optional[str] = None
+    sheets_cache_name: str = 'sheets_cache'
+    #: The name of the index of the sub-graphs in the prior
+    subgraph_index_name: str = 'subgraph_index.pickle'
+    #: A hash that changes whenever the prior does, e.g., from the release of the prior. If none, it's
+    #: made with :func:`bel_enrichment.subgraphs.get_prior_hash`.
+    prior_hash: Optional[str] = None
+
+    _cache_path: str = field(init=False)
+    _sheets_cache_directory: str = field(init=False)
+    _sheets_manifest_path: str = field(init=False)
+    _reader: SheetReader = field(init=False, repr=False)
+    _subgraph_index: Optional[Tuple[str, SubgraphIndex]] = field(init=False, repr=False, default=None)
 
     def __post_init__(self) -> None:  # noqa: D105
         if self.output_directory is None:
@@ -51,7 +76,21 @@ class BELSheetsRepository:
 
         os.makedirs(self.output_directory, exist_ok=True)
 
-        self._cache_json_path = os.path.join(self.output_directory, self.json_name)
+        if self.json_name is not None:
+            warnings.warn('json_name is deprecated. Use cache_name instead.', DeprecationWarning, stacklevel=3)
+            if self.cache_name is None:
+                self.cache_name = self.json_name
+
+        if self.cache_format not in GRAPH_CACHE_FORMATS:
+            raise ValueError(f'invalid cache format: {self.cache_format}')
+        if self.cache_name is None:
+            self.cache_name = f'sheets.bel.{GRAPH_CACHE_FORMATS[self.cache_format]}'
+
+        self._cache_path = os.path.join(self.output_directory, self.cache_name)
+        self._sheets_cache_directory = os.path.join(self.output_directory, self.sheets_cache_name)
+        self._sheets_manifest_path = os.path.join(self._sheets_cache_directory, 'manifest.json')
+        # Sheets read while compiling are shared with the curation summary, which clears them
+        self._reader = SheetReader()
 
     def get_prior(self) -> BELGraph:
         """Get the prior graph or load it."""
@@ -62,6 +101,25 @@ class BELSheetsRepository:
         else:
             raise TypeError(f'wrong type: {self.prior}')
 
+    def get_subgraph_index(self) -> SubgraphIndex:
+        """Get the index of the sub-graphs in the prior, or build it if the prior changed since it was built.
+
+        The prior is only loaded if the index has to be built.
+        """
+        prior_hash = self.prior_hash or get_prior_hash(self.prior)
+        if self._subgraph_index is not None and self._subgraph_index[0] == prior_hash:
+            return self._subgraph_index[1]
+
+        path = os.path.join(self.output_directory, self.subgraph_index_name)
+        index = from_subgraph_index(path, prior_hash)
+        if index is None:
+            logger.info('indexing the sub-graphs in the prior')
+            index = SubgraphIndex.from_graph(self.get_prior())
+            to_subgraph_index(index, path, prior_hash)
+
+        self._subgraph_index = prior_hash, index
+        return index
+
     def iterate_sheets_paths(self) -> Iterable[str]:
         """Iterate over the paths to all sheets."""
         if isinstance(self.sheet_suffix, str):
@@ -75,60 +133,197 @@ class BELSheetsRepository:
         use_cached: bool = True,
         use_tqdm: bool = False,
         tqdm_kwargs: Optional[Mapping[str, Any]] = None,
+        workers: Optional[int] = None,
+        incremental: bool = False,
     ) -> BELGraph:
         """Get the BEL graph from all sheets in this repository.
 
+        :param workers: The number of processes over which the sheets are distributed. If none, parses
+         all sheets in this process.
+        :param incremental: If true, keeps a sub-graph for each sheet and only re-parses the sheets that
+         changed since the last time. Deleted sheets are dropped.
+
+        Sheets parsed in this process are kept until :meth:`generate_curation_summary` is called, so it
+        doesn't have to read them again.
+
         .. warning:: This BEL graph isn't pre-filled with namespace and annotation URLs.
         """
-        if use_cached and os.path.exists(self._cache_json_path):
-            return pybel.from_nodelink_gz(self._cache_json_path)
+        # Checking the sheets for an incremental build is cheap, so it never uses the cache of the whole graph
+        if use_cached and not incremental:
+            graph = from_graph_cache(self._cache_path, fmt=self.cache_format)
+            if graph is not None:
+                return graph
+
+        paths = list(self.iterate_sheets_paths())
+
+        if incremental:
+            graph = self._get_graph_incremental(paths, workers=workers, use_tqdm=use_tqdm, tqdm_kwargs=tqdm_kwargs)
+        elif workers is not None and 1 < workers:
+            graph = self._get_graph_in_pool(paths, workers=workers, use_tqdm=use_tqdm, tqdm_kwargs=tqdm_kwargs)
+        else:
+            if use_tqdm:
+                _tqdm_kwargs = dict(desc=f'Sheets in {self.directory}')
+                if tqdm_kwargs:
+                    _tqdm_kwargs.update(tqdm_kwargs)
+                paths = tqdm(paths, **_tqdm_kwargs)
+            graph = _get_graph_from_sheets(paths, metadata=self.metadata, use_tqdm=use_tqdm, reader=self._reader)
+
+        if self.prior is not None:  # assign edges to sub-graphs
+            self.get_subgraph_index().assign(graph)
+
+        to_graph_cache(graph, self._cache_path, fmt=self.cache_format)
+
+        return graph
 
+    def _new_graph(self) -> BELGraph:
         graph = BELGraph()
         if self.metadata is not None:
             self.metadata.update(graph)
+        return graph
 
-        logger.info('streamlining parser')
-        bel_parser = BELParser(graph)
-
-        paths = list(self.iterate_sheets_paths())
+    def _get_graph_in_pool(
+        self,
+        paths: List[str],
+        workers: int,
+        use_tqdm: bool,
+        tqdm_kwargs: Optional[Mapping[str, Any]],
+    ) -> BELGraph:
+        """Parse chunks of the sheets into sub-graphs in a process pool then merge them in order."""
+        graph = self._new_graph()
+
+        sub_graphs = self._iterate_sub_graphs(
+            _get_chunks(paths, workers),
+            workers=workers,
+            use_tqdm=use_tqdm,
+            tqdm_kwargs=tqdm_kwargs,
+        )
+        for sub_graph in sub_graphs:
+            # This also carries over the warnings, which were attributed to their sheet's path in the worker
+            graph += sub_graph
 
-        if use_tqdm:
-            _tqdm_kwargs = dict(desc=f'Sheets in {self.directory}')
-            if tqdm_kwargs:
-                _tqdm_kwargs.update(tqdm_kwargs)
-            paths = tqdm(list(paths), **_tqdm_kwargs)
+        return graph
 
+    def _iterate_sub_graphs(
+        self,
+        chunks: List[List[str]],
+        workers: Optional[int],
+        use_tqdm: bool,
+        tqdm_kwargs: Optional[Mapping[str, Any]],
+        func: Optional[Callable[[List[str]], Any]] = None,
+    ) -> Iterable[Any]:
+        """Parse each chunk of sheets into its own sub-graph, in a process pool if there are several workers.
+
+        :param func: The function applied to each chunk. Defaults to :func:`_get_graph_from_sheets`.
+        """
+        if func is None:
+            func = partial(_get_graph_from_sheets, metadata=self.metadata, use_tqdm=False)
+        with ExitStack() as stack:
+            if workers is not None and 1 < workers:
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                sub_graphs = executor.map(func, chunks)
+            else:
+                sub_graphs = map(func, chunks)
+            if use_tqdm:
+                _tqdm_kwargs = dict(desc=f'Sheets in {self.directory}', total=len(chunks), unit='chunk')
+                if tqdm_kwargs:
+                    _tqdm_kwargs.update(tqdm_kwargs)
+                sub_graphs = tqdm(sub_graphs, **_tqdm_kwargs)
+            yield from sub_graphs
+
+    def _get_graph_incremental(
+        self,
+        paths: List[str],
+        workers: Optional[int],
+        use_tqdm: bool,
+        tqdm_kwargs: Optional[Mapping[str, Any]],
+    ) -> BELGraph:
+        """Re-parse only the sheets that changed since the last build then merge all of the per-sheet sub-graphs."""
+        os.makedirs(self._sheets_cache_directory, exist_ok=True)
+        manifest = self._read_sheets_manifest()
+        previous_fingerprints = manifest.get('sheets', {})
+
+        # The metadata is stored in each sub-graph, so they're all re-parsed if it changed
+        metadata = None if self.metadata is None else asdict(self.metadata)
+        metadata_unchanged = 'metadata' in manifest and manifest['metadata'] == metadata
+        if previous_fingerprints and not metadata_unchanged:
+            logger.info('re-parsing all sheets since the metadata changed')
+
+        fingerprints = {}
+        sub_graphs = {}
+        changed_paths = []
         for path in paths:
-            graph.path = path
-
-            try:
-                df = pd.read_excel(path)
-            except LookupError as exc:
-                logger.warning(f'Error opening {path}: {exc}')
-                continue
-
-            # Check columns in DataFrame exist
-            if not _check_curation_template_columns(df):
-                logger.warning(f'^ above columns in {path} were missing')
-                continue
+            fingerprint, unchanged = _check_fingerprint(path, previous_fingerprints.get(path))
+            fingerprints[path] = fingerprint
+            if unchanged and metadata_unchanged:
+                # This is None if the sub-graph is missing or was cached by other versions
+                sub_graphs[path] = from_graph_cache(self._get_sheet_cache_path(path), fmt=self.cache_format)
+            if sub_graphs.get(path) is None:
+                changed_paths.append(path)
+
+        logger.info('re-parsing %d of %d sheets', len(changed_paths), len(paths))
+        # Parse a few chunks per worker with one parser each, since building a parser is slow
+        if workers is not None and 1 < workers:
+            changed_chunks = _get_chunks(changed_paths, workers)
+        else:
+            changed_chunks = [changed_paths] if changed_paths else []
+        changed_sub_graphs = itt.chain.from_iterable(self._iterate_sub_graphs(
+            changed_chunks,
+            workers=workers,
+            use_tqdm=use_tqdm,
+            tqdm_kwargs=tqdm_kwargs,
+            func=partial(_get_graphs_from_sheets, metadata=self.metadata),
+        ))
+        for path, sub_graph in zip(changed_paths, changed_sub_graphs):
+            to_graph_cache(sub_graph, self._get_sheet_cache_path(path), fmt=self.cache_format)
+            sub_graphs[path] = sub_graph
+
+        for path in set(previous_fingerprints) - set(fingerprints):  # the sheet was deleted
+            logger.info('dropping deleted sheet %s', path)
+            sheet_cache_path = self._get_sheet_cache_path(path)
+            if os.path.exists(sheet_cache_path):
+                os.remove(sheet_cache_path)
+
+        with open(self._sheets_manifest_path, 'w') as file:
+            json.dump(dict(metadata=metadata, sheets=fingerprints), file, indent=2, sort_keys=True)
+
+        graph = self._new_graph()
+        for path in paths:
+            graph += sub_graphs[path]
+        return graph
 
-            process_df(bel_parser=bel_parser, df=df, use_tqdm=use_tqdm, tqdm_kwargs=dict(desc=f'Reading {path}'))
+    def _read_sheets_manifest(self) -> Dict[str, Any]:
+        """Read the metadata and the fingerprints of the sheets from the last incremental build."""
+        if not os.path.exists(self._sheets_manifest_path):
+            return {}
+        with open(self._sheets_manifest_path) as file:
+            manifest = json.load(file)
+        if 'sheets' not in manifest:  # made by an older version, which only had the fingerprints
+            return dict(sheets=manifest)
+        return manifest
 
-        if self.prior is not None:  # assign edges to sub-graphs
-            prior = self.get_prior()
-            assign_subgraphs(graph=graph, prior=prior)
+    def _get_sheet_cache_path(self, path: str) -> str:
+        name = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self._sheets_cache_directory, f'{name}.{GRAPH_CACHE_FORMATS[self.cache_format]}')
 
-        pybel.to_nodelink_file(graph, self._cache_json_path, indent=2, sort_keys=True)
+    def generate_curation_summary(self, workers: Optional[int] = None):
+        """Generate a curation summary.
 
-        return graph
+        :param workers: The number of processes over which the sheets are distributed. If none, summarizes
+         all sheets in this process, reusing the sheets that were already read to compile the graph.
 
-    def generate_curation_summary(self):
-        """Generate a curation summary."""
-        return generate_curation_summary(
-            input_directory=self.directory,
-            output_directory=self.output_directory,
-            sheet_suffix=self.sheet_suffix,
-        )
+        The sheets that were read to compile the graph are forgotten afterwards, so they aren't kept in
+        memory for as long as the repository is.
+        """
+        try:
+            return generate_curation_summary(
+                input_directory=self.directory,
+                output_directory=self.output_directory,
+                sheet_suffix=self.sheet_suffix,
+                reader=self._reader,
+                workers=workers,
+            )
+        finally:
+            self._reader.clear()
 
     def build_cli(self) -> click.Group:  # noqa: D202
         """Build a command line interface."""
@@ -149,10 +344,18 @@ class BELSheetsRepository:
         @main.command()
         @click.option('-w', '--show-warnings', is_flag=True)
         @click.option('-r', '--reload', is_flag=True)
+        @click.option('--workers', type=int, help='Number of processes used to parse and summarize sheets')
+        @click.option('-i', '--incremental', is_flag=True, help='Only re-parse sheets that changed since last time')
         @click.pass_obj
-        def compile(repo: BELSheetsRepository, show_warnings: bool, reload: bool):
+        def compile(
+            repo: BELSheetsRepository,
+            show_warnings: bool,
+            reload: bool,
+            workers: Optional[int],
+            incremental: bool,
+        ):
             """Generate all results and summaries."""
-            graph = repo.get_graph(use_cached=(not reload), use_tqdm=True)
+            graph = repo.get_graph(use_cached=(not reload), use_tqdm=True, workers=workers, incremental=incremental)
             if 0 == graph.number_of_nodes():
                 click.secho('Error: empty graph', fg='red')
                 sys.exit(-1)
@@ -178,20 +381,15 @@ class BELSheetsRepository:
                 indra_api_df.to_csv(os.path.join(repo.output_directory, 'api_summary.tsv'), sep='\t')
 
             if repo.prior is not None:
-                prior = repo.get_prior()
-
-                combine_graph = prior + graph
+                # Summarize the prior joined with the graph from the index, without copying the prior
+                subgraph_index = repo.get_subgraph_index()
                 click.secho('Enriched Graph', fg='cyan', bold=True)
-                combine_graph.summarize()
+                click.echo(subgraph_index.summary_str(graph))
 
-                subgraphs: Mapping[str, BELGraph] = get_subgraphs_by_annotation(combine_graph, 'Subgraph')
-                summary_df = pd.DataFrame.from_dict({
-                    name: subgraph.summary_dict()
-                    for name, subgraph in subgraphs.items()
-                }, orient='index')
+                summary_df = pd.DataFrame.from_dict(subgraph_index.summarize_subgraphs(graph), orient='index')
                 summary_df.to_csv(os.path.join(repo.output_directory, 'subgraph_summary.tsv'), sep='\t')
 
-            repo.generate_curation_summary()
+            repo.generate_curation_summary(workers=workers)
 
         @main.command()
         @click.argument('file', type=click.File('w'))
@@ -215,37 +413,139 @@ class BELSheetsRepository:
                 click.echo(path)
 
 
+def _get_chunks(paths: List[str], workers: int) -> List[List[str]]:
+    """Split the paths into a few chunks per worker so one slow chunk doesn't hold up the rest."""
+    chunk_size = max(1, math.ceil(len(paths) / (4 * workers)))
+    return [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+
+def _check_fingerprint(path: str, fingerprint: Optional[Mapping[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+    """Get the fingerprint of a sheet and if its content is the same as in the given previous fingerprint.
+
+    The content is only hashed if the modification time or size changed.
+    """
+    stat = os.stat(path)
+    if fingerprint is not None and fingerprint['mtime'] == stat.st_mtime and fingerprint['size'] == stat.st_size:
+        return dict(fingerprint), True
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            sha256.update(block)
+
+    rv = dict(mtime=stat.st_mtime, size=stat.st_size, sha256=sha256.hexdigest())
+    return rv, fingerprint is not None and fingerprint['sha256'] == rv['sha256']
+
+
+def _get_graph_from_sheets(
+    paths: Iterable[str],
+    metadata: Optional[BELMetadata] = None,
+    use_tqdm: bool = False,
+    reader: Optional[Callable[[str], pd.DataFrame]] = None,
+) -> BELGraph:
+    """Parse the given sheets into a new BEL graph, e.g., in a worker process.
+
+    :param reader: A function for reading sheets. Defaults to :func:`read_sheet` with only the needed columns.
+    """
+    if reader is None:
+        reader = partial(read_sheet, usecols=SHEET_COLUMNS)
+
+    graph = BELGraph()
+    if metadata is not None:
+        metadata.update(graph)
+
+    logger.info('streamlining parser')
+    bel_parser = BELParser(graph)
+
+    for path in paths:
+        _parse_sheet(bel_parser, path, reader=reader, use_tqdm=use_tqdm)
+
+    return graph
+
+
+def _get_graphs_from_sheets(
+    paths: List[str],
+    metadata: Optional[BELMetadata] = None,
+    reader: Optional[Callable[[str], pd.DataFrame]] = None,
+) -> List[BELGraph]:
+    """Parse each of the given sheets into its own new BEL graph with a single parser, e.g., in a worker process.
+
+    The parser is cleared between sheets, so each graph is the same as if its sheet was parsed on its own.
+
+    :param reader: A function for reading sheets. Defaults to :func:`read_sheet` with only the needed columns.
+    """
+    if reader is None:
+        reader = partial(read_sheet, usecols=SHEET_COLUMNS)
+
+    logger.info('streamlining parser')
+    bel_parser = BELParser(BELGraph())
+
+    rv = []
+    for path in paths:
+        graph = BELGraph()
+        if metadata is not None:
+            metadata.update(graph)
+        bel_parser.graph = graph
+        bel_parser.control_parser.clear()
+        _parse_sheet(bel_parser, path, reader=reader, use_tqdm=False)
+        rv.append(graph)
+
+    return rv
+
+
+def _parse_sheet(
+    bel_parser: BELParser,
+    path: str,
+    reader: Callable[[str], pd.DataFrame],
+    use_tqdm: bool,
+) -> None:
+    """Parse the sheet into the parser's graph."""
+    bel_parser.graph.path = path
+
+    try:
+        df = reader(path)
+    except LookupError as exc:
+        logger.warning(f'Error opening {path}: {exc}')
+        return
+
+    # Check columns in DataFrame exist
+    if not _check_curation_template_columns(df, path):
+        logger.warning(f'^ above columns in {path} were missing')
+        return
+
+    process_df(bel_parser=bel_parser, df=df, use_tqdm=use_tqdm, tqdm_kwargs=dict(desc=f'Reading {path}'))
+
+
 def process_df(
     bel_parser: BELParser,
     df: pd.DataFrame,
     use_tqdm: bool = True,
     tqdm_kwargs: Optional[Mapping[str, Any]] = None,
 ) -> None:
-    """Load the graph in the parser with the statements from the curation sheet."""
-    it = df.iterrows()
+    """Load the graph in the parser with the statements from the curation sheet.
+
+    Uncurated rows are filtered out all at once so only curated statements are passed to the parser.
+    """
+    it = iterate_curated_statements(df)
     _tqdm_kwargs = dict(leave=False)
     if tqdm_kwargs:
         _tqdm_kwargs.update(tqdm_kwargs)
     if use_tqdm:
-        it = tqdm(it, total=len(df.index), **_tqdm_kwargs)
-    for line_number, row in it:
-        process_row(bel_parser=bel_parser, row=row, line_number=line_number)
+        it = tqdm(it, **_tqdm_kwargs)
+    for line_number, reference, evidence, annotations, bel in it:
+        _parse_statement(
+            bel_parser=bel_parser,
+            reference=reference,
+            evidence=evidence,
+            annotations=annotations,
+            bel=bel,
+            line_number=line_number,
+        )
 
 
 def assign_subgraphs(graph: BELGraph, prior: BELGraph, annotation: str = 'Subgraph') -> None:
-    """Assign the sub-graphs to edges in the graph based on edges in the prior."""
-    node_to_subgraph = defaultdict(set)
-    for u, v, d in prior.edges(data=True):
-        subgraphs = set(d.get(ANNOTATIONS, {}).get(annotation, ()))
-        node_to_subgraph[u].update(subgraphs)
-        node_to_subgraph[v].update(subgraphs)
-
-    # Assign sub-graphs based on the sub-graphs in which the source and target participate in the prior
-    for u, v, k, d in graph.edges(keys=True, data=True):
-        if CITATION not in d:  # skip unqualified edges
-            continue
-        d.setdefault(ANNOTATIONS, {})
-        d[ANNOTATIONS][annotation] = {
-            subgraph: True
-            for subgraph in node_to_subgraph[u] | node_to_subgraph[v]
-        }
+    """Assign the sub-graphs to edges in the graph based on edges in the prior.
+
+    .. seealso:: :meth:`BELSheetsRepository.get_subgraph_index` keeps the index of the prior between compilations
+    """
+    SubgraphIndex.from_graph(prior, annotation=annotation).assign(graph)
@@ -2,11 +2,15 @@
 
 """Load a BEL graph from curation sheets."""
 
+import itertools as itt
 import logging
 import os
-from collections import defaultdict
-from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import pyparsing
 from tqdm import tqdm
@@ -14,6 +18,7 @@ from tqdm import tqdm
 from pybel.constants import CAUSAL_DECREASE_RELATIONS, CAUSAL_INCREASE_RELATIONS, CITATION_TYPE_PUBMED
 from pybel.parser import BELParser
 from pybel.parser.exc import BELParserWarning, BELSyntaxError
+from .readers import SHEET_COLUMNS, SheetReader, read_sheet
 
 logger = logging.getLogger(__name__)
 
@@ -23,13 +28,20 @@ CORRECT = 'Correct'
 ERROR_BUT_ALSO_OTHER_STATEMENT = 'Error but other statement was identified'
 MODIFIED_BY_CURATOR = 'Modified by curator'
 
+#: Pairs of optional columns in curation sheets and the annotations they're stored in
+OPTIONAL_ANNOTATION_COLUMNS = [
+    ('INDRA UUID', 'INDRA_UUID'),
+    ('Belief', 'INDRA_Belief'),
+    ('API', 'INDRA_API'),
+]
 
-def _check_curation_template_columns(df: pd.DataFrame) -> bool:
+
+def _check_curation_template_columns(df: pd.DataFrame, path: Optional[str] = None) -> bool:
     """Check the columns in a curation dataframe."""
     rv = True
-    for column in ['Curator', 'Checked', 'Corret', 'Changed']:
+    for column in ['Curator', 'Checked', 'Correct', 'Changed']:
         if column not in df.columns:
-            logger.warning(f'missing the "{column}" column')
+            logger.warning(f'missing the "{column}" column' + (f' in {path}' if path else ''))
             rv = False
     return rv
 
@@ -47,29 +59,14 @@ def process_row(bel_parser: BELParser, row: Dict, line_number: int) -> None:
     if not reference:
         raise Exception('missing reference')
 
-    bel_parser.control_parser.citation_db = CITATION_TYPE_PUBMED
-    bel_parser.control_parser.citation_db_id = reference
-
-    # Set the evidence
-    bel_parser.control_parser.evidence = row['Evidence']
-    # TODO set annotations if they exist
-
     annotations = {
         'Curator': row['Curator'],
         'Confidence': 'Medium',  # needs re-curation
     }
 
-    if 'INDRA UUID' in row:
-        annotations['INDRA_UUID'] = row['INDRA UUID']
-
-    if 'Belief' in row:
-        annotations['INDRA_Belief'] = row['Belief']
-
-    if 'API' in row:
-        annotations['INDRA_API'] = row['API']
-
-    # Set annotations
-    bel_parser.control_parser.annotations.update(annotations)
+    for column, annotation in OPTIONAL_ANNOTATION_COLUMNS:
+        if column in row:
+            annotations[annotation] = row[column]
 
     sub = row['Subject']
     obj = row['Object']
@@ -77,6 +74,94 @@ def process_row(bel_parser: BELParser, row: Dict, line_number: int) -> None:
     # Build a BEL statement and parse it
     bel = f"{sub} {row['Predicate']} {obj}"
 
+    _parse_statement(
+        bel_parser=bel_parser,
+        reference=reference,
+        evidence=row['Evidence'],
+        annotations=annotations,
+        bel=bel,
+        line_number=line_number,
+    )
+
+
+def iterate_curated_statements(df: pd.DataFrame) -> Iterable[Tuple[int, Any, Any, Dict[str, Any], str]]:
+    """Iterate over the curated rows in a curation sheet, filtered all at once with boolean masks.
+
+    This gives the same results as applying :func:`process_row` to each row, but only the rows that survive
+    the filter are ever touched in Python.
+
+    :return: An iterable of the line number, PMID, evidence, annotations, and BEL string for each curated row
+    """
+    # Don't use unchecked material nor anything that's neither correct nor changed
+    mask = _truthy(df['Checked']) & (_truthy(df['Correct']) | _truthy(df['Changed']))
+    df = df[mask]
+    if df.empty:
+        return
+
+    if not _truthy(df['PMID']).all():
+        raise Exception('missing reference')
+
+    bels = _to_str(df['Subject'])
+    for column in ('Predicate', 'Object'):
+        bels = np.char.add(np.char.add(bels, ' '), _to_str(df[column]))
+
+    optional_columns = [
+        (column, annotation)
+        for column, annotation in OPTIONAL_ANNOTATION_COLUMNS
+        if column in df.columns
+    ]
+
+    it = zip(
+        df.index,
+        _to_list(df['PMID']),
+        _to_list(df['Evidence']),
+        _to_list(df['Curator']),
+        zip(*(_to_list(df[column]) for column, _ in optional_columns)) if optional_columns else itt.repeat(()),
+        bels.tolist(),
+    )
+    for line_number, reference, evidence, curator, optional_values, bel in it:
+        annotations = {
+            'Curator': curator,
+            'Confidence': 'Medium',  # needs re-curation
+        }
+        for (_, annotation), value in zip(optional_columns, optional_values):
+            annotations[annotation] = value
+        yield line_number, reference, evidence, annotations, bel
+
+
+def _truthy(series: pd.Series) -> np.ndarray:
+    """Get if each value is true in Python, so missing values (NaN) are true like in :func:`process_row`."""
+    return series.to_numpy(dtype=object).astype(bool)
+
+
+def _to_str(series: pd.Series) -> np.ndarray:
+    """Get the values as strings, so missing values become ``'nan'`` like they would in an f-string."""
+    return series.to_numpy(dtype=object).astype(str)
+
+
+def _to_list(series: pd.Series) -> List[Any]:
+    """Get the values as the same Python objects that :meth:`pandas.DataFrame.iterrows` would give."""
+    return series.to_numpy(dtype=object).tolist()
+
+
+def _parse_statement(
+    bel_parser: BELParser,
+    reference: Any,
+    evidence: Any,
+    annotations: Mapping[str, Any],
+    bel: str,
+    line_number: int,
+) -> None:
+    bel_parser.control_parser.citation_db = CITATION_TYPE_PUBMED
+    bel_parser.control_parser.citation_db_id = reference
+
+    # Set the evidence
+    bel_parser.control_parser.evidence = evidence
+    # TODO set annotations if they exist
+
+    # Set annotations
+    bel_parser.control_parser.annotations.update(annotations)
+
     # Cast line number from numpy.int64 to integer since JSON cannot handle this class
     line_number = int(line_number)
 
@@ -88,32 +173,25 @@ def process_row(bel_parser: BELParser, row: Dict, line_number: int) -> None:
         bel_parser.graph.add_warning(BELSyntaxError(line_number=line_number, line=bel, position=exc.loc))
 
 
-def generate_error_types(path: str) -> Tuple[Mapping[str, int], str]:
+def generate_error_types(path: str, df: Optional[pd.DataFrame] = None) -> Tuple[Mapping[str, int], str]:
     """Generate report about the types of errors INDRA made.
 
     :param path: path to the excel file
+    :param df: The sheet, if it was already read
     :return: summary of the curation
     """
-    df = pd.read_excel(path)
-
-    error_types = defaultdict(int)
-    curator = None
-
-    for line, row in df.iterrows():
-        if line == 0:
-            curator = row.get('Curator')
-
-        error_type = row.get('Error Type')
+    if df is None:
+        df = read_sheet(path, usecols=SHEET_COLUMNS)
 
-        if pd.isnull(error_type):
-            continue
+    curator = df['Curator'].get(0) if 'Curator' in df.columns else None
 
-        # Multiple errors are listed separated by a comma
-        for error in str(error_type).split(','):
-            # Lower case errors and remove spacing
-            error_types[error.lower().strip()] += 1
+    if 'Error Type' not in df.columns:
+        return {}, curator
 
-    return error_types, curator
+    # Multiple errors are listed separated by a comma. Lower case errors and remove spacing.
+    errors = df['Error Type'].dropna().astype(str).str.split(',').explode().str.lower().str.strip()
+    # Counter keeps the order in which each error was first seen, so the columns of the summary stay the same
+    return dict(Counter(errors)), curator
 
 
 def generate_curation_report(
@@ -121,81 +199,79 @@ def generate_curation_report(
     edge_type_filter: Optional[str] = None,
     use_tqdm: bool = True,
     tqdm_kwargs: Optional[Mapping[str, Any]] = None,
+    df: Optional[pd.DataFrame] = None,
 ) -> Mapping:
     """Generate report about curated/non-curated statements in a given curation template.
 
     :param path: path to the excel file
     :param edge_type_filter: filter relationships that are not 'activation_edges' or 'inhibition_edges'
+    :param use_tqdm: Unused, since the whole sheet is categorized at once
+    :param tqdm_kwargs: Unused, since the whole sheet is categorized at once
+    :param df: The sheet, if it was already read
     :return: summary of the curation
     """
-    try:
-        df = pd.read_excel(path)
-    except LookupError as exc:
-        logger.warning(f'Error opening {path}: {exc}')
-        return {}
+    if df is None:
+        try:
+            df = read_sheet(path, usecols=SHEET_COLUMNS)
+        except LookupError as exc:
+            logger.warning(f'Error opening {path}: {exc}')
+            return {}
 
     # Check columns in dataframe exist
     if not _check_curation_template_columns(df, path):
         raise ValueError(f'{path} has a problem with the header')
 
-    curation_results = defaultdict(int)
-
-    it = df.iterrows()
-    if use_tqdm:
-        it = tqdm(it, **(tqdm_kwargs or {}))
-    for line, row in it:
-        evidence = row.get('Evidence')
-        if evidence == 'No evidence text.':
-            logger.debug('No evidence text. Skipping...')
-            continue
-
-        if edge_type_filter is not None:
-            relationship = row.get('Predicate')
-
-            # Apply filter
-            if edge_type_filter == 'activation_edges' and relationship not in CAUSAL_INCREASE_RELATIONS:
-                continue
-
-            elif edge_type_filter == 'inhibition_edges' and relationship not in CAUSAL_DECREASE_RELATIONS:
-                continue
+    if 'Evidence' in df.columns:
+        df = df[(df['Evidence'] != 'No evidence text.').to_numpy(dtype=bool)]
 
-            elif edge_type_filter not in {'activation_edges', 'inhibition_edges'}:
-                raise ValueError(f'Not valid edge_type: {edge_type_filter}')
+    if edge_type_filter is not None and not df.empty:
+        relationships = df['Predicate'] if 'Predicate' in df.columns else pd.Series(None, index=df.index)
 
-        checked = row.get('Checked')
-        correct = row.get('Correct')
-        changed = row.get('Changed')
-        # Transform real values ('x' and'NaN') to Trues and Falses
-        checked = pd.notnull(checked)
-        correct = pd.notnull(correct)
-        changed = pd.notnull(changed)
+        # Apply filter
+        if edge_type_filter == 'activation_edges':
+            df = df[relationships.isin(CAUSAL_INCREASE_RELATIONS).to_numpy()]
+        elif edge_type_filter == 'inhibition_edges':
+            df = df[relationships.isin(CAUSAL_DECREASE_RELATIONS).to_numpy()]
+        else:
+            raise ValueError(f'Not valid edge_type: {edge_type_filter}')
 
-        # The statement has not been curated (all 3 columns are empty)
-        if not any([checked, correct, changed]):
-            curation_results[NOT_CURATED] += 1
-
-        # Only checked is marked
-        elif checked and not any([correct, changed]):
-            curation_results[ERROR] += 1
-
-        # Correct statements by Indra
-        elif correct and not changed:
-            curation_results[CORRECT] += 1
-
-        # Statement has been modified by the curator and WAS the original one
-        elif checked and changed:
-            curation_results[MODIFIED_BY_CURATOR] += 1
-
-        elif changed and correct:
-            logger.warning(f'Conflict in row {line}')
-
-        # Statement has been modified by the curator but WAS NOT the original one
-        elif changed:
-            curation_results[ERROR_BUT_ALSO_OTHER_STATEMENT] += 1
-
-        curation_results['Total'] += 1
+    if df.empty:
+        return {}
 
-    return dict(curation_results)
+    # Transform real values ('x' and'NaN') to Trues and Falses
+    checked, correct, changed = (
+        df[column].notna().to_numpy() if column in df.columns else np.zeros(len(df.index), dtype=bool)
+        for column in ('Checked', 'Correct', 'Changed')
+    )
+
+    conflicts = ~checked & correct & changed
+    for line in df.index[conflicts]:
+        logger.warning(f'Conflict in row {line}')
+
+    # The conditions are checked in order, so each row goes in the first category it matches
+    categories = np.select(
+        [
+            # The statement has not been curated (all 3 columns are empty)
+            ~(checked | correct | changed),
+            # Only checked is marked
+            checked & ~(correct | changed),
+            # Correct statements by Indra
+            correct & ~changed,
+            # Statement has been modified by the curator and WAS the original one
+            checked & changed,
+            conflicts,
+            # Statement has been modified by the curator but WAS NOT the original one
+            changed,
+        ],
+        [NOT_CURATED, ERROR, CORRECT, MODIFIED_BY_CURATOR, '', ERROR_BUT_ALSO_OTHER_STATEMENT],
+        default='',
+    )
+
+    # Keep the categories in the order they first appear, with the total right after the first row's category,
+    # so the summary's columns and rows come out in the same order as when the rows were counted one by one
+    values, first_indexes, counts = np.unique(categories, return_index=True, return_counts=True)
+    order = sorted([*zip(first_indexes.tolist(), values.tolist(), counts.tolist()), (0.5, 'Total', len(df.index))])
+    return {category: count for _, category, count in order if category}
 
 
 def generate_curation_summary(
@@ -204,32 +280,46 @@ def generate_curation_summary(
     sheet_suffix: str,
     use_tqdm: bool = True,
     edge_type_filter: Optional[str] = None,
+    reader: Optional[Callable[[str], pd.DataFrame]] = None,
+    workers: Optional[int] = None,
 ) -> None:
-    """Generate a summary of the curation results on excel."""
-    summary_excel_rows = {}
-    error_excel_rows = {}
+    """Generate a summary of the curation results on excel.
 
-    paths = iterate_sheets_paths(directory=input_directory, suffix=sheet_suffix)
-    if use_tqdm:
-        paths = tqdm(list(paths), desc=f'Generating curation report in {output_directory}')
+    :param reader: A function for reading sheets, like a :class:`SheetReader` that was already used to compile
+     the sheets. If none, each sheet is read once for both the curation report and the error types.
+    :param workers: The number of processes over which the sheets are distributed. If none, summarizes all
+     sheets in this process. Each process reads its sheets itself, so the ``reader`` is not used.
+    """
+    paths = list(iterate_sheets_paths(directory=input_directory, suffix=sheet_suffix))
 
-    for path in paths:
-        gene_symbol = path.split('/')[-2]
+    if workers is not None and 1 < workers:
+        func = partial(_summarize_sheet, edge_type_filter=edge_type_filter, reader=None)
+        executor = ProcessPoolExecutor(max_workers=workers)
+        summaries = executor.map(func, paths, chunksize=max(1, len(paths) // (4 * workers)))
+    else:
+        executor = None
+        func = partial(_summarize_sheet, edge_type_filter=edge_type_filter, reader=reader or SheetReader())
+        summaries = map(func, paths)
 
-        # Subfolder name (Gene Symbol) -> dictionary results
-        d = summary_excel_rows[gene_symbol] = generate_curation_report(
-            path=path,
-            edge_type_filter=edge_type_filter,
-            use_tqdm=use_tqdm,
-            tqdm_kwargs=dict(leave=False),
-        )
-        if not d:
-            logger.warning(f'Missing sheet, skipping curation report for {path}')
-            continue
+    if use_tqdm:
+        summaries = tqdm(summaries, total=len(paths), desc=f'Generating curation report in {output_directory}')
 
-        error_types, _ = generate_error_types(path)
+    summary_excel_rows = {}
+    error_excel_rows = {}
+    try:
+        for path, (d, error_types) in zip(paths, summaries):
+            gene_symbol = path.split('/')[-2]
+
+            # Subfolder name (Gene Symbol) -> dictionary results
+            summary_excel_rows[gene_symbol] = d
+            if not d:
+                logger.warning(f'Missing sheet, skipping curation report for {path}')
+                continue
 
-        error_excel_rows[gene_symbol] = error_types
+            error_excel_rows[gene_symbol] = error_types
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     # Export Summary Report
     df_summary = pd.DataFrame.from_dict(summary_excel_rows, orient='index')
@@ -244,6 +334,26 @@ def generate_curation_summary(
     df_error.to_csv(os.path.join(output_directory, 'error_types.csv'))
 
 
+def _summarize_sheet(
+    path: str,
+    edge_type_filter: Optional[str],
+    reader: Optional[Callable[[str], pd.DataFrame]],
+) -> Tuple[Mapping[str, int], Optional[Mapping[str, int]]]:
+    """Read a sheet once then generate both its curation report and its error types, e.g., in a worker process."""
+    try:
+        df = read_sheet(path, usecols=SHEET_COLUMNS) if reader is None else reader(path)
+    except LookupError as exc:
+        logger.warning(f'Error opening {path}: {exc}')
+        return {}, None
+
+    d = generate_curation_report(path=path, edge_type_filter=edge_type_filter, df=df)
+    if not d:
+        return d, None
+
+    error_types, _ = generate_error_types(path, df=df)
+    return d, error_types
+
+
 def iterate_sheets_paths(*, directory: str, suffix: str) -> Iterable[str]:
     """List the excel curation sheets."""
     for dirpath, dirnames, filenames in os.walk(directory):
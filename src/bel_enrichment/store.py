@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""A store of the INDRA statements exported for each gene, shared by all genes in a run.
+
+Neighboring genes share many statements, so each statement is only stored once, as compressed JSON keyed
+by its hash, and each gene only keeps the list of the hashes of its statements. Statements are loaded
+lazily by hash.
+
+The hash of a statement doesn't depend on its evidences, so when a statement is stored again, e.g., by a later
+run or for another gene, the evidences it didn't have yet are added to it by their source hash.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import zlib
+from collections import defaultdict
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from indra.statements import Statement, stmts_from_json
+
+__all__ = [
+    'StatementStore',
+]
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS statements (
+    hash INTEGER PRIMARY KEY,
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gene_statements (
+    gene_symbol TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    PRIMARY KEY (gene_symbol, position)
+);
+'''
+
+
+@dataclass
+class StatementStore:
+    """A deduplicated SQLite store of statements and the hashes of the statements for each gene."""
+
+    directory: str
+    database_name: str = 'statements.sqlite'
+
+    path: str = field(init=False)
+
+    def __post_init__(self) -> None:  # noqa: D105
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, self.database_name)
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60)
+
+    def set_gene_statements(self, gene_symbol: str, statements: Iterable[Statement]) -> List[int]:
+        """Store the statements for the gene, replacing the ones it had, and get their hashes.
+
+        Statements that are already stored, e.g., for another gene, get the evidences they didn't have yet.
+        """
+        hashes = []
+        hash_to_statements: Dict[int, List[Statement]] = defaultdict(list)
+        for statement in statements:
+            statement_hash = statement.get_hash()
+            hashes.append(statement_hash)
+            hash_to_statements[statement_hash].append(statement)
+
+        with closing(self._connect()) as connection, connection:
+            # Take the write lock before reading so concurrent writers can't lose each other's evidences
+            connection.execute('BEGIN IMMEDIATE')
+            for statement_hash, new_statements in hash_to_statements.items():
+                row = connection.execute('SELECT value FROM statements WHERE hash = ?', (statement_hash,)).fetchone()
+                if row is None and len(new_statements) == 1:
+                    value = _compress(new_statements[0])
+                else:
+                    # Decompressing makes a copy, so the given statements aren't changed
+                    merged = _decompress(_compress(new_statements[0]) if row is None else row[0])
+                    if not _merge_evidences(merged, new_statements) and row is not None:
+                        continue
+                    value = _compress(merged)
+                connection.execute(
+                    'INSERT OR REPLACE INTO statements (hash, value) VALUES (?, ?)',
+                    (statement_hash, value),
+                )
+            connection.execute('DELETE FROM gene_statements WHERE gene_symbol = ?', (gene_symbol,))
+            connection.executemany(
+                'INSERT INTO gene_statements (gene_symbol, position, hash) VALUES (?, ?, ?)',
+                ((gene_symbol, position, statement_hash) for position, statement_hash in enumerate(hashes)),
+            )
+        return hashes
+
+    def get_gene_hashes(self, gene_symbol: str) -> List[int]:
+        """Get the hashes of the statements for the gene, in the order they were stored."""
+        with closing(self._connect()) as connection:
+            return [
+                statement_hash
+                for statement_hash, in connection.execute(
+                    'SELECT hash FROM gene_statements WHERE gene_symbol = ? ORDER BY position',
+                    (gene_symbol,),
+                )
+            ]
+
+    def get_gene_symbols(self) -> List[str]:
+        """Get the genes that have statements in the store."""
+        with closing(self._connect()) as connection:
+            return [
+                gene_symbol
+                for gene_symbol, in connection.execute('SELECT DISTINCT gene_symbol FROM gene_statements')
+            ]
+
+    def get_statement(self, statement_hash: int) -> Optional[Statement]:
+        """Get the statement with the given hash, or None if it's not stored."""
+        with closing(self._connect()) as connection:
+            row = connection.execute('SELECT value FROM statements WHERE hash = ?', (statement_hash,)).fetchone()
+        return None if row is None else _decompress(row[0])
+
+    def iterate_statements(self, hashes: Iterable[int]) -> Iterable[Statement]:
+        """Lazily load the statements with the given hashes, skipping ones that aren't stored."""
+        with closing(self._connect()) as connection:
+            for statement_hash in hashes:
+                row = connection.execute('SELECT value FROM statements WHERE hash = ?', (statement_hash,)).fetchone()
+                if row is None:
+                    logger.warning('statement %s is not in %s', statement_hash, self.path)
+                    continue
+                yield _decompress(row[0])
+
+    def get_gene_statements(self, gene_symbol: str) -> List[Statement]:
+        """Load the statements for the gene."""
+        return list(self.iterate_statements(self.get_gene_hashes(gene_symbol)))
+
+    def __len__(self) -> int:  # noqa: D105
+        with closing(self._connect()) as connection:
+            number, = connection.execute('SELECT COUNT(*) FROM statements').fetchone()
+        return number
+
+
+def _merge_evidences(statement: Statement, statements: Iterable[Statement]) -> int:
+    """Add the evidences of the statements to the statement, in-place, skipping ones with the same source hash.
+
+    :return: The number of evidences added
+    """
+    source_hashes = {evidence.get_source_hash() for evidence in statement.evidence}
+    number_added = 0
+    for other in statements:
+        for evidence in other.evidence:
+            source_hash = evidence.get_source_hash()
+            if source_hash not in source_hashes:
+                source_hashes.add(source_hash)
+                statement.evidence.append(evidence)
+                number_added += 1
+    return number_added
+
+
+def _compress(statement: Statement) -> bytes:
+    return zlib.compress(json.dumps(statement.to_json()).encode('utf-8'))
+
+
+def _decompress(value: bytes) -> Statement:
+    statements = stmts_from_json([json.loads(zlib.decompress(value).decode('utf-8'))])
+    return statements[0]
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+"""An index of the sub-graphs in which the nodes and edges of a prior knowledge graph participate.
+
+The index is built once per prior, persisted next to the compiled sheets, and invalidated when the prior's
+hash changes. It is used both to assign sub-graphs to the edges from the curation sheets and to summarize
+the enriched graph (the prior joined with the curated graph) without loading the prior or copying it.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from bel_repository import BELRepository
+from pybel import BELGraph
+from pybel.constants import ANNOTATIONS, CITATION, CITATION_AUTHORS, CITATION_DB, CITATION_IDENTIFIER
+from pybel.dsl import BaseEntity
+from .graph_cache import _check_header, _load_pickled_header, get_graph_cache_header
+
+__all__ = [
+    'SubgraphIndex',
+    'get_prior_hash',
+    'to_subgraph_index',
+    'from_subgraph_index',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class EdgeRecord(NamedTuple):
+    """The parts of an edge needed to assign and summarize sub-graphs."""
+
+    source: BaseEntity
+    target: BaseEntity
+    key: Any
+    citation: Optional[Tuple[str, str]]
+    authors: Tuple[str, ...]
+    subgraphs: Tuple[str, ...]
+
+
+def _get_edge_record(u: BaseEntity, v: BaseEntity, k: Any, d: Mapping[str, Any], annotation: str) -> EdgeRecord:
+    citation = d.get(CITATION)
+    return EdgeRecord(
+        source=u,
+        target=v,
+        key=k,
+        citation=None if citation is None else (citation[CITATION_DB], citation[CITATION_IDENTIFIER]),
+        authors=() if citation is None else tuple(citation.get(CITATION_AUTHORS, ())),
+        subgraphs=tuple(d.get(ANNOTATIONS, {}).get(annotation, ())),
+    )
+
+
+@dataclass
+class SubgraphIndex:
+    """The sub-graphs of the nodes and edges in a prior knowledge graph."""
+
+    annotation: str
+    #: The name and version of the prior, which the enriched graph keeps
+    name: Optional[str]
+    version: Optional[str]
+    number_of_warnings: int
+    #: The nodes in the prior, in order
+    nodes: List[BaseEntity]
+    #: The edges in the prior, in order
+    edges: List[EdgeRecord]
+    node_to_subgraphs: Dict[BaseEntity, frozenset] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:  # noqa: D105
+        node_to_subgraphs = defaultdict(set)
+        for edge in self.edges:
+            node_to_subgraphs[edge.source].update(edge.subgraphs)
+            node_to_subgraphs[edge.target].update(edge.subgraphs)
+        self.node_to_subgraphs = {node: frozenset(subgraphs) for node, subgraphs in node_to_subgraphs.items()}
+
+    @classmethod
+    def from_graph(cls, prior: BELGraph, annotation: str = 'Subgraph') -> 'SubgraphIndex':
+        """Build the index of the given prior knowledge graph."""
+        return cls(
+            annotation=annotation,
+            name=prior.name,
+            version=prior.version,
+            number_of_warnings=prior.number_of_warnings(),
+            nodes=list(prior),
+            edges=[
+                _get_edge_record(u, v, k, d, annotation)
+                for u, v, k, d in prior.edges(keys=True, data=True)
+            ],
+        )
+
+    def assign(self, graph: BELGraph) -> None:
+        """Assign the sub-graphs to edges in the graph based on the sub-graphs of their nodes in the prior."""
+        empty = frozenset()
+        for u, v, k, d in graph.edges(keys=True, data=True):
+            if CITATION not in d:  # skip unqualified edges
+                continue
+            d.setdefault(ANNOTATIONS, {})
+            d[ANNOTATIONS][self.annotation] = {
+                subgraph: True
+                for subgraph in self.node_to_subgraphs.get(u, empty) | self.node_to_subgraphs.get(v, empty)
+            }
+
+    def iterate_enriched_edges(self, graph: BELGraph) -> Iterable[EdgeRecord]:
+        """Iterate over the edges of the prior joined with the graph, in the same order as ``prior + graph``.
+
+        Like :func:`pybel.struct.left_full_join`, the prior's edge wins if both graphs have the same edge.
+        """
+        adjacency: Dict[BaseEntity, Dict[BaseEntity, Dict[Any, EdgeRecord]]] = {node: {} for node in self.nodes}
+        for edge in self.edges:
+            adjacency[edge.source].setdefault(edge.target, {})[edge.key] = edge
+
+        for node in graph:
+            adjacency.setdefault(node, {})
+        for u, v, k, d in graph.edges(keys=True, data=True):
+            edges = adjacency[u].setdefault(v, {})
+            if k not in edges:
+                edges[k] = _get_edge_record(u, v, k, d, self.annotation)
+
+        for targets in adjacency.values():
+            for edges in targets.values():
+                yield from edges.values()
+
+    def summary_dict(self, graph: BELGraph) -> Mapping[str, Any]:
+        """Summarize the prior joined with the graph, like :meth:`pybel.BELGraph.summary_dict` on ``prior + graph``."""
+        nodes = set(self.nodes)
+        nodes.update(graph)
+        return _summarize(
+            nodes=nodes,
+            edges=list(self.iterate_enriched_edges(graph)),
+            number_of_warnings=self.number_of_warnings + graph.number_of_warnings(),
+        )
+
+    def summary_str(self, graph: BELGraph) -> str:
+        """Summarize the prior joined with the graph, like :meth:`pybel.BELGraph.summary_str` on ``prior + graph``."""
+        return f'{self.name} v{self.version}\n' + '\n'.join(
+            f'{label}: {value}'
+            for label, value in self.summary_dict(graph).items()
+        )
+
+    def summarize_subgraphs(self, graph: BELGraph) -> Mapping[str, Mapping[str, Any]]:
+        """Summarize each sub-graph of the prior joined with the graph.
+
+        This is the same as calling :meth:`pybel.BELGraph.summary_dict` on each of the sub-graphs from
+        :func:`pybel.struct.get_subgraphs_by_annotation` on ``prior + graph``.
+        """
+        subgraph_edges: Dict[str, List[EdgeRecord]] = defaultdict(list)
+        for edge in self.iterate_enriched_edges(graph):
+            for subgraph in edge.subgraphs:
+                subgraph_edges[subgraph].append(edge)
+
+        return {
+            subgraph: _summarize(
+                nodes={node for edge in edges for node in (edge.source, edge.target)},
+                edges=edges,
+                number_of_warnings=0,
+            )
+            for subgraph, edges in subgraph_edges.items()
+        }
+
+
+def _summarize(nodes: Iterable[BaseEntity], edges: List[EdgeRecord], number_of_warnings: int) -> Mapping[str, Any]:
+    """Summarize a graph from its nodes and edges, like :meth:`pybel.BELGraph.summary_dict`."""
+    # Count the weakly connected components with a union-find
+    parents = {node: node for node in nodes}
+
+    def _find(node):
+        while parents[node] is not node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+        return node
+
+    number_components = len(parents)
+    for edge in edges:
+        source, target = _find(edge.source), _find(edge.target)
+        if source is not target:
+            parents[source] = target
+            number_components -= 1
+
+    number_nodes = len(parents)
+    number_edges = len(edges)
+    density = 0 if number_nodes <= 1 else number_edges / (number_nodes * (number_nodes - 1))
+    return {
+        'Number of Nodes': number_nodes,
+        'Number of Edges': number_edges,
+        'Number of Citations': len({edge.citation for edge in edges if edge.citation is not None}),
+        'Number of Authors': len({author for edge in edges for author in edge.authors}),
+        'Network Density': f'{density:.2E}',
+        'Number of Components': number_components,
+        'Number of Warnings': number_of_warnings,
+    }
+
+
+def get_prior_hash(prior: Union[BELGraph, BELRepository]) -> str:
+    """Hash a prior knowledge graph.
+
+    A repository is hashed from the contents of its BEL documents, so it doesn't have to be compiled.
+    A graph with both a name and a version is hashed from them, since stringifying all of its edges on each
+    compilation is slow. Other graphs are hashed from their nodes and edges.
+    """
+    sha256 = hashlib.sha256()
+    if isinstance(prior, BELGraph) and prior.name and prior.version:
+        sha256.update(f'{prior.name}\t{prior.version}'.encode('utf-8'))
+    elif isinstance(prior, BELRepository):
+        for root, file_name in prior.iterate_bel():
+            path = os.path.join(root, file_name)
+            sha256.update(os.path.relpath(path, prior.directory).encode('utf-8'))
+            with open(path, 'rb') as file:
+                for block in iter(lambda: file.read(1 << 16), b''):
+                    sha256.update(block)
+    elif isinstance(prior, BELGraph):
+        sha256.update(f'{prior.name}\t{prior.version}\t{prior.number_of_warnings()}\n'.encode('utf-8'))
+        for node in prior:
+            sha256.update(f'{node}\n'.encode('utf-8'))
+        for u, v, k, d in prior.edges(keys=True, data=True):
+            sha256.update(f'{u}\t{v}\t{k}\t{sorted(d.get(ANNOTATIONS, {}).items())}\n'.encode('utf-8'))
+    else:
+        raise TypeError(f'wrong type: {prior}')
+    return sha256.hexdigest()
+
+
+def _get_subgraph_index_header(prior_hash: str, annotation: str) -> Mapping[str, Any]:
+    return dict(get_graph_cache_header(), prior=prior_hash, annotation=annotation)
+
+
+def to_subgraph_index(index: SubgraphIndex, path: str, prior_hash: str) -> None:
+    """Write a sub-graph index to a file.
+
+    :param index: A sub-graph index
+    :param path: The path to the file
+    :param prior_hash: The hash of the prior from which the index was built, from :func:`get_prior_hash`
+    """
+    with open(path, 'wb') as file:
+        pickle.dump(_get_subgraph_index_header(prior_hash, index.annotation), file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(index, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def from_subgraph_index(path: str, prior_hash: str, annotation: str = 'Subgraph') -> Optional[SubgraphIndex]:
+    """Read a sub-graph index from a file.
+
+    :param path: The path to the file
+    :param prior_hash: The hash of the current prior, from :func:`get_prior_hash`
+    :param annotation: The annotation holding the sub-graphs
+    :return: The index, or None if the file doesn't exist, was built from another prior, or was written by
+     other versions
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as file:
+        if not _check_header(path, _load_pickled_header(file), _get_subgraph_index_header(prior_hash, annotation)):
+            return None
+        return pickle.load(file)
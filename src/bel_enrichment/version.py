@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+"""Version information for :mod:`bel_enrichment`."""
+
+__all__ = [
+    'VERSION',
+    'get_version',
+]
+
+VERSION = '0.0.6-dev'
+
+
+def get_version() -> str:
+    """Get the :mod:`bel_enrichment` version string."""
+    return VERSION
@@ -2,20 +2,37 @@
 
 """Utilities for INDRA."""
 
+import copy
+import itertools as itt
+import logging
 import os
-import pickle
-from typing import List, Optional, TextIO
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, TextIO
 
+import numpy as np
+from tqdm import tqdm
+
+from indra.ontology.bio import bio_ontology
 from indra.statements import Statement
+from indra.tools.assemble_corpus import run_preassembly
 from pybel import BELGraph
-from .indra_utils import get_and_write_statements_from_agents
-from .ranking import process_rank_genes
+from .cache import StatementCache
+from .indra_utils import (
+    ROW_WRITERS, _merge_statements, get_and_write_statements_from_agents, get_statements_from_agents,
+    prefilter_statements, print_statements,
+)
+from .journal import RunJournal, STATUS_DONE, atomic_write
+from .ranking import RankTable
+from .store import StatementStore
 
 __all__ = [
     'export_separate',
     'export_single',
 ]
 
+logger = logging.getLogger(__name__)
+
 
 def export_separate(
     graph: BELGraph,
@@ -25,33 +42,294 @@ def export_separate(
     sep: str = '\t',
     limit: Optional[int] = None,
     duplicates: bool = False,
-):
-    """Get genes from the graph and export in separate folders."""
+    cache: Optional[StatementCache] = None,
+    concurrency: int = 1,
+    use_tqdm: bool = True,
+    preassemble_corpus: bool = False,
+    number: Optional[int] = None,
+    overwrite: bool = False,
+    fmt: str = 'tsv',
+) -> RunJournal:
+    """Get genes from the graph and export in separate folders.
+
+    The status of each gene is kept in a :class:`RunJournal` in the directory. A gene's files are written
+    to temporary files then moved into place, so a crash never leaves half-written files behind. Genes that
+    fail are logged and marked as failed in the journal and the rest of the genes are still exported.
+
+    The statements for all genes are kept once in a shared :class:`StatementStore` in the directory, in which
+    each gene has the list of the hashes of its statements.
+
+    :param number: The maximum number of the highest ranked genes to export. If none, exports all of them.
+    :param concurrency: The maximum number of genes whose statements are fetched and written at the same time
+    :param use_tqdm: Should a progress bar be shown?
+    :param preassemble_corpus: If true, fetches the statements for all genes first then runs INDRA's
+     preassembly once over their union instead of once for each gene. Neighboring genes share many
+     statements, so this saves a lot of repeated work.
+    :param overwrite: If true, exports all genes again. Otherwise, skips the genes whose sheet already exists,
+     unless the journal has them as failed or still running from a previous run.
+    :param fmt: The format of the sheets, one of the keys of :data:`bel_enrichment.indra_utils.ROW_WRITERS`.
+     Sheets are named like ``{gene}.bel.{fmt}``. XLSX sheets have the columns for curation but aren't named
+     like the ``{gene}_curation.xlsx`` sheets that are compiled, so exporting again never replaces curated sheets.
+    :return: The journal of the run
+    """
     gene_symbols = get_gene_symbols(
         graph=graph,
         cutoff=minimum_information_density,
+        number=number,
     )
 
+    journal = RunJournal(directory)
+    store = StatementStore(directory)
+    if overwrite:
+        remaining_gene_symbols = gene_symbols
+    else:
+        unfinished = journal.get_unfinished()
+        remaining_gene_symbols = [
+            gene_symbol
+            for gene_symbol in gene_symbols
+            if gene_symbol in unfinished or not os.path.exists(_get_sheet_path(directory, gene_symbol, fmt))
+        ]
+    logger.info(
+        'exporting %d genes (%d already done) with concurrency %d',
+        len(remaining_gene_symbols), len(gene_symbols) - len(remaining_gene_symbols), concurrency,
+    )
+
+    if preassemble_corpus:
+        _export_separate_corpus(
+            gene_symbols=remaining_gene_symbols,
+            directory=directory,
+            journal=journal,
+            store=store,
+            minimum_belief=minimum_belief,
+            sep=sep,
+            fmt=fmt,
+            limit=limit,
+            duplicates=duplicates,
+            cache=cache,
+            concurrency=concurrency,
+            use_tqdm=use_tqdm,
+        )
+    else:
+        if remaining_gene_symbols:
+            _initialize_ontology()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(
+                    _export_gene,
+                    gene_symbol=gene_symbol,
+                    directory=directory,
+                    journal=journal,
+                    store=store,
+                    minimum_belief=minimum_belief,
+                    sep=sep,
+                    fmt=fmt,
+                    limit=limit,
+                    duplicates=duplicates,
+                    cache=cache,
+                )
+                for gene_symbol in remaining_gene_symbols
+            ]
+            it = as_completed(futures)
+            if use_tqdm:
+                it = tqdm(it, total=len(futures), desc=f'Exporting to {directory}', unit='gene')
+            for future in it:
+                future.result()
+
+    statuses = journal.get_statuses()
+    number_failed = sum(statuses.get(gene_symbol) != STATUS_DONE for gene_symbol in remaining_gene_symbols)
+    if number_failed:
+        logger.warning('%d of %d genes failed. Run again to retry them.', number_failed, len(gene_symbols))
+
+    return journal
+
+
+def _initialize_ontology() -> None:
+    """Load INDRA's bio ontology in this thread before the genes are preassembled in several threads.
+
+    Preassembly loads the ontology lazily and without a lock, so otherwise each thread would load it, or on a
+    cold start build it and write its cache file, at the same time.
+    """
+    if not bio_ontology._initialized:
+        bio_ontology.initialize()
+
+
+def _get_sheet_path(directory: str, gene_symbol: str, fmt: str) -> str:
+    return os.path.join(directory, gene_symbol, f'{gene_symbol}.bel.{fmt}')
+
+
+def _export_gene(
+    gene_symbol: str,
+    directory: str,
+    journal: RunJournal,
+    store: StatementStore,
+    minimum_belief: float,
+    sep: str,
+    fmt: str,
+    limit: Optional[int],
+    duplicates: bool,
+    cache: Optional[StatementCache],
+) -> None:
+    """Get statements for the gene and write them to its own folder."""
+    journal.start(gene_symbol)
+    try:
+        statements = get_statements_from_agents([gene_symbol], cache=cache)
+        number_rows = _write_gene(
+            gene_symbol=gene_symbol,
+            directory=directory,
+            store=store,
+            statements=statements,
+            preassembled_statements=None,
+            minimum_belief=minimum_belief,
+            sep=sep,
+            fmt=fmt,
+            limit=limit,
+            duplicates=duplicates,
+        )
+    except Exception as exc:
+        logger.exception('failed to export %s', gene_symbol)
+        journal.fail(gene_symbol, f'{exc.__class__.__name__}: {exc}')
+    else:
+        journal.finish(gene_symbol, number_statements=len(statements), number_rows=number_rows)
+
+
+def _write_gene(
+    gene_symbol: str,
+    directory: str,
+    store: StatementStore,
+    statements: List[Statement],
+    preassembled_statements: Optional[List[Statement]],
+    minimum_belief: float,
+    sep: str,
+    fmt: str,
+    limit: Optional[int],
+    duplicates: bool,
+) -> int:
+    """Write the curation sheet for the gene to its own folder and its statements to the store.
+
+    :param statements: The statements from INDRA about the gene
+    :param preassembled_statements: The statements about the gene that were already preassembled with
+     the rest of the corpus. If none, preassembles the statements.
+    :return: The number of rows in the curation sheet
+    """
+    gene_directory = os.path.join(directory, gene_symbol)
+    os.makedirs(gene_directory, exist_ok=True)
+    sheet_path = _get_sheet_path(directory, gene_symbol, fmt)
+
+    with atomic_write(sheet_path, mode='wb' if ROW_WRITERS[fmt].binary else 'w') as sheet_file:
+        number_rows = print_statements(
+            statements if preassembled_statements is None else preassembled_statements,
+            file=sheet_file,
+            fmt=fmt,
+            sep=sep,
+            limit=limit,
+            allow_duplicates=duplicates,
+            minimum_belief=minimum_belief,
+            preassemble=preassembled_statements is None,
+        )
+        if not number_rows:  # still write the header so the sheet can be read
+            with ROW_WRITERS[fmt](sheet_file, sep=sep):
+                pass
+    store.set_gene_statements(gene_symbol, statements)
+
+    return number_rows
+
+
+def _export_separate_corpus(
+    gene_symbols: List[str],
+    directory: str,
+    journal: RunJournal,
+    store: StatementStore,
+    minimum_belief: float,
+    sep: str,
+    fmt: str,
+    limit: Optional[int],
+    duplicates: bool,
+    cache: Optional[StatementCache],
+    concurrency: int,
+    use_tqdm: bool,
+) -> None:
+    """Fetch statements for all genes, preassemble their union once, then write a sheet for each gene."""
+    for gene_symbol in gene_symbols:
+        journal.start(gene_symbol)
+
+    gene_to_statements: Dict[str, List[Statement]] = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        future_to_gene_symbol = {
+            executor.submit(get_statements_from_agents, [gene_symbol], cache=cache): gene_symbol
+            for gene_symbol in gene_symbols
+        }
+        it = as_completed(future_to_gene_symbol)
+        if use_tqdm:
+            it = tqdm(it, total=len(future_to_gene_symbol), desc='Fetching statements', unit='gene')
+        for future in it:
+            gene_symbol = future_to_gene_symbol[future]
+            try:
+                gene_to_statements[gene_symbol] = future.result()
+            except Exception as exc:
+                logger.exception('failed to fetch statements for %s', gene_symbol)
+                journal.fail(gene_symbol, f'{exc.__class__.__name__}: {exc}')
+
+    gene_symbols = [gene_symbol for gene_symbol in gene_symbols if gene_symbol in gene_to_statements]
+    statements = _deduplicate_statements(itt.chain.from_iterable(
+        gene_to_statements[gene_symbol]
+        for gene_symbol in gene_symbols
+    ))
+    statements = prefilter_statements(statements)
+    logger.info('preassembling %d unique statements for %d genes', len(statements), len(gene_symbols))
+    statements = run_preassembly(statements)
+
+    # Evidence filtering in print_statements is done in-place on these shared statements, but it's
+    # idempotent so it doesn't matter which gene's sheet gets written first.
+    gene_to_preassembled_statements = defaultdict(list)
+    gene_symbol_set = set(gene_symbols)
+    for statement in statements:
+        names = {agent.name for agent in statement.agent_list() if agent is not None}
+        for gene_symbol in names & gene_symbol_set:
+            gene_to_preassembled_statements[gene_symbol].append(statement)
+
+    if use_tqdm:
+        gene_symbols = tqdm(gene_symbols, desc=f'Exporting to {directory}', unit='gene')
     for gene_symbol in gene_symbols:
-        gene_directory = os.path.join(directory, gene_symbol)
-        os.makedirs(gene_directory, exist_ok=True)
-        tsv_path = os.path.join(gene_directory, f'{gene_symbol}.bel.tsv')
-        pickle_path = os.path.join(gene_directory, f'{gene_symbol}_statements.pkl')
-
-        if os.path.exists(tsv_path):
-            continue  # already downloaded
-
-        with open(tsv_path, 'w') as csv_file:
-            statements = get_and_write_statements_from_agents(
-                agents=gene_symbol,
-                file=csv_file,
+        try:
+            number_rows = _write_gene(
+                gene_symbol=gene_symbol,
+                directory=directory,
+                store=store,
+                statements=gene_to_statements[gene_symbol],
+                preassembled_statements=gene_to_preassembled_statements[gene_symbol],
+                minimum_belief=minimum_belief,
                 sep=sep,
+                fmt=fmt,
                 limit=limit,
-                allow_duplicates=duplicates,
-                minimum_belief=minimum_belief,
+                duplicates=duplicates,
+            )
+        except Exception as exc:
+            logger.exception('failed to export %s', gene_symbol)
+            journal.fail(gene_symbol, f'{exc.__class__.__name__}: {exc}')
+        else:
+            journal.finish(
+                gene_symbol,
+                number_statements=len(gene_to_statements[gene_symbol]),
+                number_rows=number_rows,
             )
-        with open(pickle_path, 'wb') as pkl_file:
-            pickle.dump(statements, pkl_file)
+
+
+def _deduplicate_statements(statements: Iterable[Statement]) -> List[Statement]:
+    """Keep the first of each statement with the same hash, with the evidences of all of them.
+
+    The evidences are merged into copies, so the statements each gene got from INDRA aren't changed before
+    they're put in the store.
+    """
+    hash_to_statement: Dict[int, Statement] = {}
+    _merge_statements(hash_to_statement, map(_copy_statement, statements))
+    return list(hash_to_statement.values())
+
+
+def _copy_statement(statement: Statement) -> Statement:
+    """Copy the statement and its list of evidences, but not the evidences nor the agents themselves."""
+    rv = copy.copy(statement)
+    rv.evidence = list(statement.evidence)
+    return rv
 
 
 def export_single(
@@ -60,7 +338,8 @@ def export_single(
     file: Optional[TextIO] = None,
     sep: str = '\t',
     limit: Optional[int] = None,
-    duplicates: bool = False
+    duplicates: bool = False,
+    cache: Optional[StatementCache] = None,
 ) -> List[Statement]:
     """Get genes from the graph and export as one file."""
     gene_symbols = get_gene_symbols(graph=graph, cutoff=cutoff)
@@ -71,15 +350,19 @@ def export_single(
         sep=sep,
         limit=limit,
         allow_duplicates=duplicates,
+        cache=cache,
     )
 
 
-def get_gene_symbols(graph: BELGraph, cutoff: float = 1.0):
-    """Get HGNC gene symbols having above a given cutoff."""
-    gene_map = process_rank_genes(graph)
+def get_gene_symbols(graph: BELGraph, cutoff: float = 1.0, number: Optional[int] = None) -> List[str]:
+    """Get HGNC gene symbols having above a given cutoff.
+
+    :param number: The maximum number of the highest ranked gene symbols to get. If none, gets all of them.
+    """
+    rank_table = RankTable.from_graph(graph)
+    mask = (np.char.lower(rank_table.namespaces) == 'hgnc') | (cutoff < rank_table.ranks)
 
     return [
         name
-        for (namespace, name), rank in gene_map.most_common()
-        if namespace.lower() == 'hgnc' or cutoff < rank
+        for _, name, _ in rank_table.iterate(number=number, mask=mask)
     ]
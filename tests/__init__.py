@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`bel_enrichment`."""
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the cache of INDRA DB REST responses."""
+
+import tempfile
+import unittest
+from contextlib import closing
+from typing import List, NamedTuple, Tuple
+from unittest import mock
+
+from bel_enrichment.cache import CacheMissError, StatementCache
+from indra.statements import Activation, Agent, Evidence, Statement
+
+
+def _make_statements(subject: str, number_evidences: int = 1) -> List[Statement]:
+    return [
+        Activation(
+            Agent(subject, db_refs={'HGNC': '1'}),
+            Agent('MAPT', db_refs={'HGNC': '6893'}),
+            evidence=[
+                Evidence(source_api='reach', pmid=str(1000 + i), text=f'{subject} activates MAPT in sentence {i}.')
+                for i in range(number_evidences)
+            ],
+        ),
+    ]
+
+
+class _Processor(NamedTuple):
+    statements: List[Statement]
+
+
+class StubClient:
+    """A stand-in for :mod:`indra.sources.indra_db_rest` that counts its queries."""
+
+    def __init__(self):
+        """Start without any queries."""
+        self.agent_queries: List[List[str]] = []
+        self.paper_queries: List[List[Tuple[str, str]]] = []
+
+    def get_statements(self, agents: List[str]) -> _Processor:
+        """Make a statement about the first agent."""
+        self.agent_queries.append(agents)
+        return _Processor(_make_statements(agents[0]))
+
+    def get_statements_for_paper(self, ids: List[Tuple[str, str]], simple_response: bool) -> List[Statement]:
+        """Make a statement about the first paper's identifier."""
+        assert simple_response
+        self.paper_queries.append(ids)
+        return _make_statements(ids[0][1])
+
+
+class Clock:
+    """A clock that only moves when it's told to, to replace :func:`time.time`."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        """Start the clock at the given time."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Get the time."""
+        return self.now
+
+
+class TestStatementCache(unittest.TestCase):
+    """Tests for :class:`StatementCache`."""
+
+    def setUp(self):
+        """Make a temporary directory, a stub client, and a clock."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = StubClient()
+        self.clock = Clock()
+        patcher = mock.patch('time.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def _get_cache(self, **kwargs) -> StatementCache:
+        return StatementCache(directory=self.directory.name, client=self.client, **kwargs)
+
+    def test_hit(self):
+        """Test that a second query for the same agents is served from the cache."""
+        cache = self._get_cache()
+        statements = cache.get_statements(['GSK3B'])
+        self.assertEqual([['GSK3B']], self.client.agent_queries)
+
+        cached_statements = cache.get_statements(['GSK3B'])
+        self.assertEqual([['GSK3B']], self.client.agent_queries)
+        self.assertEqual(
+            [statement.get_hash() for statement in statements],
+            [statement.get_hash() for statement in cached_statements],
+        )
+        self.assertEqual(
+            [evidence.pmid for evidence in statements[0].evidence],
+            [evidence.pmid for evidence in cached_statements[0].evidence],
+        )
+
+    def test_hit_is_persistent(self):
+        """Test that a new cache in the same directory is served from the responses of the old one."""
+        self._get_cache().get_statements_for_paper([('pmid', '123')])
+        self._get_cache().get_statements_for_paper([('pmid', '123')])
+        self.assertEqual([[('pmid', '123')]], self.client.paper_queries)
+
+    def test_key_ignores_order(self):
+        """Test that the same agents in another order are a hit."""
+        cache = self._get_cache()
+        cache.get_statements(['GSK3B', 'APP'])
+        cache.get_statements(['APP', 'GSK3B'])
+        self.assertEqual([['APP', 'GSK3B']], self.client.agent_queries)
+
+    def test_ttl(self):
+        """Test that responses older than the time to live are fetched again."""
+        cache = self._get_cache(ttl=60)
+        cache.get_statements(['GSK3B'])
+
+        self.clock.now += 30
+        cache.get_statements(['GSK3B'])
+        self.assertEqual(1, len(self.client.agent_queries))
+
+        self.clock.now += 31  # the response was made 61 seconds ago
+        cache.get_statements(['GSK3B'])
+        self.assertEqual(2, len(self.client.agent_queries))
+
+        self.clock.now += 30  # the refreshed response is only 30 seconds old
+        cache.get_statements(['GSK3B'])
+        self.assertEqual(2, len(self.client.agent_queries))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used responses are evicted when the cache is bigger than its maximum size."""
+        cache = self._get_cache()
+        cache.get_statements(['GSK3B'])
+        size = _get_total_size(cache)
+
+        # Enough room for two responses, but not three
+        cache = self._get_cache(max_size=int(2.5 * size))
+        self.clock.now += 1
+        cache.get_statements(['APP'])
+        self.assertEqual(2, len(self.client.agent_queries))
+
+        # GSK3B was the least recently used, but using it again makes APP the least recently used
+        self.clock.now += 1
+        cache.get_statements(['GSK3B'])
+        self.assertEqual(2, len(self.client.agent_queries))
+
+        self.clock.now += 1
+        cache.get_statements(['PSEN1'])
+        self.assertEqual(3, len(self.client.agent_queries))
+        self.assertLessEqual(_get_total_size(cache), cache.max_size)
+
+        for agent in ('GSK3B', 'PSEN1'):
+            self.clock.now += 1
+            cache.get_statements([agent])
+        self.assertEqual(3, len(self.client.agent_queries), msg='a recently used response was evicted')
+
+        cache.get_statements(['APP'])
+        self.assertEqual(4, len(self.client.agent_queries), msg='the least recently used response was not evicted')
+
+    def test_offline_miss(self):
+        """Test that a miss in an offline cache raises an error without querying the client."""
+        cache = self._get_cache(offline=True)
+        with self.assertRaises(CacheMissError):
+            cache.get_statements(['GSK3B'])
+        with self.assertRaises(LookupError):
+            cache.get_statements_for_paper([('pmid', '123')])
+        self.assertEqual([], self.client.agent_queries)
+        self.assertEqual([], self.client.paper_queries)
+
+    def test_offline_serves_expired(self):
+        """Test that an offline cache serves expired responses, since it can't refresh them."""
+        self._get_cache().get_statements(['GSK3B'])
+        self.clock.now += 3600
+
+        statements = self._get_cache(ttl=60, offline=True).get_statements(['GSK3B'])
+        self.assertEqual(1, len(statements))
+        self.assertEqual(1, len(self.client.agent_queries))
+
+
+def _get_total_size(cache: StatementCache) -> int:
+    with closing(cache._connect()) as connection:
+        total, = connection.execute('SELECT SUM(size) FROM responses').fetchone()
+    return total
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the utilities for INDRA."""
+
+import copy
+import itertools as itt
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Set, Tuple
+from unittest import mock
+
+from bel_enrichment.filters import DEFAULT_ROW_FILTER
+from bel_enrichment.indra_utils import Row, XLSXWriter, get_rows_from_statements, prefilter_statements
+from bel_enrichment.readers import read_sheet
+from indra.ontology.ontology_graph import IndraOntology
+from indra.statements import (
+    Activation, ActiveForm, Agent, Evidence, IncreaseAmount, ModCondition, Phosphorylation, Statement,
+)
+from indra.tools.assemble_corpus import run_preassembly
+
+
+class TinyOntology(IndraOntology):
+    """A stand-in for INDRA's bio ontology in which ERK is a family with MAPK1 and MAPK3."""
+
+    name = 'tiny'
+    version = '0'
+
+    def initialize(self):
+        """Add the nodes and the isa edges."""
+        for node in ['FPLX:ERK', 'HGNC:6871', 'HGNC:6877', 'FPLX:AKT', 'HGNC:391', 'HGNC:11998']:
+            self.add_node(node, name=node)
+        for child, parent in [('HGNC:6871', 'FPLX:ERK'), ('HGNC:6877', 'FPLX:ERK'), ('HGNC:391', 'FPLX:AKT')]:
+            self.add_edge(child, parent, type='isa')
+        self._initialized = True
+
+
+ERK = Agent('ERK', db_refs={'FPLX': 'ERK'})
+MAPK1 = Agent('MAPK1', db_refs={'HGNC': '6871'})
+AKT = Agent('AKT', db_refs={'FPLX': 'AKT'})
+AKT1 = Agent('AKT1', db_refs={'HGNC': '391'})
+TP53 = Agent('TP53', db_refs={'HGNC': '11998'})
+
+
+def _evidence(source_api: str, pmid, text) -> Evidence:
+    return Evidence(source_api=source_api, pmid=pmid, text=text)
+
+
+RowKey = Tuple[int, float, Tuple[int, ...]]
+
+
+def _get_rows(statements: Iterable[Statement]) -> Set[RowKey]:
+    """Get the hash, belief, and usable evidences of each preassembled statement that would be written as rows.
+
+    Preassembly merges duplicates in any order, so statements are compared by their matches hash and the
+    evidences are sorted.
+    """
+    rv = set()
+    for statement in statements:
+        evidences = DEFAULT_ROW_FILTER.filter_evidences(statement.evidence)
+        if evidences:
+            rv.add((
+                statement.get_hash(shallow=True),
+                round(statement.belief, 6),
+                tuple(sorted(evidence.get_source_hash() for evidence in evidences)),
+            ))
+    return rv
+
+
+class TestPrefilterStatements(unittest.TestCase):
+    """Tests for :func:`prefilter_statements`."""
+
+    def setUp(self):
+        """Make two groups of duplicates, a general one with usable evidences and a specific one without."""
+        self.ontology = TinyOntology()
+        self.general = [
+            Phosphorylation(ERK, TP53, evidence=[_evidence('reach', '1', 'ERK phosphorylates TP53.')]),
+            Phosphorylation(ERK, TP53, evidence=[_evidence('sparser', '2', 'TP53 is phosphorylated by ERK.')]),
+        ]
+        # This refines the general statement, so it supports it and changes its belief, but has no usable evidence
+        self.specific = [
+            Phosphorylation(MAPK1, TP53, evidence=[_evidence('signor', '3', 'MAPK1 phosphorylates TP53.')]),
+            Phosphorylation(MAPK1, TP53, evidence=[_evidence('reach', None, 'MAPK1 phosphorylates TP53.')]),
+        ]
+        self.usable = [
+            Activation(AKT1, TP53, evidence=[_evidence('reach', '4', 'AKT1 activates TP53.')]),
+        ]
+        # This isn't related to any statement with usable evidence
+        self.unusable = [
+            Activation(AKT, TP53, evidence=[_evidence('bel', '5', 'AKT activates TP53.')]),
+            Activation(ERK, AKT, evidence=[_evidence('reach', '6', 'No evidence text.')]),
+        ]
+        self.statements = [*self.general, *self.usable, *self.specific, *self.unusable]
+
+    def _preassemble(self, statements: List[Statement]) -> List[Statement]:
+        return run_preassembly(copy.deepcopy(statements), ontology=self.ontology)
+
+    def test_protect_related(self):
+        """Test that duplicates and refinements of usable statements are kept, so the rows stay the same."""
+        kept = prefilter_statements(self.statements, ontology=self.ontology)
+        self.assertEqual([*self.general, *self.usable, *self.specific], kept)
+        self.assertEqual(_get_rows(self._preassemble(self.statements)), _get_rows(self._preassemble(kept)))
+
+    def test_without_protection(self):
+        """Test that dropping the unusable refinement changes the belief of the general statement."""
+        kept = prefilter_statements(self.statements, ontology=self.ontology, protect_related=False)
+        self.assertEqual([*self.general, *self.usable], kept)
+        self.assertNotEqual(_get_rows(self._preassemble(self.statements)), _get_rows(self._preassemble(kept)))
+
+    def test_keep_only_pmids(self):
+        """Test that only evidences from the given PMIDs are usable."""
+        kept = prefilter_statements(self.statements, keep_only_pmids='4', ontology=self.ontology)
+        self.assertEqual(self.usable, kept)
+
+    def test_statements_not_modified(self):
+        """Test that the statements and their evidences aren't modified."""
+        evidences = [list(statement.evidence) for statement in self.statements]
+        prefilter_statements(self.statements, ontology=self.ontology)
+        self.assertEqual(evidences, [statement.evidence for statement in self.statements])
+
+
+ELK1 = Agent('ELK1', db_refs={'HGNC': '3321'})
+FOS = Agent('FOS', db_refs={'HGNC': '3796'})
+
+
+class TestGetRowsFromStatements(unittest.TestCase):
+    """Tests for :func:`get_rows_from_statements`."""
+
+    def setUp(self):
+        """Make statements whose nodes are shared, so assembling them together orders the nodes differently."""
+        self.statements = [
+            Phosphorylation(MAPK1, ELK1, 'S', '383', evidence=[
+                _evidence('reach', '1', 'MAPK1 phosphorylates ELK1 at S383.'),
+                _evidence('sparser', '2', 'ELK1 is phosphorylated by MAPK1 at S383.'),
+            ]),
+            IncreaseAmount(ELK1, FOS, evidence=[_evidence('reach', '3', 'ELK1 increases the amount of FOS.')]),
+            # One edge for each modification, from nodes in a different order than the first statement added them
+            ActiveForm(
+                Agent('ELK1', db_refs=ELK1.db_refs, mods=[
+                    ModCondition('phosphorylation', 'S', '389'),
+                    ModCondition('phosphorylation', 'S', '383'),
+                ]),
+                'transcription',
+                True,
+                evidence=[
+                    _evidence('reach', '3', 'ELK1 phosphorylated at S389 and S383 is active.'),
+                    _evidence('reach', '4', 'Phosphorylation of ELK1 activates it.'),
+                ],
+            ),
+            Activation(ELK1, FOS, evidence=[_evidence('reach', '3', 'ELK1 activates FOS.')]),
+        ]
+
+    def _get_rows(self, **kwargs):
+        return list(get_rows_from_statements(copy.deepcopy(self.statements), **kwargs))
+
+    def test_batches(self):
+        """Test that the rows from batches of statements are the same and in the same order as from each one."""
+        for allow_duplicates in (False, True):
+            expected = self._get_rows(batch_size=None, allow_duplicates=allow_duplicates)
+            self.assertLess(len(self.statements), len(expected))
+            for batch_size in (1, 2, 3, 100):
+                with self.subTest(allow_duplicates=allow_duplicates, batch_size=batch_size):
+                    self.assertEqual(
+                        expected,
+                        self._get_rows(batch_size=batch_size, allow_duplicates=allow_duplicates),
+                    )
+
+    def test_workers(self):
+        """Test that the rows generated in a process pool are the same and in the same order as in this process."""
+        for batch_size in (1, 3):
+            with self.subTest(batch_size=batch_size):
+                expected = self._get_rows(batch_size=batch_size)
+                self.assertEqual(expected, self._get_rows(batch_size=batch_size, workers=2))
+
+    def test_workers_stop_early(self):
+        """Test that only a few chunks are submitted ahead, and that none are submitted after stopping early."""
+        executors = []
+
+        class _Executor(ThreadPoolExecutor):
+            """A stand-in for the process pool that keeps its futures."""
+
+            def __init__(self, max_workers):  # noqa: D107
+                super().__init__(max_workers=max_workers)
+                self.futures = []
+                executors.append(self)
+
+            def submit(self, *args, **kwargs):  # noqa: D102
+                future = super().submit(*args, **kwargs)
+                self.futures.append(future)
+                return future
+
+        statements = [
+            copy.deepcopy(statement)
+            for statement in itt.chain.from_iterable(itt.repeat(self.statements, 5))
+        ]
+        with mock.patch('bel_enrichment.indra_utils.ProcessPoolExecutor', _Executor):
+            rows = get_rows_from_statements(statements, batch_size=1, workers=2)
+            self.assertEqual(self._get_rows(batch_size=1)[0], next(rows))
+            rows.close()
+
+        executor, = executors
+        self.assertEqual(4, len(executor.futures))
+        self.assertTrue(all(future.done() for future in executor.futures))
+
+
+class TestXLSXWriter(unittest.TestCase):
+    """Tests for :class:`XLSXWriter`."""
+
+    def test_illegal_characters(self):
+        """Test that control characters that can't be written to Excel are removed."""
+        rows = [
+            Row(uuid='uuid-1', statement_hash=1, evidence_hash=2, api='reach', belief=0.5, pmid='123',
+                evidence='MAPT\x0b is \x1fphosphorylated.\x00', bel_subject='p(HGNC:MAPT)',
+                bel_relation='increases', bel_object='p(HGNC:GSK3B)'),
+            Row(uuid='uuid-2', statement_hash=3, evidence_hash=4, api='sparser', belief=0.25, pmid='456',
+                evidence='MAPT is\tphosphorylated.', bel_subject='p(HGNC:MAPT)',
+                bel_relation='increases', bel_object='p(HGNC:GSK3B)'),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'MAPT.bel.xlsx')
+            with XLSXWriter(path) as writer:
+                writer.write(rows)
+            df = read_sheet(path)
+
+        self.assertEqual(2, writer.number_rows)
+        self.assertEqual(['MAPT is phosphorylated.', 'MAPT is\tphosphorylated.'], df['Evidence'].tolist())
+        self.assertEqual(['uuid-1', 'uuid-2'], df['UUID'].tolist())
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for ranking genes."""
+
+import collections
+import os
+import random
+import tempfile
+import unittest
+from typing import List, Tuple
+
+import pybel.examples
+from bel_enrichment.ranking import (
+    GeneRanker, RankTable, process_graph, process_rank_genes, rank_genes, stream_rank_genes,
+)
+from pybel import BELGraph
+from pybel.constants import HAS_VARIANT, RELATION, UNQUALIFIED_EDGES
+from pybel.dsl import (
+    Abundance, BaseEntity, BiologicalProcess, ComplexAbundance, Gene, GeneModification, Hgvs, MicroRna, Pathology,
+    Protein, ProteinModification, Rna,
+)
+
+EXAMPLE_GRAPHS = [
+    pybel.examples.ampk_graph,
+    pybel.examples.braf_graph,
+    pybel.examples.egf_graph,
+    pybel.examples.homology_graph,
+    pybel.examples.ras_tloc_graph,
+    pybel.examples.sialic_acid_graph,
+    pybel.examples.statin_graph,
+    pybel.examples.vegf_graph,
+]
+
+RELATIONS = ['increases', 'decreases', 'directlyIncreases', 'association', 'positiveCorrelation']
+
+
+def _make_node(rng: random.Random, names: List[str]) -> BaseEntity:
+    name = rng.choice(names)
+    return rng.choice([
+        Protein('HGNC', name),
+        Protein('HGNC', name, variants=[ProteinModification('Ph', code='Ser', position=rng.randint(1, 3))]),
+        Rna('HGNC', name),
+        Rna('HGNC', name, variants=[Hgvs('c.1A>G')]),
+        MicroRna('HGNC', name),
+        Gene('HGNC', name),
+        Gene('HGNC', name),
+        Gene('HGNC', name, variants=[GeneModification('Me')]),
+        Protein('MGI', name),
+        Abundance('CHEBI', rng.choice('abc')),
+        BiologicalProcess('GO', rng.choice('abc')),
+        Pathology('MESH', rng.choice('abc')),
+        ComplexAbundance([Protein('HGNC', rng.choice(names)), Protein('HGNC', rng.choice(names))]),
+    ])
+
+
+def make_graph(number_edges: int, seed: int) -> BELGraph:
+    """Make a graph with variants, miRNAs, gene-to-gene edges, and nodes that processing removes.
+
+    There are few names and citations, so many genes are tied and many edges are collapsed together.
+    """
+    rng = random.Random(seed)
+    names = [f'G{i}' for i in range(max(2, number_edges // 6))]
+    graph = BELGraph()
+    for _ in range(number_edges):
+        graph.add_qualified_edge(
+            _make_node(rng, names),
+            _make_node(rng, names),
+            relation=rng.choice(RELATIONS),
+            citation=str(rng.randint(1, 5)),
+            evidence=rng.choice('xy'),
+        )
+    for _ in range(3):
+        graph.add_node_from_data(_make_node(rng, names))
+    return graph
+
+
+def _rank_baseline(graph: BELGraph) -> List[Tuple[Tuple[str, str], float]]:
+    return list(rank_genes(process_graph(graph)).items())
+
+
+class TestStreamRankGenes(unittest.TestCase):
+    """Tests that :func:`stream_rank_genes` gives the same ranks as processing the graph, in the same order."""
+
+    def assert_same_ranks(self, graph: BELGraph) -> None:
+        """Assert the ranks and their order are the same, so ties come out of most_common in the same order."""
+        expected = _rank_baseline(graph)
+        self.assertEqual(expected, list(stream_rank_genes(graph).items()))
+        self.assertEqual(expected, list(process_rank_genes(graph).items()))
+
+    def test_examples(self):
+        """Test the example graphs from PyBEL."""
+        for graph in EXAMPLE_GRAPHS:
+            with self.subTest(name=graph.name):
+                self.assert_same_ranks(graph)
+
+    def test_gene_to_gene(self):
+        """Test edges between genes, which are kept as they are."""
+        graph = BELGraph()
+        graph.add_increases(Gene('HGNC', 'A'), Gene('HGNC', 'B'), citation='1', evidence='x')
+        graph.add_increases(Gene('HGNC', 'B'), Gene('HGNC', 'C'), citation='1', evidence='x')
+        graph.add_increases(Protein('HGNC', 'A'), Protein('HGNC', 'B'), citation='1', evidence='x')
+        graph.add_association(Gene('HGNC', 'C'), Gene('HGNC', 'D'), citation='1', evidence='x')
+        self.assert_same_ranks(graph)
+
+    def test_variants_and_mirnas(self):
+        """Test that variants collapse to their parents and miRNAs collapse to their genes."""
+        graph = BELGraph()
+        mirna = MicroRna('HGNC', 'MIR1')
+        phosphorylated = Protein('HGNC', 'A', variants=[ProteinModification('Ph')])
+        graph.add_decreases(mirna, Rna('HGNC', 'A'), citation='1', evidence='x')
+        graph.add_increases(phosphorylated, Protein('HGNC', 'B'), citation='1', evidence='x')
+        graph.add_increases(Protein('HGNC', 'A'), Protein('HGNC', 'B'), citation='1', evidence='x')
+        graph.add_increases(phosphorylated, BiologicalProcess('GO', 'apoptosis'), citation='1', evidence='x')
+        self.assert_same_ranks(graph)
+
+    def test_random(self):
+        """Test random graphs with many ties and collapsed edges."""
+        for seed in range(25):
+            with self.subTest(seed=seed):
+                self.assert_same_ranks(make_graph(random.Random(seed).randint(5, 150), seed))
+
+
+class TestGeneRanker(unittest.TestCase):
+    """Tests that updating a :class:`GeneRanker` gives the same ranks as ranking the changed graph again."""
+
+    def test_from_graph(self):
+        """Test that a new ranker gives the same ranks as processing the graph, in the same order."""
+        for seed in range(10):
+            graph = make_graph(100, seed)
+            with self.subTest(seed=seed):
+                self.assertEqual(_rank_baseline(graph), list(GeneRanker.from_graph(graph).rank().items()))
+
+    def test_add_edges(self):
+        """Test adding the edges of a graph to a ranker of part of it."""
+        for seed in range(10):
+            graph = make_graph(100, seed)
+            edges = list(graph.edges(keys=True, data=True))
+            rng = random.Random(seed)
+            added = rng.sample([edge for edge in edges if edge[3][RELATION] not in UNQUALIFIED_EDGES], 30)
+            part = graph.copy()
+            part.remove_edges_from([(u, v, key) for u, v, key, _ in added])
+
+            ranker = GeneRanker.from_graph(part)
+            ranker.add_edges(added)
+            with self.subTest(seed=seed):
+                self.assertEqual(dict(rank_genes(process_graph(graph))), dict(ranker.rank()))
+
+    def test_remove_edges(self):
+        """Test removing edges and nodes from a ranker."""
+        for seed in range(10):
+            graph = make_graph(100, seed)
+            ranker = GeneRanker.from_graph(graph)
+            rng = random.Random(seed)
+            removed = rng.sample([
+                edge
+                for edge in graph.edges(keys=True, data=True)
+                if edge[3][RELATION] not in UNQUALIFIED_EDGES
+            ], 30)
+            graph.remove_edges_from([(u, v, key) for u, v, key, _ in removed])
+            ranker.remove_edges(removed)
+            with self.subTest(seed=seed):
+                self.assertEqual(dict(rank_genes(process_graph(graph))), dict(ranker.rank()))
+
+            isolated = [node for node in graph if 0 == graph.degree(node)]
+            graph.remove_nodes_from(isolated)
+            ranker.remove_nodes(isolated)
+            with self.subTest(seed=seed, isolated=len(isolated)):
+                self.assertEqual(dict(rank_genes(process_graph(graph))), dict(ranker.rank()))
+
+    def test_remove_unqualified_edge(self):
+        """Test that removing an unqualified edge raises an error and leaves the ranker as it was."""
+        graph = BELGraph()
+        phosphorylated = Protein('HGNC', 'A', variants=[ProteinModification('Ph')])
+        graph.add_increases(phosphorylated, Gene('HGNC', 'B'), citation='1', evidence='x')
+        ranker = GeneRanker.from_graph(graph)
+        ranks = ranker.rank()
+
+        edges = list(graph.edges(keys=True, data=True))
+        self.assertTrue(any(data[RELATION] == HAS_VARIANT for _, _, _, data in edges))
+        with self.assertRaises(ValueError):
+            ranker.remove_edges(edges)
+        self.assertEqual(ranks, ranker.rank())
+
+    def test_pickle(self):
+        """Test that a saved ranker gives the same ranks when loaded."""
+        ranker = GeneRanker.from_graph(make_graph(100, 0))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ranker.pickle')
+            ranker.to_pickle(path)
+            self.assertEqual(list(ranker.rank().items()), list(GeneRanker.from_pickle(path).rank().items()))
+
+
+def _get_gene_symbols_baseline(graph: BELGraph, cutoff: float) -> List[str]:
+    """Get the gene symbols like :func:`bel_enrichment.workflow.get_gene_symbols` did by sorting all genes."""
+    return [
+        name
+        for (namespace, name), rank in rank_genes(process_graph(graph)).most_common()
+        if namespace.lower() == 'hgnc' or cutoff < rank
+    ]
+
+
+class TestRankTable(unittest.TestCase):
+    """Tests that selecting the top genes from a :class:`RankTable` is the same as sorting all of them."""
+
+    def test_top(self):
+        """Test the top genes with and without a mask against :meth:`collections.Counter.most_common`."""
+        rng = random.Random(0)
+        # Few distinct ranks, so most genes are tied
+        ranks = collections.Counter({
+            (rng.choice(['HGNC', 'MGI']), f'G{i}'): 1 / rng.randint(1, 5)
+            for i in range(200)
+        })
+        table = RankTable.from_ranks(ranks)
+        mask = (table.namespaces == 'HGNC') | (0.3 < table.ranks)
+        expected = [
+            (namespace, name)
+            for (namespace, name), rank in ranks.most_common()
+            if namespace == 'HGNC' or 0.3 < rank
+        ]
+        for number in (None, 0, 1, 2, 7, 50, 137, 199, 200, 500):
+            with self.subTest(number=number):
+                self.assertEqual(
+                    ranks.most_common(number),
+                    [((namespace, name), rank) for namespace, name, rank in table.iterate(number=number)],
+                )
+                self.assertEqual(
+                    expected[:number],
+                    [(namespace, name) for namespace, name, _ in table.iterate(number=number, mask=mask)],
+                )
+
+    def test_get_gene_symbols(self):
+        """Test that getting the gene symbols gives the same genes in the same order as sorting all of them."""
+        from bel_enrichment.workflow import get_gene_symbols
+
+        for seed in range(10):
+            graph = make_graph(150, seed)
+            for cutoff in (0.0, 0.2, 1.0):
+                expected = _get_gene_symbols_baseline(graph, cutoff)
+                for number in (None, 1, 5, len(expected)):
+                    with self.subTest(seed=seed, cutoff=cutoff, number=number):
+                        self.assertEqual(expected[:number], get_gene_symbols(graph, cutoff=cutoff, number=number))
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for summarizing and compiling curation sheets."""
+
+import math
+import os
+import tempfile
+import unittest
+from typing import Any, List, Mapping, Optional
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from bel_enrichment.readers import SHEET_COLUMNS, read_sheet
+from bel_enrichment.sheets import (
+    generate_curation_report, generate_curation_summary, iterate_curated_statements, process_row,
+)
+
+COLUMNS = [
+    'PMID', 'Evidence', 'Subject', 'Predicate', 'Object', 'INDRA UUID', 'Belief', 'API',
+    'Curator', 'Checked', 'Correct', 'Changed', 'Error Type',
+]
+
+#: Rows of fixture sheets as (evidence, predicate, checked, correct, changed, error type)
+SHEETS = {
+    # Every category, a conflict between correct and changed, and a row without evidence text
+    'MAPT': [
+        ('MAPT binds tubulin.', 'increases', 'x', 'x', None, None),
+        ('MAPT is phosphorylated.', 'decreases', None, None, None, None),
+        ('GSK3B phosphorylates MAPT.', 'directlyIncreases', 'x', None, None, 'Wrong Sign, grounding'),
+        ('MAPT aggregates.', 'increases', 'x', None, 'x', 'grounding'),
+        ('MAPT stabilizes microtubules.', 'increases', None, None, 'x', ' Wrong sign'),
+        ('MAPT is cleaved.', 'decreases', None, 'x', 'x', None),
+        ('No evidence text.', 'increases', None, None, None, 'polarity'),
+        ('MAPT is acetylated.', 'association', None, 'x', None, None),
+    ],
+    # Starts with a different category, and has error types in another order
+    'APP': [
+        ('APP is cleaved by BACE1.', 'decreases', None, None, None, None),
+        ('APP increases amyloid beta.', 'increases', 'x', None, None, 'polarity,Grounding'),
+        ('APP is processed.', 'directlyDecreases', 'x', 'x', None, None),
+        ('APP binds APOE.', 'association', 'x', None, 'x', 'Entity Boundaries'),
+    ],
+    # Not curated at all, without the error type column
+    'PSEN1': [
+        ('PSEN1 cleaves APP.', 'increases', None, None, None, None),
+        ('PSEN1 is mutated.', 'decreases', None, None, None, None),
+    ],
+    # Only rows without evidence text, so it gets an empty report
+    'BACE1': [
+        ('No evidence text.', 'increases', 'x', 'x', None, None),
+    ],
+}
+
+
+def make_sheets(directory: str) -> None:
+    """Write the fixture sheets in a folder for each gene, like in a curation repository."""
+    for gene, rows in SHEETS.items():
+        df = pd.DataFrame(
+            [
+                (
+                    '12345', evidence, f'p(HGNC:{gene})', predicate, 'bp(GO:"apoptotic process")',
+                    f'{gene}-{i}', 0.95, 'reach', 'cthoyt' if i == 0 else None,
+                    checked, correct, changed, error_type,
+                )
+                for i, (evidence, predicate, checked, correct, changed, error_type) in enumerate(rows)
+            ],
+            columns=COLUMNS,
+        )
+        if gene == 'PSEN1':
+            del df['Error Type']
+        os.makedirs(os.path.join(directory, gene))
+        df.to_excel(os.path.join(directory, gene, f'{gene}_curation.xlsx'), index=False)
+
+
+#: The files written by the original implementation, which counted the rows of each sheet one by one
+EXPECTED_SUMMARY = {
+    'curation_summary.csv': (
+        b',Correct,Error,Error but other statement was identified,Modified by curator,Not curated,Total\n'
+        b'APP,1,1,0,1,1,4\n'
+        b'MAPT,2,1,1,1,1,7\n'
+        b'PSEN1,0,0,0,0,2,2\n'
+    ),
+    'error_types.csv': (
+        b',polarity,grounding,entity boundaries,wrong sign\n'
+        b'APP,1,1,1,0\n'
+        b'MAPT,1,2,0,2\n'
+    ),
+}
+EXPECTED_ACTIVATION_SUMMARY = {
+    'curation_summary.csv': (
+        b',Correct,Error,Error but other statement was identified,Modified by curator,Not curated,Total\n'
+        b'APP,0,1,0,0,0,1\n'
+        b'MAPT,1,1,1,1,0,4\n'
+        b'PSEN1,0,0,0,0,1,1\n'
+    ),
+    'error_types.csv': EXPECTED_SUMMARY['error_types.csv'],
+}
+
+_walk = os.walk
+
+
+def _sorted_walk(top, *args, **kwargs):
+    """Walk a directory in sorted order, so the genes come out in the same order on any file system."""
+    for dirpath, dirnames, filenames in _walk(top, *args, **kwargs):
+        dirnames.sort()
+        filenames.sort()
+        yield dirpath, dirnames, filenames
+
+
+def _summarize(edge_type_filter: Optional[str] = None, **kwargs) -> Mapping[str, bytes]:
+    with tempfile.TemporaryDirectory() as directory:
+        make_sheets(directory)
+        with mock.patch('os.walk', _sorted_walk):
+            generate_curation_summary(
+                directory, directory, '_curation.xlsx', use_tqdm=False, edge_type_filter=edge_type_filter, **kwargs,
+            )
+        rv = {}
+        for name in ('curation_summary.csv', 'error_types.csv'):
+            with open(os.path.join(directory, name), 'rb') as file:
+                rv[name] = file.read()
+        return rv
+
+
+class TestCurationSummary(unittest.TestCase):
+    """Tests that :func:`generate_curation_summary` writes the same files as the original implementation."""
+
+    def test_summary(self):
+        """Test the summary of all rows."""
+        self.assertEqual(EXPECTED_SUMMARY, _summarize())
+
+    def test_summary_activation_edges(self):
+        """Test the summary of only the rows with increasing relations."""
+        self.assertEqual(EXPECTED_ACTIVATION_SUMMARY, _summarize(edge_type_filter='activation_edges'))
+
+    def test_summary_workers(self):
+        """Test that summarizing the sheets in several processes writes the same files."""
+        self.assertEqual(EXPECTED_SUMMARY, _summarize(workers=2))
+
+
+#: The reports made by the original implementation, in the order it added the categories
+EXPECTED_REPORTS = {
+    ('MAPT', None): [
+        ('Correct', 2), ('Total', 7), ('Not curated', 1), ('Error', 1), ('Modified by curator', 1),
+        ('Error but other statement was identified', 1),
+    ],
+    ('MAPT', 'activation_edges'): [
+        ('Correct', 1), ('Total', 4), ('Error', 1), ('Modified by curator', 1),
+        ('Error but other statement was identified', 1),
+    ],
+    ('MAPT', 'inhibition_edges'): [('Not curated', 1), ('Total', 2)],
+    ('APP', None): [('Not curated', 1), ('Total', 4), ('Error', 1), ('Correct', 1), ('Modified by curator', 1)],
+    ('APP', 'activation_edges'): [('Error', 1), ('Total', 1)],
+    ('APP', 'inhibition_edges'): [('Not curated', 1), ('Total', 2), ('Correct', 1)],
+    ('PSEN1', None): [('Not curated', 2), ('Total', 2)],
+    ('PSEN1', 'activation_edges'): [('Not curated', 1), ('Total', 1)],
+    ('PSEN1', 'inhibition_edges'): [('Not curated', 1), ('Total', 1)],
+    ('BACE1', None): [],
+    ('BACE1', 'activation_edges'): [],
+    ('BACE1', 'inhibition_edges'): [],
+}
+
+
+class TestCurationReport(unittest.TestCase):
+    """Tests that :func:`generate_curation_report` gives the same reports as the original implementation."""
+
+    def test_reports(self):
+        """Test the report of each fixture sheet with each edge type filter, including the order of the keys."""
+        with tempfile.TemporaryDirectory() as directory:
+            make_sheets(directory)
+            for (gene, edge_type_filter), expected in EXPECTED_REPORTS.items():
+                path = os.path.join(directory, gene, f'{gene}_curation.xlsx')
+                with self.subTest(gene=gene, edge_type_filter=edge_type_filter):
+                    report = generate_curation_report(path, edge_type_filter=edge_type_filter, use_tqdm=False)
+                    self.assertEqual(expected, list(report.items()))
+
+
+def _normalize(value: Any) -> Any:
+    """Replace NaN with a string, since NaN is not equal to itself."""
+    if isinstance(value, float) and math.isnan(value):
+        return 'NaN'
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def _parse_with_process_row(df: pd.DataFrame) -> List[Mapping[str, Any]]:
+    """Get the statements parsed from each row with :func:`process_row`, like ``process_df`` originally did."""
+    with mock.patch('bel_enrichment.sheets._parse_statement') as parse_statement:
+        for line_number, row in df.iterrows():
+            process_row(bel_parser=None, row=row, line_number=line_number)
+    return [_normalize(call.kwargs) for call in parse_statement.call_args_list]
+
+
+def _parse_with_masks(df: pd.DataFrame) -> List[Mapping[str, Any]]:
+    """Get the statements from :func:`iterate_curated_statements` as they're passed to the parser."""
+    return [
+        _normalize(dict(
+            bel_parser=None,
+            reference=reference,
+            evidence=evidence,
+            annotations=annotations,
+            bel=bel,
+            line_number=line_number,
+        ))
+        for line_number, reference, evidence, annotations, bel in iterate_curated_statements(df)
+    ]
+
+
+class TestIterateCuratedStatements(unittest.TestCase):
+    """Tests that :func:`iterate_curated_statements` gives the same statements as :func:`process_row`."""
+
+    def assert_same_statements(self, df: pd.DataFrame) -> None:
+        """Assert that both give the same statements in the same order."""
+        expected = _parse_with_process_row(df)
+        self.assertEqual(expected, _parse_with_masks(df))
+
+    def test_fixture_sheets(self):
+        """Test the fixture sheets as they're read for compilation, where missing values count as true."""
+        with tempfile.TemporaryDirectory() as directory:
+            make_sheets(directory)
+            for gene in SHEETS:
+                df = read_sheet(os.path.join(directory, gene, f'{gene}_curation.xlsx'), usecols=SHEET_COLUMNS)
+                with self.subTest(gene=gene):
+                    self.assert_same_statements(df)
+
+    def test_values(self):
+        """Test other values in the curation columns, and sheets without the optional columns."""
+        values = ['x', np.nan, None, '', 0, 1, True, False]
+        rows = [
+            (f'{i}', f'Sentence {i}.', 'p(HGNC:MAPT)', 'increases', i, f'uuid-{i}', 0.5, 'reach', 'cthoyt',
+             checked, correct, changed)
+            for i, (checked, correct, changed) in enumerate(
+                (checked, correct, changed)
+                for checked in values
+                for correct in values
+                for changed in ('x', np.nan, '', 0)
+            )
+        ]
+        columns = [
+            'PMID', 'Evidence', 'Subject', 'Predicate', 'Object', 'INDRA UUID', 'Belief', 'API', 'Curator',
+            'Checked', 'Correct', 'Changed',
+        ]
+        df = pd.DataFrame(rows, columns=columns)
+        self.assertLess(0, len(_parse_with_process_row(df)))
+        self.assert_same_statements(df)
+        self.assert_same_statements(df.drop(columns=['INDRA UUID', 'Belief', 'API']))
+        self.assert_same_statements(df[df['Checked'] == 'x'])
+        self.assert_same_statements(df.iloc[:0])
+
+    def test_missing_reference(self):
+        """Test that a curated row without a PMID raises an error, but only if it's curated."""
+        df = pd.DataFrame(
+            [
+                ('123', 'Sentence.', 'p(HGNC:MAPT)', 'increases', 'p(HGNC:GSK3B)', 'cthoyt', 'x', 'x', None),
+                ('', 'Sentence.', 'p(HGNC:MAPT)', 'increases', 'p(HGNC:GSK3B)', 'cthoyt', '', 'x', None),
+            ],
+            columns=['PMID', 'Evidence', 'Subject', 'Predicate', 'Object', 'Curator', 'Checked', 'Correct', 'Changed'],
+        )
+        self.assert_same_statements(df)
+
+        df.loc[1, 'Checked'] = 'x'
+        with self.assertRaises(Exception):
+            _parse_with_process_row(df)
+        with self.assertRaises(Exception):
+            list(iterate_curated_statements(df))
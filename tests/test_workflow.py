@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for exporting curation sheets."""
+
+import unittest
+
+from bel_enrichment.workflow import _deduplicate_statements
+from indra.statements import Activation, Agent, Evidence, Phosphorylation
+
+GSK3B = Agent('GSK3B', db_refs={'HGNC': '4617'})
+MAPT = Agent('MAPT', db_refs={'HGNC': '6893'})
+
+
+def _evidence(pmid: str) -> Evidence:
+    return Evidence(source_api='reach', pmid=pmid, text=f'GSK3B activates MAPT in {pmid}.')
+
+
+class TestDeduplicateStatements(unittest.TestCase):
+    """Tests for deduplicating the statements of all genes before preassembling them together."""
+
+    def test_merge_evidences(self):
+        """Test that the evidences of statements with the same hash are merged without changing the originals."""
+        gsk3b_statements = [
+            Activation(GSK3B, MAPT, evidence=[_evidence('1'), _evidence('2')]),
+            Phosphorylation(GSK3B, MAPT, evidence=[_evidence('1')]),
+        ]
+        mapt_statements = [
+            Activation(GSK3B, MAPT, evidence=[_evidence('2'), _evidence('3')]),
+        ]
+
+        statements = _deduplicate_statements([*gsk3b_statements, *mapt_statements])
+        self.assertEqual(
+            [gsk3b_statements[0].get_hash(), gsk3b_statements[1].get_hash()],
+            [statement.get_hash() for statement in statements],
+        )
+        self.assertEqual(['1', '2', '3'], [evidence.pmid for evidence in statements[0].evidence])
+        self.assertEqual(['1'], [evidence.pmid for evidence in statements[1].evidence])
+
+        # The statements of each gene are still put in the store as they came from INDRA
+        self.assertEqual(['1', '2'], [evidence.pmid for evidence in gsk3b_statements[0].evidence])
+        self.assertEqual(['2', '3'], [evidence.pmid for evidence in mapt_statements[0].evidence])